@@ -0,0 +1,131 @@
+"""
+Operator views over every account's batches.
+Keeps a compact summary per operation plus secondary indexes (by status and by
+account), so admin listings, counts and stuck-worker checks never walk full
+operation state. In shared mode the same views are served by SharedStateStore.
+"""
+
+import threading
+import time
+
+# Operation fields exposed to operators (results and target lists are left out)
+SUMMARY_FIELDS = (
+    'id', 'user_id', 'username', 'status', 'total_count', 'completed_count', 'success_count',
+    'failed_count', 'skipped_count', 'start_time', 'end_time', 'next_unfollow_time', 'last_update'
+)
+
+
+def operation_summary(operation, updated_at=None):
+    """
+    Build the compact summary stored for admin views.
+
+    Args:
+        operation (dict): Full operation state
+        updated_at (float): When the operation was last written (defaults to now)
+
+    Returns:
+        dict: Summary fields plus 'updated_at'
+    """
+    summary = {field: operation.get(field) for field in SUMMARY_FIELDS}
+    summary['user_id'] = str(summary['user_id'])
+    summary['updated_at'] = updated_at or time.time()
+    return summary
+
+
+class OperationIndex:
+    """In-memory summaries of operations indexed by status and account (single-process mode)."""
+
+    def __init__(self):
+        """Initialize empty index."""
+        self._lock = threading.Lock()
+        self._summaries = {}
+        self._by_status = {}
+        self._by_user = {}
+
+    def _unlink(self, operation_id):
+        summary = self._summaries.pop(operation_id, None)
+        if summary is None:
+            return
+        self._by_status.get(summary['status'], set()).discard(operation_id)
+        self._by_user.get(summary['user_id'], set()).discard(operation_id)
+
+    def update(self, operation):
+        """Insert or refresh an operation's summary."""
+        summary = operation_summary(operation)
+        with self._lock:
+            self._unlink(summary['id'])
+            self._summaries[summary['id']] = summary
+            self._by_status.setdefault(summary['status'], set()).add(summary['id'])
+            self._by_user.setdefault(summary['user_id'], set()).add(summary['id'])
+
+    def remove(self, operation_ids):
+        """Drop operations from the index."""
+        with self._lock:
+            for operation_id in operation_ids:
+                self._unlink(operation_id)
+
+    def get_updated_at(self, operation_id):
+        """Get when an operation's summary was last refreshed, or None."""
+        summary = self._summaries.get(operation_id)
+        return summary['updated_at'] if summary else None
+
+    def query_operation_summaries(self, status=None, user_id=None, limit=50, offset=0):
+        """
+        Page through operation summaries, newest update first.
+
+        Args:
+            status (str): Optional status filter
+            user_id (str): Optional account filter
+            limit (int): Page size
+            offset (int): Page offset
+
+        Returns:
+            tuple: (list of summaries, total matching)
+        """
+        with self._lock:
+            candidates = None
+            if status is not None:
+                candidates = set(self._by_status.get(status, ()))
+            if user_id is not None:
+                user_ids = self._by_user.get(str(user_id), set())
+                candidates = user_ids.copy() if candidates is None else candidates & user_ids
+            if candidates is None:
+                candidates = self._summaries.keys()
+            matched = [self._summaries[operation_id] for operation_id in candidates]
+        matched.sort(key=lambda summary: summary['updated_at'], reverse=True)
+        return [dict(summary) for summary in matched[offset:offset + limit]], len(matched)
+
+    def status_counts(self):
+        """Get the number of operations per status."""
+        with self._lock:
+            return {status: len(ids) for status, ids in self._by_status.items() if ids}
+
+    def account_status_counts(self):
+        """Get per-account operation counts by status."""
+        with self._lock:
+            counts = {}
+            for status, ids in self._by_status.items():
+                for operation_id in ids:
+                    user_counts = counts.setdefault(self._summaries[operation_id]['user_id'], {})
+                    user_counts[status] = user_counts.get(status, 0) + 1
+            return counts
+
+    def stale_operations(self, statuses, before):
+        """
+        Get operations in the given statuses not written since `before`.
+
+        Args:
+            statuses (tuple): Statuses to check (e.g. running ones)
+            before (float): Epoch seconds
+
+        Returns:
+            list: Summaries of stale operations
+        """
+        with self._lock:
+            stale = []
+            for status in statuses:
+                for operation_id in self._by_status.get(status, ()):
+                    summary = self._summaries[operation_id]
+                    if summary['updated_at'] < before:
+                        stale.append(dict(summary))
+            return stale
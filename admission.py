@@ -0,0 +1,126 @@
+"""
+Quota-aware admission and scheduling of unfollows.
+Unfollows are capped by rolling budgets: UNFOLLOW_HOURLY_LIMIT successes in any 60
+minutes and UNFOLLOW_DAILY_LIMIT in any 24 hours, on top of the worker's spacing
+between quota-consuming targets. A slot is a time at which one more unfollow fits
+all of them. Past unfollows come from the attempt history's minute rollups; slots
+already promised to an account's earlier batches count as used.
+
+- next_slot: the earliest slot at or after a time (what the worker sleeps until)
+- build_calendar: consecutive slots for a number of unfollows (a batch's schedule)
+- summarize_calendar: per-day and per-hour-window counts, for responses and status
+"""
+
+from bisect import bisect_right, insort
+from datetime import datetime
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+
+def history_times(buckets, bucket_seconds=60):
+    """
+    Expand minute rollups into one timestamp per success.
+
+    Each success is placed at the end of its bucket, so the budget it uses is never
+    assumed to free up before it really does.
+
+    Args:
+        buckets (list): (bucket start, successes) pairs
+        bucket_seconds (int): Bucket width
+
+    Returns:
+        list: Sorted timestamps
+    """
+    times = []
+    for bucket, successes in buckets:
+        times.extend([bucket + bucket_seconds] * int(successes))
+    times.sort()
+    return times
+
+
+def next_slot(at, used, hourly_limit, daily_limit):
+    """
+    Earliest time at or after `at` when one more unfollow fits both rolling budgets.
+
+    Args:
+        at (float): Earliest acceptable time (epoch seconds)
+        used (list): Sorted timestamps of unfollows already made or scheduled
+        hourly_limit (int): Unfollows allowed in any 60 minutes
+        daily_limit (int): Unfollows allowed in any 24 hours
+
+    Returns:
+        float: Slot time
+    """
+    slot = at
+    while True:
+        later = slot
+        for window, limit in ((HOUR, hourly_limit), (DAY, daily_limit)):
+            # Later entries count too: history is rounded up to its bucket end and
+            # scheduled slots may lie ahead, and either would share the window
+            first = bisect_right(used, slot - window)
+            in_window = len(used) - first
+            if in_window >= limit:
+                # Free once enough of the window's oldest unfollows have aged out
+                later = max(later, used[first + in_window - limit] + window)
+        if later == slot:
+            return slot
+        slot = later
+
+
+def build_calendar(count, start, used, hourly_limit, daily_limit, spacing):
+    """
+    Lay out `count` unfollows one after another, each in the earliest slot.
+
+    Args:
+        count (int): Unfollows to schedule
+        start (float): Earliest time for the first one
+        used (list): Sorted timestamps of unfollows already made or scheduled (not modified)
+        hourly_limit (int): Unfollows allowed in any 60 minutes
+        daily_limit (int): Unfollows allowed in any 24 hours
+        spacing (float): Minimum seconds between consecutive unfollows
+
+    Returns:
+        list: Slot times, in order
+    """
+    used = list(used)
+    slots = []
+    at = start
+    for _ in range(count):
+        slot = next_slot(at, used, hourly_limit, daily_limit)
+        slots.append(slot)
+        insort(used, slot)
+        at = slot + spacing
+    return slots
+
+
+def summarize_calendar(slots, now, hourly_limit, daily_limit):
+    """
+    Summarize a calendar for clients: its span, per-day counts and per-hour windows.
+
+    Args:
+        slots (list): Slot times from build_calendar
+        now (float): Reference time
+        hourly_limit (int): Hourly budget the calendar respects
+        daily_limit (int): Daily budget the calendar respects
+
+    Returns:
+        dict: Calendar summary (empty span if there are no slots)
+    """
+    days = {}
+    windows = {}
+    for slot in slots:
+        day = datetime.fromtimestamp(slot).strftime('%Y-%m-%d')
+        days[day] = days.get(day, 0) + 1
+        window = int(slot // HOUR) * HOUR
+        windows[window] = windows.get(window, 0) + 1
+    return {
+        'quota_targets': len(slots),
+        'hourly_limit': hourly_limit,
+        'daily_limit': daily_limit,
+        'first_slot': slots[0] if slots else None,
+        'last_slot': slots[-1] if slots else None,
+        'span_seconds': round(slots[-1] - now) if slots else 0,
+        'days': [{'date': day, 'count': count} for day, count in days.items()],
+        'windows': [{'start': start, 'end': start + HOUR, 'count': count} for start, count in windows.items()]
+    }
@@ -13,12 +13,19 @@ from requests_oauthlib import OAuth2Session
 import secrets
 import base64
 import hashlib
-from config import API_BASE_URL
+from config import API_BASE_URL, OAUTH_TOKEN_URL, UNFOLLOW_HOURLY_LIMIT, UNFOLLOW_DAILY_LIMIT
+from tracing import tracer, SPAN_KIND_CLIENT
+
+# Keyring service holding the tokens; each account's entries are prefixed with its ID
+KEYRING_SERVICE = "x_unfollow_app"
+
+# Token entries stored per account
+TOKEN_ENTRIES = ("access_token", "refresh_token", "token_info")
 
 class XAPIClient:
     """X API v2 client with OAuth 2.0 PKCE authentication."""
     
-    def __init__(self, client_id, client_secret, redirect_uri):
+    def __init__(self, client_id, client_secret, redirect_uri, account_id=None):
         """
         Initialize X API client.
         
@@ -26,6 +33,8 @@ class XAPIClient:
             client_id (str): X API client ID
             client_secret (str): X API client secret
             redirect_uri (str): OAuth redirect URI
+            account_id (str): Account whose stored tokens this client uses (None for a client
+                              mid-login, which keeps its tokens in memory until bind_account)
         """
         self.client_id = client_id
         self.client_secret = client_secret
@@ -40,6 +49,7 @@ class XAPIClient:
         # Rate limit tracking - initialize with defaults
         self.rate_limits = {
             'following': {'remaining': 15, 'reset': 0, 'limit': 15},
+            'followers': {'remaining': 15, 'reset': 0, 'limit': 15},
             'unfollow': {'remaining': 'unknown', 'reset': 0, 'limit': 'unknown'}, 
             'user_lookup': {'remaining': 300, 'reset': 0, 'limit': 300},
             'unfollow_hourly': {'remaining': 'unknown', 'reset': 0, 'limit': 'unknown'},
@@ -49,8 +59,21 @@ class XAPIClient:
         # Error tracking for Layer 2 classification
         self.last_api_error = None
         
-        # Load stored tokens
-        self._load_tokens()
+        # Authenticated account (set after user info lookup) and optional shared rate-limit store
+        self.account_id = account_id
+        self.rate_limit_store = None
+        
+        # Tokens of a client not yet bound to an account; bound clients read the keyring
+        # on first use, so a client built only to report rate limits never touches it
+        self._unbound_tokens = {}
+        self._tokens_loaded = False
+        
+        # Bumped on every change to self.rate_limits (lets readers cache status snapshots)
+        self.rate_limit_version = 0
+        self._last_rate_limit_sync = 0
+        
+        # Callable taking an account ID and returning its persistent unfollow counts (attached by the app)
+        self.unfollow_stats_provider = None
     
     def _generate_pkce_pair(self):
         """Generate PKCE code verifier and challenge for OAuth 2.0."""
@@ -122,7 +145,7 @@ class XAPIClient:
             }
             
             response = requests.post(
-                'https://api.x.com/2/oauth2/token',
+                OAUTH_TOKEN_URL,
                 data=data,
                 headers=headers
             )
@@ -148,7 +171,7 @@ class XAPIClient:
             bool: True if refresh successful, False otherwise
         """
         try:
-            refresh_token = keyring.get_password("x_unfollow_app", "refresh_token")
+            refresh_token = self._read_secret("refresh_token")
             if not refresh_token:
                 logging.warning("No refresh token available - user needs to re-authenticate")
                 return False
@@ -169,7 +192,7 @@ class XAPIClient:
             }
             
             response = requests.post(
-                'https://api.x.com/2/oauth2/token',
+                OAUTH_TOKEN_URL,
                 data=data,
                 headers=headers
             )
@@ -187,13 +210,30 @@ class XAPIClient:
             logging.error(f"Error refreshing access token: {str(e)}")
             return False
     
+    def _keyring_key(self, name):
+        """Keyring entry name of one of this account's tokens."""
+        return f"{self.account_id}:{name}"
+    
+    def _read_secret(self, name):
+        """Read a token entry (from memory while the client is unbound)."""
+        if self.account_id is None:
+            return self._unbound_tokens.get(name)
+        return keyring.get_password(KEYRING_SERVICE, self._keyring_key(name))
+    
+    def _write_secret(self, name, value):
+        """Write a token entry (to memory while the client is unbound)."""
+        if self.account_id is None:
+            self._unbound_tokens[name] = value
+        else:
+            keyring.set_password(KEYRING_SERVICE, self._keyring_key(name), value)
+    
     def _store_tokens(self, tokens):
         """Store access and refresh tokens securely using keyring."""
         try:
             access_token = tokens.get('access_token')
-            keyring.set_password("x_unfollow_app", "access_token", access_token)
+            self._write_secret("access_token", access_token)
             if 'refresh_token' in tokens:
-                keyring.set_password("x_unfollow_app", "refresh_token", tokens.get('refresh_token'))
+                self._write_secret("refresh_token", tokens.get('refresh_token'))
             
             # Store token metadata
             token_info = {
@@ -201,7 +241,8 @@ class XAPIClient:
                 'token_type': tokens.get('token_type', 'bearer'),
                 'created_at': time.time()
             }
-            keyring.set_password("x_unfollow_app", "token_info", json.dumps(token_info))
+            self._write_secret("token_info", json.dumps(token_info))
+            self._tokens_loaded = True
             
             # Update session headers immediately
             if access_token:
@@ -216,9 +257,12 @@ class XAPIClient:
             raise
     
     def _load_tokens(self):
-        """Load stored tokens from keyring."""
+        """Load this account's stored tokens from keyring (once, on first use)."""
+        if self._tokens_loaded:
+            return
+        self._tokens_loaded = True
         try:
-            access_token = keyring.get_password("x_unfollow_app", "access_token")
+            access_token = self._read_secret("access_token")
             if access_token:
                 self.session.headers.update({
                     'Authorization': f'Bearer {access_token}',
@@ -227,17 +271,133 @@ class XAPIClient:
         except Exception as e:
             logging.error(f"Error loading tokens: {str(e)}")
     
+    def reload_tokens(self):
+        """Re-read this account's tokens from keyring (after another client stored new ones)."""
+        self._tokens_loaded = False
+        self._load_tokens()
+    
+    def _migrate_legacy_tokens(self):
+        """
+        Move the old single-account keyring entries (which never recorded their account)
+        to this account. Only called once the account is confirmed by a user lookup; entries
+        the account already holds from this login are newer and are kept.
+        """
+        migrated = False
+        for name in TOKEN_ENTRIES:
+            value = keyring.get_password(KEYRING_SERVICE, name)
+            if value is None:
+                continue
+            if self._read_secret(name) is None:
+                self._write_secret(name, value)
+            keyring.delete_password(KEYRING_SERVICE, name)
+            migrated = True
+        if migrated:
+            logging.info(f"Migrated legacy stored tokens to account {self.account_id}")
+    
+    def bind_account(self, account_id, confirmed=False):
+        """
+        Attach this client to an account: its tokens move to that account's keyring entries
+        and its rate-limit state is loaded.
+        
+        Args:
+            account_id (str): Account the tokens belong to
+            confirmed (bool): The account came from a user lookup with this client's tokens
+                (not a placeholder) - legacy single-account entries are migrated to it
+        """
+        if account_id == self.account_id:
+            return
+        try:
+            self._load_tokens()
+            secrets_held = {name: self._read_secret(name) for name in TOKEN_ENTRIES}
+            previous = self.account_id
+            self.account_id = account_id
+            for name, value in secrets_held.items():
+                if value is not None:
+                    self._write_secret(name, value)
+            if previous is not None:
+                self._delete_secrets(previous)
+            self._unbound_tokens = {}
+            if confirmed:
+                self._migrate_legacy_tokens()
+        except Exception as e:
+            logging.error(f"Error storing tokens for account {account_id}: {str(e)}")
+        self._sync_rate_limits()
+    
+    def _delete_secrets(self, account_id):
+        """Delete an account's token entries from keyring."""
+        for name in TOKEN_ENTRIES:
+            try:
+                keyring.delete_password(KEYRING_SERVICE, f"{account_id}:{name}")
+            except keyring.errors.PasswordDeleteError:
+                pass
+    
     def clear_tokens(self):
         """Clear stored tokens from keyring."""
         try:
-            keyring.delete_password("x_unfollow_app", "access_token")
-            keyring.delete_password("x_unfollow_app", "refresh_token")
-            keyring.delete_password("x_unfollow_app", "token_info")
+            if self.account_id is not None:
+                self._delete_secrets(self.account_id)
+            self._unbound_tokens = {}
             self.session.headers.pop('Authorization', None)
             logging.info("Cleared stored tokens")
         except Exception as e:
             logging.error(f"Error clearing tokens: {str(e)}")
     
+    def close(self):
+        """Release the HTTP session's pooled connections."""
+        self.session.close()
+    
+    def attach_rate_limit_store(self, store):
+        """
+        Persist and share rate-limit counters through an external store.
+        
+        Args:
+            store: Object with load_rate_limits(account) and save_rate_limits(account, limits),
+                   e.g. RateLimitFileStore or SharedStateStore
+        """
+        self.rate_limit_store = store
+        self._sync_rate_limits()
+    
+    def _rate_limit_account(self):
+        """Key used for this client's rate-limit state in the store."""
+        return self.account_id or 'default'
+    
+    def _sync_rate_limits(self):
+        """Refresh local counters from the store (restored windows, or quota used by other processes)."""
+        if self.rate_limit_store is None:
+            return
+        try:
+            stored = self.rate_limit_store.load_rate_limits(self._rate_limit_account())
+            self._last_rate_limit_sync = time.time()
+            for endpoint, info in stored.items():
+                if endpoint in self.rate_limits and any(self.rate_limits[endpoint].get(key) != value for key, value in info.items()):
+                    self.rate_limits[endpoint].update(info)
+                    self.rate_limit_version += 1
+        except Exception as e:
+            logging.error(f"Error loading shared rate limits: {str(e)}")
+    
+    def rate_limit_state_version(self, max_age=0):
+        """
+        Get a counter that changes whenever the rate-limit state changes.
+        
+        Args:
+            max_age (float): Re-read the store only if the last sync is older than this (seconds)
+            
+        Returns:
+            int: Current version
+        """
+        if time.time() - self._last_rate_limit_sync >= max_age:
+            self._sync_rate_limits()
+        return self.rate_limit_version
+    
+    def _persist_rate_limits(self, endpoint):
+        """Write one endpoint's counters back to the shared store."""
+        if self.rate_limit_store is None or endpoint not in self.rate_limits:
+            return
+        try:
+            self.rate_limit_store.save_rate_limits(self._rate_limit_account(), {endpoint: self.rate_limits[endpoint]})
+        except Exception as e:
+            logging.error(f"Error saving shared rate limits: {str(e)}")
+    
     def _check_rate_limit(self, endpoint):
         """
         Check if we're within rate limits for an endpoint.
@@ -251,6 +411,7 @@ class XAPIClient:
         if endpoint not in self.rate_limits:
             return True
         
+        self._sync_rate_limits()
         limit_info = self.rate_limits[endpoint]
         current_time = time.time()
         
@@ -263,7 +424,9 @@ class XAPIClient:
         if current_time > limit_info['reset']:
             limit_info['remaining'] = limit_info['limit']
             limit_info['reset'] = current_time + 900  # 15 minutes
+            self.rate_limit_version += 1
             logging.info(f"Rate limit window reset for {endpoint}: {limit_info['remaining']}/{limit_info['limit']}")
+            self._persist_rate_limits(endpoint)
         
         # If rate limited, raise exception instead of waiting
         if limit_info['remaining'] <= 0:
@@ -300,6 +463,8 @@ class XAPIClient:
                         self.rate_limits[endpoint]['reset'] = int(reset) if reset else current_time + 900
                         
                         logging.info(f"Initialized {endpoint} rate limits from API: {remaining_count}/{limit_count}, reset: {self.rate_limits[endpoint]['reset']}, status: {response.status_code}")
+                        self.rate_limit_version += 1
+                        self._persist_rate_limits(endpoint)
                         return  # Don't continue with normal update logic since we just initialized
                 
                 # Normal rate limit update logic for known limits
@@ -345,6 +510,9 @@ class XAPIClient:
                     if limit_count in [15, 50, 300]:  # Expected X API limits
                         self.rate_limits[endpoint]['limit'] = limit_count
                 
+                self.rate_limit_version += 1
+                self._persist_rate_limits(endpoint)
+                
         except (ValueError, Exception) as e:
             logging.error(f"Error updating rate limits: {str(e)}")
     
@@ -363,22 +531,28 @@ class XAPIClient:
             requests.Response: API response
         """
         try:
+            self._load_tokens()
+            
             # Check rate limits (will raise exception if rate limited)
             self._check_rate_limit(api_endpoint_type)
             
             url = f"{self.api_base_url}{endpoint}"
             
-            if method.upper() == 'GET':
-                response = self.session.get(url, params=params)
-            elif method.upper() == 'POST':
-                response = self.session.post(url, json=data, params=params)
-            elif method.upper() == 'DELETE':
-                response = self.session.delete(url, params=params)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            # Update rate limits from response headers
-            self._update_rate_limit(response, api_endpoint_type)
+            with tracer.span('http.request', SPAN_KIND_CLIENT, **{
+                'http.request.method': method.upper(), 'url.path': endpoint, 'endpoint.type': api_endpoint_type
+            }) as http_span:
+                if method.upper() == 'GET':
+                    response = self.session.get(url, params=params)
+                elif method.upper() == 'POST':
+                    response = self.session.post(url, json=data, params=params)
+                elif method.upper() == 'DELETE':
+                    response = self.session.delete(url, params=params)
+                else:
+                    raise ValueError(f"Unsupported HTTP method: {method}")
+                http_span.set_attribute('http.response.status_code', response.status_code)
+                
+                # Update rate limits from response headers
+                self._update_rate_limit(response, api_endpoint_type)
             
             # Handle rate limit errors
             if response.status_code == 429:
@@ -399,7 +573,10 @@ class XAPIClient:
             # Handle token expiration
             if response.status_code == 401:
                 logging.info("Access token expired, attempting refresh")
-                if self.refresh_access_token():
+                with tracer.span('token_refresh') as refresh_span:
+                    refreshed = self.refresh_access_token()
+                    refresh_span.set_attribute('refreshed', bool(refreshed))
+                if refreshed:
                     return self._make_api_request(method, endpoint, params, data, api_endpoint_type)
                 else:
                     raise Exception("Authentication failed - please re-login")
@@ -422,7 +599,10 @@ class XAPIClient:
             
             if response.status_code == 200:
                 data = response.json()
-                return data.get('data', {})
+                user_data = data.get('data', {})
+                if user_data.get('id'):
+                    self.bind_account(user_data['id'], confirmed=True)
+                return user_data
             else:
                 logging.error(f"Failed to get user info: {response.status_code} - {response.text}")
                 return None
@@ -444,12 +624,23 @@ class XAPIClient:
         try:
             # Remove @ symbol if present
             username = username.lstrip('@')
-            
+            self.last_api_error = None
+
             response = self._make_api_request('GET', f'/users/by/username/{username}', api_endpoint_type='user_lookup')
-            
+
             if response.status_code == 200:
                 data = response.json()
                 user_data = data.get('data', {})
+
+                # Unknown and suspended handles come back as 200 with an errors array
+                if not user_data and 'errors' in data:
+                    error_detail = str(data['errors'][0].get('detail', ''))
+                    self.last_api_error = {
+                        'type': 'lookup_error',
+                        'message': 'Account suspended' if 'suspended' in error_detail.lower() else 'User not found',
+                        'detail': error_detail,
+                        'http_status': 200
+                    }
                 return user_data.get('id')
             else:
                 logging.error(f"Failed to resolve username {username}: {response.status_code} - {response.text}")
@@ -478,6 +669,7 @@ class XAPIClient:
             bool: True if successful, False otherwise
         """
         try:
+            self.last_api_error = None
             response = self._make_api_request('DELETE', f'/users/{source_user_id}/following/{target_user_id}', api_endpoint_type='unfollow')
             
             # Enhanced Layer 2 error handling
@@ -610,6 +802,36 @@ class XAPIClient:
             return False
     
     
+    def get_relationship_page(self, user_id, relation='following', pagination_token=None, max_results=1000):
+        """
+        Fetch one page of an account's following or followers list.
+        
+        Args:
+            user_id (str): Account whose list is read
+            relation (str): 'following' or 'followers' (each has its own rate limit)
+            pagination_token (str): Token from the previous page, None for the first page
+            max_results (int): Page size (X API maximum is 1000)
+            
+        Returns:
+            dict: {'users': [{'id', 'username'}], 'next_token': str or None}
+        """
+        if relation not in ('following', 'followers'):
+            raise ValueError(f"Unsupported relation: {relation}")
+        
+        params = {'max_results': max_results}
+        if pagination_token:
+            params['pagination_token'] = pagination_token
+        
+        # Rate limit exceptions propagate so the caller can wait and resume from the same token
+        response = self._make_api_request('GET', f'/users/{user_id}/{relation}', params=params, api_endpoint_type=relation)
+        
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch {relation} page: {response.status_code} - {response.text}")
+        
+        data = response.json()
+        users = [{'id': user['id'], 'username': user.get('username')} for user in data.get('data', [])]
+        return {'users': users, 'next_token': data.get('meta', {}).get('next_token')}
+    
     def get_rate_limit_status(self, refresh_from_api=False):
         """
         Get current rate limit status.
@@ -623,34 +845,39 @@ class XAPIClient:
         # refresh_from_api parameter maintained for compatibility but not implemented
         
         # Calculate estimated hourly/daily limits for free tier using persistent tracking
-        current_time = time.time()
+        self._sync_rate_limits()
+        hourly_reset = daily_reset = None
         
         # Try to get actual counts from persistent tracking
         try:
-            from app import get_unfollow_stats
-            stats = get_unfollow_stats()
+            if self.unfollow_stats_provider is None:
+                raise RuntimeError("Unfollow tracking not attached")
+            stats = self.unfollow_stats_provider(self.account_id)
             
             # Use persistent tracking data for more accurate remaining counts
             estimated_hourly = stats['hourly_limit']
             estimated_daily = stats['daily_limit']
             hourly_remaining = max(0, estimated_hourly - stats['hourly_successful'])
             daily_remaining = max(0, estimated_daily - stats['daily_successful'])
+            # When the oldest success in each rolling window leaves it (absolute, None if none)
+            hourly_reset = stats.get('hourly_reset')
+            daily_reset = stats.get('daily_reset')
             
-        except (ImportError, Exception):
+        except Exception:
             # Fallback to estimates if tracking not available
             base_15min_limit = self.rate_limits['unfollow']['limit']
             if base_15min_limit != 'unknown' and isinstance(base_15min_limit, int):
                 # Conservative estimates: assume rate limits apply across longer periods
-                estimated_hourly = min(base_15min_limit * 4, 4)  # 4 windows per hour, but cap at 4 for free tier
-                estimated_daily = min(base_15min_limit * 96, 50)  # 96 windows per day, but cap at 50 for free tier
+                estimated_hourly = min(base_15min_limit * 4, UNFOLLOW_HOURLY_LIMIT)  # 4 windows per hour, capped at the free tier limit
+                estimated_daily = min(base_15min_limit * 96, UNFOLLOW_DAILY_LIMIT)  # 96 windows per day, capped at the free tier limit
                 
                 # Calculate remaining based on recent usage patterns
                 hourly_remaining = estimated_hourly
                 daily_remaining = estimated_daily
             else:
                 # Use conservative free tier defaults when unknown
-                estimated_hourly = 4
-                estimated_daily = 50
+                estimated_hourly = UNFOLLOW_HOURLY_LIMIT
+                estimated_daily = UNFOLLOW_DAILY_LIMIT
                 hourly_remaining = 'unknown'
                 daily_remaining = 'unknown'
         
@@ -663,12 +890,12 @@ class XAPIClient:
             'unfollow_hourly': {
                 'remaining': hourly_remaining,
                 'limit': estimated_hourly,
-                'reset_time': current_time + 3600  # Next hour
+                'reset_time': hourly_reset
             },
             'unfollow_daily': {
                 'remaining': daily_remaining,
                 'limit': estimated_daily,
-                'reset_time': current_time + 86400  # Next day
+                'reset_time': daily_reset
             },
             'user_lookup': {
                 'remaining': self.rate_limits['user_lookup']['remaining'],
@@ -4,15 +4,52 @@ Implements OAuth 2.0 authentication and batch unfollowing functionality.
 """
 
 import logging
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, session, g
 from werkzeug.middleware.proxy_fix import ProxyFix
 import os
 import time
 import threading
 import json
+import secrets
+import socket
+import hashlib
+import zlib
 from datetime import datetime, timedelta
 from api import XAPIClient
-from config import CLIENT_ID, CLIENT_SECRET, CALLBACK_URL, SESSION_TIMEOUT, DEVELOPMENT_MODE
+from client_pool import XAPIClientPool
+from ledger import TargetLedger, SETTLED_OUTCOMES, normalize_target, settled_outcome
+from shared_state import SharedStateStore, LeaseLostError, ACTIVE_STATUSES
+from rate_limit_store import RateLimitFileStore
+from eta import EtaModel, quota_stall, combine, confidence_range, rebase_eta
+from validation import validate_targets
+from relationships import RelationshipScanStore, ACTIVE_SCAN_STATUSES
+from snapshots import SnapshotStore, diff as diff_snapshots
+from timeseries import AttemptTimeSeries, RESOLUTIONS
+from admin import OperationIndex
+from batch_state import BatchStateManager
+from archive_import import iter_archive_following_ids
+from results import RESULT_OUTCOMES, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from tracing import tracer, FileSpanExporter, OtlpHttpSpanExporter, NOOP_SPAN
+from profiler import SamplingProfiler, RouteTimer
+from archive import OperationArchive
+from batch_planner import classify_target, pick_moves, plan_batch, NO_QUOTA_CLASSES
+from admission import DAY, history_times, next_slot, build_calendar, summarize_calendar
+from memory_diagnostics import (deep_sizeof, operation_memory, process_memory, TracemallocSnapshots,
+                                DIFF_KEY_TYPES)
+from config import (CLIENT_ID, CLIENT_SECRET, CALLBACK_URL, SESSION_TIMEOUT, DEVELOPMENT_MODE,
+                    LEDGER_DB_FILE, LEDGER_BLOOM_CAPACITY, LEDGER_BLOOM_ERROR_RATE,
+                    SHARED_STATE_ENABLED, SHARED_STATE_DB_FILE, SHARED_STATE_HOST, EXECUTOR_LEASE_TTL, EXECUTOR_POLL_INTERVAL,
+                    LEASE_MODE_ENABLED, ACCOUNT_LEASE_TTL, LEASE_HEARTBEAT_INTERVAL, NODE_ID,
+                    RATE_LIMIT_STATE_FILE, RATE_LIMIT_SYNC_INTERVAL, RELATIONSHIP_DB_FILE, RELATIONSHIP_PAGE_SIZE,
+                    SNAPSHOT_DIR, SNAPSHOT_KEEP, TIMESERIES_DB_FILE, TIMESERIES_RETENTION_DAYS,
+                    UNFOLLOW_HOURLY_LIMIT, UNFOLLOW_DAILY_LIMIT, ADMIN_API_TOKEN, ADMIN_STUCK_AFTER,
+                    SSE_POLL_INTERVAL, SSE_KEEPALIVE_INTERVAL, TRACING_ENABLED, TRACE_EXPORT_FILE,
+                    OTLP_TRACES_ENDPOINT, TRACE_SERVICE_NAME, PROFILE_MAX_SECONDS, PROFILE_DEFAULT_INTERVAL_MS,
+                    PROFILE_TIMED_ROUTES, ROUTE_TIMING_ENABLED, TRACEMALLOC_DEFAULT_FRAMES,
+                    TRACEMALLOC_MAX_SNAPSHOTS, ARCHIVE_DB_FILE, ARCHIVE_WARM_HOURS, ARCHIVE_RETENTION_DAYS,
+                    ARCHIVE_EXPIRE_INTERVAL, BATCH_PLANNER_ENABLED, PLANNER_FOLLOWING_MAX_AGE,
+                    CLIENT_POOL_MAX_CLIENTS, CLIENT_POOL_IDLE_TTL, OAUTH_LOGIN_TTL,
+                    ADMISSION_CONTROL_ENABLED, ADMISSION_MAX_DAYS)
 
 # Configure logging
 logging.basicConfig(
@@ -34,89 +71,487 @@ if DEVELOPMENT_MODE:
     app.permanent_session_lifetime = SESSION_TIMEOUT
     app.config['SESSION_PERMANENT'] = True
 
-# Initialize X API client
-x_client = XAPIClient(CLIENT_ID, CLIENT_SECRET, CALLBACK_URL)
+# Per-target traces (no-op unless enabled)
+if TRACING_ENABLED:
+    tracer.configure(TRACE_SERVICE_NAME, OtlpHttpSpanExporter(OTLP_TRACES_ENDPOINT) if OTLP_TRACES_ENDPOINT
+                     else FileSpanExporter(TRACE_EXPORT_FILE))
+    logging.info(f"Tracing enabled - exporting spans to {OTLP_TRACES_ENDPOINT or TRACE_EXPORT_FILE}")
 
-# Global variable to track slow batch operations
-slow_batch_operations = {}
+# On-demand sampling profiler; polling routes are timed while a profile runs
+route_timer = RouteTimer(PROFILE_TIMED_ROUTES, always_on=ROUTE_TIMING_ENABLED)
+profiler = SamplingProfiler(route_timer)
+
+# On-demand allocation snapshots for the memory diagnostics endpoints
+tracemalloc_snapshots = TracemallocSnapshots(TRACEMALLOC_MAX_SNAPSHOTS)
+
+# Persistent ledger of settled targets (skips duplicates across batches)
+target_ledger = TargetLedger(LEDGER_DB_FILE, LEDGER_BLOOM_CAPACITY, LEDGER_BLOOM_ERROR_RATE)
+
+# Non-mutual scans (following minus followers), resumable from stored pagination tokens
+relationship_store = RelationshipScanStore(RELATIONSHIP_DB_FILE)
+scan_threads = {}  # scan_id -> thread driving the scan in this process
+scan_threads_lock = threading.Lock()
+
+# Memory-mapped ID snapshots of each fetched list (reused instead of refetching)
+snapshot_store = SnapshotStore(SNAPSHOT_DIR, SNAPSHOT_KEEP)
+
+# Long-term attempt history (minute/hour/day rollups)
+attempt_history = AttemptTimeSeries(
+    TIMESERIES_DB_FILE, {resolution: days * 86400 for resolution, days in TIMESERIES_RETENTION_DAYS.items()}
+)
+
+# In-process batch operations and queue, behind per-account lock stripes
+batch_state = BatchStateManager()
+
+# Status/account-indexed operation summaries for the admin API (single-process mode;
+# in shared mode the store keeps the same indexes)
+operation_index = OperationIndex()
 
-# Global batch queue management
-batch_queue = []  # Queue of pending batch operations
 MAX_TOTAL_BATCHES = 3  # Maximum total batches (running + queued)
 
-def get_active_batch_count(user_id):
-    """Get count of active batches for a user (running + queued)."""
-    active_count = 0
-    
-    # Count running/starting operations
-    for operation in slow_batch_operations.values():
-        if (operation['user_id'] == user_id and 
-            operation['status'] in ['starting', 'running', 'waiting_for_rate_limit_reset']):
-            active_count += 1
+# Finished batches leave the hot state for a compressed on-disk archive (summaries stay in
+# memory for the warm window, full state is decompressed on access, expired after retention)
+operation_archive = OperationArchive(ARCHIVE_DB_FILE, ARCHIVE_WARM_HOURS * 3600)
+archive_expiry = {'last_run': 0}
+
+# Process-shared state for multi-worker deployments (None = single-process globals).
+# When enabled the store is the source of truth for reads (and holds the queue); batch_state
+# only holds the working copies of batches driven by this process.
+shared_state = SharedStateStore(SHARED_STATE_DB_FILE) if SHARED_STATE_ENABLED else None
+if shared_state is not None:
+    # SQLite WAL and the archive are local files: refuse to join a store pinned to another host
+    shared_state.claim_host(SHARED_STATE_HOST or socket.gethostname(), os.path.abspath(ARCHIVE_DB_FILE))
+
+# Rate-limit windows survive restarts (and are shared between processes in shared mode)
+rate_limit_store = shared_state if shared_state is not None else RateLimitFileStore(RATE_LIMIT_STATE_FILE)
+
+def create_api_client(account_id):
+    """Build an account's X API client (account_id None for a login in progress)."""
+    client = XAPIClient(CLIENT_ID, CLIENT_SECRET, CALLBACK_URL, account_id)
+    client.unfollow_stats_provider = get_unfollow_stats
+    client.attach_rate_limit_store(rate_limit_store)
+    return client
+
+# One X API client per account - its own session, tokens and rate-limit state - created on
+# first use and evicted when idle
+client_pool = XAPIClientPool(
+    create_api_client, CLIENT_POOL_MAX_CLIENTS, CLIENT_POOL_IDLE_TTL, OAUTH_LOGIN_TTL,
+    on_evict=lambda account_id: rate_limit_cache['accounts'].pop(account_id, None)
+)
+
+# Leader election for the batch executor (shared mode only) - the lease token fences the
+# leader's workers, and `expires_at` stops them even if renewals can't reach the store
+executor_state = {'pid': None, 'leader': False, 'token': None, 'expires_at': 0}
+executor_lock = threading.Lock()
+
+# Per-account execution lanes held by this node (lease mode): user_id -> {'token', 'expires_at', 'operation_id'}
+# (`expires_at` stops a lane's worker even if heartbeats can't reach the store)
+held_lanes = {}
+lanes_lock = threading.Lock()
+
+def executor_identity():
+    """Unique identity of this process for executor and lane leases."""
+    return f"{NODE_ID or socket.gethostname()}:{os.getpid()}"
+
+def account_lease_name(user_id):
+    """Lease name for an account's execution lane."""
+    return f"account:{user_id}"
+
+def executor_fence():
+    """Fence for batches driven by the elected executor: (lease name, owner, token)."""
+    return ('batch_executor', executor_identity(), executor_state['token'])
+
+def fence_lost(fence, user_id):
+    """Check whether this node has lost the lease (executor or account lane) a worker is fenced on."""
+    if fence is None:
+        return False
+    if fence[0] == 'batch_executor':
+        return (not executor_state['leader'] or executor_state['token'] != fence[2]
+                or time.time() > executor_state['expires_at'])
+    lane = held_lanes.get(user_id)
+    return lane is None or lane['token'] != fence[2] or time.time() > lane['expires_at']
+
+def publish_operation(operation, fence=None):
+    """
+    Write an operation snapshot to the shared store (no-op in single-process mode).
     
-    # Count queued operations for this user
-    for queued_op in batch_queue:
-        if queued_op['user_id'] == user_id:
-            active_count += 1
+    Args:
+        operation (dict): Operation state
+        fence (tuple): (lease name, owner, token) the write is conditional on (shared mode)
+        
+    Raises:
+        LeaseLostError: If `fence` is given and this node no longer holds the lease, or the
+            fenced write failed (a worker must not make its next API call without a checkpoint)
+    """
+    if shared_state is None:
+        operation_index.update(operation)
+        return
+    # Hand the completion flag over to the store, where readers consume it atomically
+    completion_pending = operation.get('completion_pending', False)
+    try:
+        operation['completion_pending'] = False
+        shared_state.save_operation(operation, completion_pending=completion_pending, fence=fence)
+    except LeaseLostError:
+        operation['completion_pending'] = completion_pending
+        raise
+    except Exception as e:
+        operation['completion_pending'] = completion_pending
+        if fence is not None:
+            # Stop like a lost lease - the batch resumes from its last saved checkpoint
+            raise LeaseLostError(f"Fenced write of operation {operation.get('id')} failed: {str(e)}") from e
+        logging.error(f"Error publishing operation {operation.get('id')}: {str(e)}")
+
+def find_live_operation(operation_id):
+    """Find an operation by ID in the hot state (running, queued or not yet archived)."""
+    if shared_state is not None:
+        return shared_state.get_operation(operation_id)
+    return batch_state.snapshot(operation_id)
+
+def find_operation(operation_id):
+    """Find an operation by ID in the hot state, falling back to the archive."""
+    operation = find_live_operation(operation_id)
+    if operation is None:
+        operation = operation_archive.get(operation_id)
+    return operation
+
+def archive_operation(operation_id):
+    """
+    Move a finished operation from the hot state to the archive.
     
-    return active_count
+    Returns:
+        bool: True if it was archived (False if missing or still active)
+    """
+    try:
+        operation = find_live_operation(operation_id)
+        if operation is None or operation['status'] in ACTIVE_STATUSES:
+            return False
+        # Archive first, then drop the hot copy - readers may briefly see both, never neither
+        operation_archive.archive(operation)
+        batch_state.remove([operation_id])
+        operation_index.remove([operation_id])
+        if shared_state is not None:
+            shared_state.delete_operations([operation_id])
+        return True
+    except Exception as e:
+        # The hot copy stays and the next cleanup retries
+        logging.error(f"Error archiving operation {operation_id}: {str(e)}")
+        return False
+
+def expire_archive(force=False):
+    """Delete archived operations past retention (at most once per ARCHIVE_EXPIRE_INTERVAL)."""
+    now = time.time()
+    if not force and now - archive_expiry['last_run'] < ARCHIVE_EXPIRE_INTERVAL:
+        return
+    archive_expiry['last_run'] = now
+    try:
+        expired = operation_archive.expire(now - ARCHIVE_RETENTION_DAYS * 86400)
+        if expired:
+            logging.info(f"Expired {len(expired)} archived batch operations")
+    except Exception as e:
+        logging.error(f"Error expiring archived operations: {str(e)}")
+
+def all_operations(user_id=None):
+    """List operations (optionally for one user) from the authoritative state."""
+    if shared_state is not None:
+        return shared_state.list_operations(user_id)
+    return batch_state.snapshots(user_id)
+
+def operation_version(operation_id):
+    """Get when an operation was last written (cheap change detection), or None if it is gone."""
+    if shared_state is not None:
+        version = shared_state.get_updated_at(operation_id)
+    else:
+        version = operation_index.get_updated_at(operation_id)
+    return version if version is not None else operation_archive.get_archived_at(operation_id)
+
+def is_cancelled(operation):
+    """Check for cancellation, including cancels written by other processes."""
+    if operation['status'] != 'cancelled' and shared_state is not None:
+        # A deleted operation (debug clear) is treated as cancelled
+        if shared_state.get_status(operation['id']) in ('cancelled', None):
+            operation['status'] = 'cancelled'
+    return operation['status'] == 'cancelled'
+
+def get_queue_length():
+    """Get number of queued batches."""
+    return shared_state.queue_length() if shared_state is not None else batch_state.queue_length()
+
+def get_active_batch_count(user_id):
+    """Get count of active batches for a user (running + queued)."""
+    return len([op for op in all_operations(user_id) if op['status'] in ACTIVE_STATUSES])
 
 def get_running_batch(user_id):
     """Get the currently running batch for a user, if any."""
-    for operation in slow_batch_operations.values():
-        if (operation['user_id'] == user_id and 
-            operation['status'] in ['running', 'waiting_for_rate_limit_reset']):
+    for operation in all_operations(user_id):
+        if operation['status'] in ['running', 'waiting_for_rate_limit_reset']:
             return operation
     return None
 
+def get_pending_targets(user_id):
+    """Get normalized targets still waiting in a user's running or queued batches."""
+    pending = set()
+    for operation in all_operations(user_id):
+        if operation['status'] in ACTIVE_STATUSES:
+            for username in operation['usernames'][operation['completed_count']:]:
+                pending.add(normalize_target(username))
+    return pending
+
+def record_target_outcome(user_id, username, target_id, success, api_error=None):
+    """Record a settled outcome in the target ledger - transient failures stay unsettled."""
+    try:
+        outcome = settled_outcome(success, api_error)
+        if outcome:
+            target_ledger.record(user_id, username, outcome, target_id)
+    except Exception as e:
+        logging.error(f"Error recording ledger outcome for @{username}: {str(e)}")
+
+def start_batch_thread(operation_id, user_id, usernames, interval_minutes, start_index=0, fence=None):
+    """Start a worker thread for a batch."""
+    thread = threading.Thread(
+        target=slow_batch_worker,
+        args=(operation_id, user_id, usernames, interval_minutes, start_index, fence),
+        name=f"batch-{operation_id}",
+        daemon=True
+    )
+    thread.start()
+
 def start_next_queued_batch():
     """Start the next batch in queue if no batch is currently running."""
-    global batch_queue
-    
-    if not batch_queue:
+    # In shared mode only the elected executor process drives batches;
+    # in lease mode each account's lane holder picks up its own queue
+    if shared_state is not None and (LEASE_MODE_ENABLED or not executor_state['leader']):
         return
     
-    # Check if any batch is currently running (across all users)
-    for operation in slow_batch_operations.values():
-        if operation['status'] in ['running', 'waiting_for_rate_limit_reset']:
-            return  # A batch is already running, don't start another
+    if shared_state is None:
+        # The busy check, the dequeue and the switch to running happen as one step,
+        # so concurrent callers can't start two batches
+        started = batch_state.start_next()
+        if started is None:
+            return
+        next_batch, operation = started
+    else:
+        if get_queue_length() == 0:
+            return
+        
+        # Check if any batch is currently running (across all users)
+        for operation in all_operations():
+            if operation['status'] in ['running', 'waiting_for_rate_limit_reset']:
+                return  # A batch is already running, don't start another
+        
+        next_batch = shared_state.dequeue()
+        operation = shared_state.get_operation(next_batch['operation_id']) if next_batch else None
+        
+        # Skip batches that were cancelled or cleared while waiting in the queue
+        if operation is None or operation['status'] == 'cancelled':
+            return start_next_queued_batch()
+        batch_state.add(operation)
+        
+        # Mark running before the thread starts so a concurrent check can't start a second batch
+        operation['status'] = 'running'
     
-    # Start the next queued batch
-    next_batch = batch_queue.pop(0)
+    # The executor's workers write (and so keep unfollowing) only while it holds its lease
+    fence = executor_fence() if shared_state is not None else None
+    try:
+        publish_operation(operation, fence)
+    except LeaseLostError as e:
+        logging.warning(f"Not starting batch {next_batch['operation_id']}: {str(e)}")
+        batch_state.remove([next_batch['operation_id']])
+        shared_state.enqueue(next_batch)  # Hand it back for the next executor
+        return
     logging.info(f"Starting queued batch {next_batch['operation_id']} for user {next_batch['user_id']}")
     
     # Start the batch thread
-    thread = threading.Thread(
-        target=slow_batch_worker,
-        args=(next_batch['operation_id'], next_batch['user_id'], 
-              next_batch['usernames'], next_batch['interval_minutes']),
-        daemon=True
-    )
-    thread.start()
+    start_batch_thread(next_batch['operation_id'], next_batch['user_id'],
+                       next_batch['usernames'], next_batch['interval_minutes'], fence=fence)
 
-def cleanup_old_operations():
-    """Clean up old completed/cancelled/error operations to prevent memory buildup."""
-    try:
-        current_time = time.time()
-        cutoff_time = current_time - (24 * 60 * 60)  # 24 hours ago
-        
-        operations_to_remove = []
-        for op_id, operation in slow_batch_operations.items():
-            # Keep active operations
-            if operation['status'] in ['starting', 'running', 'waiting_for_rate_limit_reset']:
+def resume_orphaned_operations():
+    """Adopt running batches whose executor process died, resuming after the last finished target."""
+    for operation in shared_state.list_operations(statuses=('running', 'waiting_for_rate_limit_reset')):
+        if batch_state.contains(operation['id']):
+            continue
+        start_index = len(operation.get('results', []))
+        operation.setdefault('notes', []).append(
+            f"Resumed by executor {executor_identity()} at user {start_index + 1}/{operation['total_count']}")
+        batch_state.add(operation)
+        logging.warning(f"Resuming orphaned batch {operation['id']} from index {start_index}")
+        start_batch_thread(operation['id'], operation['user_id'], operation['usernames'],
+                           operation['interval_minutes'], start_index, executor_fence())
+
+def batch_executor_loop():
+    """Leader-elected executor: only the lease holder starts and resumes batches."""
+    owner = executor_identity()
+    while True:
+        try:
+            renewed_at = time.time()
+            token = shared_state.acquire_lease('batch_executor', owner, EXECUTOR_LEASE_TTL)
+            was_leader = executor_state['leader']
+            executor_state.update(leader=token is not None, token=token,
+                                  expires_at=renewed_at + EXECUTOR_LEASE_TTL if token is not None else 0)
+            if executor_state['leader']:
+                if not was_leader:
+                    logging.info(f"Process {owner} elected batch executor (token {token})")
+                resume_orphaned_operations()
+                start_next_queued_batch()
+            elif was_leader:
+                logging.warning(f"Process {owner} lost batch executor leadership - its workers stop")
+            client_pool.evict_idle()
+        except Exception as e:
+            # Workers stop at their next check; whoever takes the lease resumes their batches
+            executor_state['leader'] = False
+            logging.error(f"Batch executor loop error: {str(e)}")
+        time.sleep(EXECUTOR_POLL_INTERVAL)
+
+def start_lane_batch(user_id, lane):
+    """
+    Start the next batch in an account's lane - a batch left running by a node whose
+    lease expired is resumed from its checkpoint first, then the account's queue.
+    
+    Returns:
+        bool: True if a batch was started
+    """
+    fence = (account_lease_name(user_id), executor_identity(), lane['token'])
+    
+    orphaned = shared_state.list_operations(user_id, statuses=('running', 'waiting_for_rate_limit_reset'))
+    if orphaned:
+        operation = orphaned[0]
+        start_index = len(operation.get('results', []))
+        operation.setdefault('notes', []).append(
+            f"Resumed by node {executor_identity()} at user {start_index + 1}/{operation['total_count']}")
+        logging.warning(f"Taking over batch {operation['id']} for account {user_id} from index {start_index}")
+        publish_operation(operation, fence)
+    else:
+        entry = shared_state.dequeue(user_id)
+        if entry is None:
+            return False
+        operation = shared_state.get_operation(entry['operation_id'])
+        if operation is None or operation['status'] == 'cancelled':
+            return False
+        operation['status'] = 'running'
+        start_index = 0
+        logging.info(f"Node {executor_identity()} starting batch {operation['id']} for account {user_id}")
+        try:
+            publish_operation(operation, fence)
+        except LeaseLostError:
+            shared_state.enqueue(entry)  # Hand the batch back for the new lane holder
+            raise
+    
+    batch_state.add(operation)
+    lane['operation_id'] = operation['id']
+    start_batch_thread(operation['id'], user_id, operation['usernames'], operation['interval_minutes'],
+                       start_index, fence)
+    return True
+
+def finish_lane_batch(user_id, operation_id):
+    """Mark an account's lane idle once its worker exits."""
+    with lanes_lock:
+        lane = held_lanes.get(user_id)
+        if lane is not None and lane['operation_id'] == operation_id:
+            lane['operation_id'] = None
+
+def lane_heartbeat_loop():
+    """Renew this node's lane leases; a lane whose lease can't be renewed is dropped."""
+    owner = executor_identity()
+    while True:
+        time.sleep(LEASE_HEARTBEAT_INTERVAL)
+        with lanes_lock:
+            lanes = list(held_lanes.items())
+        for user_id, lane in lanes:
+            try:
+                renewed_at = time.time()
+                token = shared_state.acquire_lease(account_lease_name(user_id), owner, ACCOUNT_LEASE_TTL)
+            except Exception as e:
+                # Unrenewed, the lease may expire and move to another node - stop driving the lane
+                logging.error(f"Lane heartbeat error for account {user_id}, dropping lane: {str(e)}")
+                token = None
+            if token != lane['token']:
+                # Expired in between (even if re-acquired) - the worker stops before its next target
+                logging.warning(f"Node {owner} lost lane lease for account {user_id}")
+                with lanes_lock:
+                    if held_lanes.get(user_id) is lane:
+                        held_lanes.pop(user_id)
                 continue
-                
-            # Remove old completed/cancelled/error operations
-            end_time = operation.get('end_time', operation.get('start_time', current_time))
-            if end_time < cutoff_time:
-                operations_to_remove.append(op_id)
-        
-        # Remove old operations
-        for op_id in operations_to_remove:
-            del slow_batch_operations[op_id]
+            lane['expires_at'] = renewed_at + ACCOUNT_LEASE_TTL
+
+def lease_node_loop():
+    """Lease mode: claim per-account execution lanes and drive each account's queue."""
+    owner = executor_identity()
+    threading.Thread(target=lane_heartbeat_loop, daemon=True).start()
+    logging.info(f"Node {owner} running in lease mode")
+    
+    while True:
+        try:
+            accounts = shared_state.accounts_with_work()
+            for user_id in accounts:
+                with lanes_lock:
+                    lane = held_lanes.get(user_id)
+                if lane is None:
+                    claimed_at = time.time()
+                    token = shared_state.acquire_lease(account_lease_name(user_id), owner, ACCOUNT_LEASE_TTL)
+                    if token is None:
+                        continue  # Another node owns this account's lane
+                    lane = {'token': token, 'expires_at': claimed_at + ACCOUNT_LEASE_TTL, 'operation_id': None}
+                    with lanes_lock:
+                        held_lanes[user_id] = lane
+                    logging.info(f"Node {owner} claimed lane for account {user_id} (token {token})")
+                if lane['operation_id'] is None:
+                    try:
+                        start_lane_batch(user_id, lane)
+                    except LeaseLostError as e:
+                        logging.warning(str(e))
+                        with lanes_lock:
+                            held_lanes.pop(user_id, None)
             
-        if operations_to_remove:
-            logging.info(f"Cleaned up {len(operations_to_remove)} old batch operations")
+            # Release idle lanes so other nodes can pick up new work for those accounts
+            with lanes_lock:
+                idle = [uid for uid, lane in held_lanes.items()
+                        if lane['operation_id'] is None and uid not in accounts]
+                for uid in idle:
+                    held_lanes.pop(uid)
+            for uid in idle:
+                shared_state.release_lease(account_lease_name(uid), owner)
+            client_pool.evict_idle()
+        except Exception as e:
+            logging.error(f"Lease node loop error: {str(e)}")
+        time.sleep(EXECUTOR_POLL_INTERVAL)
+
+@app.before_request
+def ensure_batch_executor():
+    """Start the executor (leader election or lease node) thread once per process."""
+    if shared_state is None or executor_state['pid'] == os.getpid():
+        return
+    with executor_lock:
+        if executor_state['pid'] == os.getpid():
+            return
+        executor_state.update(pid=os.getpid(), leader=False, token=None, expires_at=0)
+        target = lease_node_loop if LEASE_MODE_ENABLED else batch_executor_loop
+        threading.Thread(target=target, daemon=True).start()
+
+@app.before_request
+def start_route_timer():
+    """Note the request start time while route timing is on."""
+    if route_timer.enabled:
+        g.route_started = time.perf_counter()
+
+@app.after_request
+def record_route_timing(response):
+    """Record the request duration for timed routes."""
+    started = g.pop('route_started', None)
+    if started is not None and request.url_rule is not None:
+        route_timer.record(request.url_rule.rule, time.perf_counter() - started, response.status_code)
+    return response
+
+def cleanup_old_operations():
+    """Archive finished operations still in the hot state and expire old archived ones."""
+    try:
+        # Workers archive their batch when it finishes; this catches the rest (e.g. batches
+        # cancelled while queued, or finished before a restart)
+        finished = [operation['id'] for operation in all_operations() if operation['status'] not in ACTIVE_STATUSES]
+        archived = [operation_id for operation_id in finished if archive_operation(operation_id)]
+        if archived:
+            logging.info(f"Archived {len(archived)} finished batch operations")
+        
+        expire_archive()
+        client_pool.evict_idle()
             
         # Try to start next queued batch after cleanup
         start_next_queued_batch()
@@ -124,29 +559,7 @@ def cleanup_old_operations():
     except Exception as e:
         logging.error(f"Error during operation cleanup: {str(e)}")
 
-# Persistent unfollow tracking
-UNFOLLOW_LOG_FILE = 'unfollow_tracking.json'
-
-def load_unfollow_log():
-    """Load persistent unfollow tracking log."""
-    try:
-        if os.path.exists(UNFOLLOW_LOG_FILE):
-            with open(UNFOLLOW_LOG_FILE, 'r') as f:
-                return json.load(f)
-    except Exception as e:
-        logging.error(f"Error loading unfollow log: {str(e)}")
-    
-    return {'attempts': []}
-
-def save_unfollow_log(log_data):
-    """Save persistent unfollow tracking log."""
-    try:
-        with open(UNFOLLOW_LOG_FILE, 'w') as f:
-            json.dump(log_data, f, indent=2)
-    except Exception as e:
-        logging.error(f"Error saving unfollow log: {str(e)}")
-
-def classify_unfollow_error(error_message, success):
+def classify_unfollow_error(error_message, success, api_error=None):
     """
     Layer 2: Classify unfollow errors for intelligent wait timing.
     Enhanced to handle structured error information from X API client.
@@ -154,6 +567,7 @@ def classify_unfollow_error(error_message, success):
     Args:
         error_message (str): Error message from unfollow attempt
         success (bool): Whether unfollow was successful
+        api_error (dict): The account client's last_api_error after the attempt
         
     Returns:
         tuple: (error_type, wait_seconds)
@@ -162,8 +576,8 @@ def classify_unfollow_error(error_message, success):
         return "success", 15 * 60  # Normal 15-min wait
     
     # Check for enhanced error information from API client
-    if hasattr(x_client, 'last_api_error') and x_client.last_api_error:
-        error_info = x_client.last_api_error
+    if api_error:
+        error_info = api_error
         error_type = error_info.get('type', 'unknown')
         error_code = error_info.get('code', 0)
         http_status = error_info.get('http_status', 0)
@@ -202,71 +616,120 @@ def classify_unfollow_error(error_message, success):
     # Default: Conservative wait for any unclassified errors
     return "unknown", 15 * 60  # Conservative 15-minute wait
 
-def clean_old_entries(log_data):
-    """Remove entries older than 24 hours."""
-    current_time = time.time()
-    cutoff_time = current_time - (24 * 60 * 60)  # 24 hours ago
+def track_unfollow_attempt(success, error_type=None, wait_seconds=None, duration=None, user_id=None):
+    """
+    Track an unfollow attempt in the time-series rollups (the source of the hourly/daily
+    counts, admission budgets and the ETA model).
     
-    log_data['attempts'] = [
-        attempt for attempt in log_data['attempts'] 
-        if attempt['timestamp'] > cutoff_time
-    ]
-    return log_data
-
-def track_unfollow_attempt(success):
-    """Track an unfollow attempt with persistent storage."""
+    Args:
+        success (bool): Whether the unfollow succeeded
+        error_type (str): Outcome class from classify_unfollow_error
+        wait_seconds (int): Wait that class imposes before the next target
+        duration (float): Seconds spent in the API calls for this target
+        user_id (str): Account that made the attempt
+    """
+    account = str(user_id or 'default')
     try:
-        log_data = load_unfollow_log()
-        
-        # Clean old entries (older than 24 hours)
-        log_data = clean_old_entries(log_data)
-        
-        # Add new attempt
-        attempt = {
-            'timestamp': time.time(),
-            'success': success,
-            'date': datetime.now().isoformat()
-        }
-        log_data['attempts'].append(attempt)
-        
-        # Save back to file
-        save_unfollow_log(log_data)
+        attempt_history.record(account, success, error_type, wait_seconds, duration)
         
         # Log current stats
-        current_time = time.time()
-        hour_ago = current_time - 3600
-        day_ago = current_time - (24 * 60 * 60)
-        
-        hourly_successful = len([a for a in log_data['attempts'] if a['timestamp'] > hour_ago and a['success']])
-        daily_successful = len([a for a in log_data['attempts'] if a['timestamp'] > day_ago and a['success']])
-        
-        logging.info(f"Unfollow tracking: {hourly_successful} successful in last hour, {daily_successful} successful in last 24h")
+        stats = get_unfollow_stats(user_id)
+        logging.info(f"Unfollow tracking: {stats['hourly_successful']} successful in last hour, {stats['daily_successful']} successful in last 24h")
         
     except Exception as e:
         logging.error(f"Error tracking unfollow attempt: {str(e)}")
+    finally:
+        # The account's hourly/daily counts changed - its cached rate-limit snapshot is stale,
+        # and the ETA model has a new observation
+        rate_limit_cache['attempts'][account] = rate_limit_cache['attempts'].get(account, 0) + 1
+        eta_model_cache['attempts'] += 1
 
-def get_unfollow_stats():
-    """Get current unfollow statistics."""
+def get_unfollow_stats(account=None):
+    """
+    Get current unfollow statistics (for one account, or all accounts if None).
+    
+    Returns:
+        dict: Successes in the rolling hour and day, the limits, and when each window next
+              frees a slot ('hourly_reset' / 'daily_reset', absolute epoch seconds or None)
+    """
     try:
-        log_data = load_unfollow_log()
-        log_data = clean_old_entries(log_data)
-        
+        # Served from minute rollups - no raw log scan. A success counts until its minute
+        # bucket's end leaves the window.
         current_time = time.time()
-        hour_ago = current_time - 3600
-        day_ago = current_time - (24 * 60 * 60)
-        
-        hourly_successful = len([a for a in log_data['attempts'] if a['timestamp'] > hour_ago and a['success']])
-        daily_successful = len([a for a in log_data['attempts'] if a['timestamp'] > day_ago and a['success']])
-        
+        buckets = attempt_history.success_buckets(current_time - DAY, account)
+        hour_buckets = [(bucket, successes) for bucket, successes in buckets if bucket + 60 > current_time - 3600]
         return {
-            'hourly_successful': hourly_successful,
-            'daily_successful': daily_successful,
-            'hourly_limit': 4,  # Conservative free tier estimate
-            'daily_limit': 50   # Conservative free tier estimate
+            'hourly_successful': sum(successes for _, successes in hour_buckets),
+            'daily_successful': sum(successes for _, successes in buckets),
+            'hourly_limit': UNFOLLOW_HOURLY_LIMIT,
+            'daily_limit': UNFOLLOW_DAILY_LIMIT,
+            'hourly_reset': hour_buckets[0][0] + 60 + 3600 if hour_buckets else None,
+            'daily_reset': buckets[0][0] + 60 + DAY if buckets else None
         }
     except Exception as e:
         logging.error(f"Error getting unfollow stats: {str(e)}")
-        return {'hourly_successful': 0, 'daily_successful': 0, 'hourly_limit': 4, 'daily_limit': 50}
+        return {'hourly_successful': 0, 'daily_successful': 0, 'hourly_limit': UNFOLLOW_HOURLY_LIMIT, 'daily_limit': UNFOLLOW_DAILY_LIMIT,
+                'hourly_reset': None, 'daily_reset': None}
+
+# Per-account rate-limit snapshots served to /status and /api/rate-limits polls. Rebuilt only
+# when that account's client rate-limit version or tracked attempts change (attempts made by
+# other processes show up through the shared rate-limit store), or when one of its successes
+# leaves the hourly/daily window. attempts: account -> version
+rate_limit_cache = {'accounts': {}, 'attempts': {}}
+rate_limit_cache_lock = threading.Lock()
+
+def get_rate_limit_snapshot(user_id):
+    """
+    Get an account's cached rate-limit snapshot, rebuilding it if its inputs changed.
+    
+    Args:
+        user_id (str): Account
+        
+    Returns:
+        tuple: (rate limits dict, etag, last-modified epoch seconds)
+    """
+    client = client_pool.get(user_id)
+    key = (client.rate_limit_state_version(RATE_LIMIT_SYNC_INTERVAL), rate_limit_cache['attempts'].get(str(user_id), 0))
+    cached = rate_limit_cache['accounts'].get(str(user_id))
+    if cached is None or key != cached['key'] or time.time() >= cached['valid_until']:
+        with rate_limit_cache_lock:
+            cached = rate_limit_cache['accounts'].get(str(user_id))
+            if cached is None or key != cached['key'] or time.time() >= cached['valid_until']:
+                snapshot = client.get_rate_limit_status(refresh_from_api=False)
+                etag = hashlib.sha1(json.dumps(snapshot, sort_keys=True, default=str).encode()).hexdigest()[:16]
+                last_modified = int(time.time()) if cached is None or etag != cached['etag'] else cached['last_modified']
+                # The body only holds absolute times, so it stays valid until a window frees a slot
+                resets = [snapshot[window]['reset_time'] for window in ('unfollow_hourly', 'unfollow_daily')
+                          if snapshot.get(window, {}).get('reset_time')]
+                cached = {'key': key, 'snapshot': snapshot, 'etag': etag, 'last_modified': last_modified,
+                          'valid_until': min(resets, default=float('inf'))}
+                rate_limit_cache['accounts'][str(user_id)] = cached
+    return cached['snapshot'], cached['etag'], cached['last_modified']
+
+def conditional_json(etag, last_modified, build_body):
+    """
+    Answer a poll with 304 when the client's validators still match, otherwise with JSON.
+    
+    Args:
+        etag (str): Entity tag of the current representation (unquoted)
+        last_modified (int): When the representation last changed (epoch seconds)
+        build_body (callable): Returns the response body (only called on a cache miss)
+        
+    Returns:
+        Response: 304 or 200 JSON response with ETag, Last-Modified and Cache-Control set
+    """
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = request.if_modified_since is not None and request.if_modified_since.timestamp() >= last_modified
+    response = app.response_class(status=304) if not_modified else jsonify(build_body())
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Clients may keep the copy but must revalidate it on every poll
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
 
 @app.route('/')
 def index():
@@ -279,7 +742,8 @@ def index():
 def login():
     """Initiate OAuth 2.0 login with X."""
     try:
-        auth_url = x_client.get_authorization_url()
+        # Runs on a pending client until the callback tells us which account it is
+        auth_url = client_pool.begin_login()
         logging.info("Redirecting to X authorization page")
         return redirect(auth_url)
     except Exception as e:
@@ -303,12 +767,18 @@ def callback():
             logging.error("No authorization code received")
             return redirect(url_for('index') + '?error=no_code&error_description=No authorization code received from X')
         
+        login_client = client_pool.complete_login(state)
+        if login_client is None:
+            raise ValueError("Invalid state parameter - possible CSRF attack")
+        
         # Exchange code for tokens and get user info in one transaction
-        tokens = x_client.exchange_code_for_tokens(code, state)
+        tokens = login_client.exchange_code_for_tokens(code, state)
         
         # Get user info as part of login - this should work most of the time
+        # (it also binds the client, and its tokens, to the account)
+        placeholder_id = f"pending-{secrets.token_hex(8)}"
         try:
-            user_info = x_client.get_user_info()
+            user_info = login_client.get_user_info()
             if user_info:
                 session.permanent = True
                 session['user_id'] = user_info['id']
@@ -318,7 +788,7 @@ def callback():
             else:
                 # Authentication succeeded but user info failed - still allow login
                 session.permanent = True
-                session['user_id'] = 'authenticated'
+                session['user_id'] = placeholder_id
                 session['username'] = 'User'
                 session['display_name'] = 'User'
                 logging.info("Authentication successful, but user info unavailable")
@@ -326,18 +796,23 @@ def callback():
             # Rate limit or other error getting user info - still allow login since auth worked
             if "Rate limit exceeded" in str(user_info_error):
                 session.permanent = True
-                session['user_id'] = 'authenticated'
+                session['user_id'] = placeholder_id
                 session['username'] = 'Rate Limited'
                 session['display_name'] = 'Rate Limited (will update shortly)'
                 logging.info("Authentication successful, user info rate limited - will retry later")
             else:
                 # For non-rate-limit errors, still allow login but log the issue
                 session.permanent = True
-                session['user_id'] = 'authenticated'
+                session['user_id'] = placeholder_id
                 session['username'] = 'Loading...'
                 session['display_name'] = 'Loading user info...'
                 logging.warning(f"Authentication successful, but user info failed: {str(user_info_error)}")
         
+        # Without user info the tokens are kept under a per-login placeholder account until a retry succeeds
+        if login_client.account_id is None:
+            login_client.bind_account(session['user_id'])
+        client_pool.add(login_client)
+        
         return redirect(url_for('index'))
         
     except Exception as e:
@@ -359,8 +834,9 @@ def callback():
 @app.route('/logout')
 def logout():
     """Log out user and clear session."""
+    if 'user_id' in session:
+        client_pool.discard(session['user_id'])
     session.clear()
-    x_client.clear_tokens()
     logging.info("User logged out")
     return redirect(url_for('index'))
 
@@ -368,7 +844,9 @@ def logout():
 def refresh_token():
     """Refresh access token using refresh token."""
     try:
-        success = x_client.refresh_access_token()
+        if 'user_id' not in session:
+            return jsonify({'success': False, 'message': 'Authentication required'}), 401
+        success = client_pool.get(session['user_id']).refresh_access_token()
         if success:
             return jsonify({'success': True, 'message': 'Token refreshed successfully'})
         else:
@@ -392,23 +870,19 @@ def clear_all_batches():
         return jsonify({'error': 'Not authenticated'}), 401
     
     try:
-        global slow_batch_operations, batch_queue
-        
-        # Count operations before clearing
-        total_operations = len(slow_batch_operations)
-        user_operations = len([op for op in slow_batch_operations.values() if op['user_id'] == session['user_id']])
-        
-        # Clear all operations for this user
-        operations_to_remove = []
-        for op_id, operation in slow_batch_operations.items():
-            if operation['user_id'] == session['user_id']:
-                operations_to_remove.append(op_id)
+        # Clear all operations for this user (archived ones included)
+        operations_to_remove = [op['id'] for op in all_operations(session['user_id'])]
+        operations_to_remove += operation_archive.delete_user(session['user_id'])
         
-        for op_id in operations_to_remove:
-            del slow_batch_operations[op_id]
+        # Drops their local queue entries and marks them cancelled so a worker still
+        # holding one stops
+        batch_state.remove(operations_to_remove, cancel=True)
+        operation_index.remove(operations_to_remove)
         
         # Clear queue entries for this user
-        batch_queue = [q for q in batch_queue if q['user_id'] != session['user_id']]
+        if shared_state is not None:
+            shared_state.delete_operations(operations_to_remove)
+            shared_state.remove_queued(user_id=session['user_id'])
         
         logging.info(f"Debug: Cleared {len(operations_to_remove)} batch operations for user {session['user_id']}")
         
@@ -416,7 +890,7 @@ def clear_all_batches():
             'success': True,
             'message': f'Cleared {len(operations_to_remove)} batch operations',
             'cleared_operations': len(operations_to_remove),
-            'remaining_total': len(slow_batch_operations)
+            'remaining_total': len(all_operations())
         })
         
     except Exception as e:
@@ -431,9 +905,10 @@ def status():
         
         if authenticated:
             # Return cached rate limits only - no API calls to avoid waste
-            rate_limits = x_client.get_rate_limit_status(refresh_from_api=False)
+            rate_limits, etag, last_modified = get_rate_limit_snapshot(session['user_id'])
+            identity = f"{session.get('user_id')}|{session.get('username')}|{session.get('display_name')}"
             
-            return jsonify({
+            return conditional_json(f"{etag}-{zlib.crc32(identity.encode()):08x}", last_modified, lambda: {
                 'authenticated': True,
                 'user_id': session.get('user_id'),
                 'username': session.get('username'),
@@ -455,11 +930,11 @@ def get_rate_limits():
             return jsonify({'error': 'Authentication required'}), 401
             
         # Get cached rate limits without making API calls
-        rate_limits = x_client.get_rate_limit_status(refresh_from_api=False)
+        rate_limits, etag, last_modified = get_rate_limit_snapshot(session['user_id'])
         
-        return jsonify({
+        return conditional_json(etag, last_modified, lambda: {
             'rate_limits': rate_limits,
-            'timestamp': int(time.time())
+            'timestamp': last_modified
         })
         
     except Exception as e:
@@ -478,9 +953,14 @@ def retry_user_info():
         if current_username not in ['User', 'Loading...', 'Rate Limited']:
             return jsonify({'success': True, 'message': 'User info already available'})
             
-        # Try to get user info again
-        user_info = x_client.get_user_info()
+        # Try to get user info again - on success the client moves from the placeholder to the real account
+        client = client_pool.get(session['user_id'])
+        previous_id = client.account_id
+        user_info = client.get_user_info()
         if user_info:
+            if client.account_id != previous_id:
+                client_pool.rekey(previous_id, client)
+                session['user_id'] = client.account_id
             session['username'] = user_info.get('username', 'Unknown')
             session['display_name'] = user_info.get('name', session['username'])
             logging.info(f"User info retry successful: @{session['username']}")
@@ -492,130 +972,926 @@ def retry_user_info():
         logging.error(f"User info retry error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
-# Debug API endpoint removed - not needed for production batch processing
+# ETA model - rebuilt from the last 24h of rollups after an attempt in this process, or once
+# it is ETA_MODEL_MAX_AGE seconds old (attempts made by other processes)
+ETA_MODEL_MAX_AGE = 60
+eta_model_cache = {'attempts': 0, 'built_for': None, 'built_at': 0, 'model': None}
 
-# Core batch processing functions below - all debug/single features removed
+def get_eta_model():
+    """Get the ETA model for the current attempt history."""
+    try:
+        now = time.time()
+        if (eta_model_cache['model'] is None or eta_model_cache['built_for'] != eta_model_cache['attempts']
+                or now - eta_model_cache['built_at'] >= ETA_MODEL_MAX_AGE):
+            attempts = eta_model_cache['attempts']
+            _, default_wait = classify_unfollow_error(None, True)
+            eta_model_cache['model'] = EtaModel.from_outcome_totals(attempt_history.outcome_totals(now - DAY),
+                                                                    default_wait=default_wait)
+            eta_model_cache.update(built_for=attempts, built_at=now)
+    except Exception as e:
+        logging.error(f"Error building ETA model: {str(e)}")
+        if eta_model_cache['model'] is None:
+            eta_model_cache['model'] = EtaModel([])
+    return eta_model_cache['model']
 
-def slow_batch_worker(operation_id, user_id, usernames, interval_minutes=15):
-    """Layer 1: Clean basic batch worker - simple, predictable processing."""
-    operation = None
+def get_batches_ahead(operation):
+    """
+    Get the work queued ahead of an operation on the same executor.
+    
+    Args:
+        operation (dict): Operation to look up
+        
+    Returns:
+        list: Operation-like dicts (running batches first, then queue order)
+    """
+    if operation['status'] != 'queued':
+        return []
+    
+    # Batches run one at a time globally, or per account lane in lease mode
+    lane_user = operation['user_id'] if LEASE_MODE_ENABLED and shared_state is not None else None
+    ahead = [op for op in all_operations(lane_user)
+             if op['status'] in ['running', 'waiting_for_rate_limit_reset'] and op['id'] != operation['id']]
+    
+    if shared_state is not None:
+        entries = shared_state.queue_entries(lane_user)
+    else:
+        entries = batch_state.queue_entries()
+    for entry in entries:
+        if entry['operation_id'] == operation['id']:
+            break
+        ahead.append({'user_id': entry['user_id'], 'total_count': len(entry['usernames']), 'completed_count': 0,
+                      'next_unfollow_time': None})
+    return ahead
+
+def estimate_operation_eta(operation, now=None):
+    """
+    Estimate remaining time for an operation, including batches ahead of it in the queue.
+    
+    Args:
+        operation (dict): Operation to estimate
+        now (float): Reference time (defaults to now)
+        
+    Returns:
+        dict: Expected remaining time with a 90% confidence range, or None if not active
+    """
+    if operation['status'] not in ACTIVE_STATUSES:
+        return None
+    
+    now = now or time.time()
+    model = get_eta_model()
+    batches = get_batches_ahead(operation) + [operation]
+    
+    estimates = []
+    for position, batch in enumerate(batches):
+        next_time = batch.get('next_unfollow_time')
+        first_wait = max(0, next_time - now) if next_time else 0
+        if position == 0:
+            # An exhausted unfollow window (of the front batch's account) stalls whatever is at the front of the line
+            # Read from the store - building a pooled client for another account just to read it
+            # would load its tokens and could evict idle clients
+            front_limits = rate_limit_store.load_rate_limits(batch['user_id'])
+            first_wait = max(first_wait, quota_stall(front_limits.get('unfollow'), now))
+        estimates.append(model.estimate(batch['total_count'] - batch['completed_count'], first_wait))
+    
+    total = combine(estimates)
+    if ADMISSION_CONTROL_ENABLED:
+        # The hourly/daily budgets bound how soon the account's remaining unfollows can finish
+        ahead_count = sum(batch['total_count'] - batch['completed_count'] for batch in batches[:-1]
+                          if batch.get('user_id') == operation['user_id'])
+        slots = quota_calendar(operation['user_id'], operation['total_count'] - operation['completed_count'],
+                               ahead_count, now=now)
+        if slots:
+            quota_seconds = slots[-1] - now + model.mean_duration
+            if quota_seconds > total['mean']:
+                total = dict(total, mean=quota_seconds, floor=max(total['floor'], quota_seconds))
+    
+    eta = confidence_range(total, now)
+    eta['queue_wait_seconds'] = round(combine(estimates[:-1])['mean'])
+    eta['batches_ahead'] = len(estimates) - 1
+    eta['model'] = model.summary()
+    return eta
+
+def update_estimated_completion(operation):
+    """
+    Refresh the stored estimates of a running operation and of the batches queued behind it
+    (after each recorded attempt). Batch lists show stored estimates, so polling them never
+    re-runs the model.
+    """
     try:
-        # Verify operation exists
-        if operation_id not in slow_batch_operations:
-            logging.error(f"Operation {operation_id} not found in batch operations")
-            return
-            
-        operation = slow_batch_operations[operation_id]
-        operation['status'] = 'running'
-        operation['start_time'] = time.time()
+        eta = estimate_operation_eta(operation)
+        if eta is not None:
+            with batch_state.lock_for(operation['user_id']):
+                operation['eta'] = eta
+                operation['estimated_completion'] = eta['computed_at'] + eta['remaining_seconds']
+        
+        lane_user = operation['user_id'] if LEASE_MODE_ENABLED and shared_state is not None else None
+        if shared_state is not None:
+            queued = shared_state.list_operations(lane_user, statuses=('queued',))
+        else:
+            queued = [op for op in batch_state.snapshots() if op['status'] == 'queued']
+        for queued_operation in queued:
+            eta = estimate_operation_eta(queued_operation)
+            if eta is None:
+                continue
+            fields = {'eta': eta, 'estimated_completion': eta['computed_at'] + eta['remaining_seconds']}
+            if shared_state is not None:
+                # Only while still queued - a worker that picked it up writes its own
+                shared_state.set_status(queued_operation['id'], 'queued', from_statuses=('queued',), **fields)
+            else:
+                live = batch_state.get_live(queued_operation['id'])
+                if live is not None:
+                    with batch_state.lock_for(live['user_id']):
+                        live.update(fields)
+    except Exception as e:
+        logging.error(f"Error estimating completion for {operation.get('id')}: {str(e)}")
+
+def quota_history(user_id, now=None):
+    """Times of the account's successful unfollows in the last 24 hours, oldest first."""
+    now = now or time.time()
+    return history_times(attempt_history.success_buckets(now - DAY, user_id))
+
+def quota_calendar(user_id, count, ahead_count=0, not_before=None, now=None):
+    """
+    Schedule an account's unfollows into slots that fit its hourly and daily budgets.
+    
+    Args:
+        user_id (str): Account
+        count (int): Unfollows to schedule
+        ahead_count (int): Unfollows the account's earlier batches still need (scheduled first)
+        not_before (float): Earliest time for the first of them (e.g. after other accounts' batches)
+        now (float): Reference time (defaults to now)
         
-        logging.info(f"Starting batch {operation_id} for {len(usernames)} users")
+    Returns:
+        list: Slot times (epoch seconds) for the `count` unfollows
+    """
+    now = now or time.time()
+    used = quota_history(user_id, now)
+    _, spacing = classify_unfollow_error(None, True)
+    start = max(now, used[-1] + spacing) if used else now
+    ahead = build_calendar(ahead_count, start, used, UNFOLLOW_HOURLY_LIMIT, UNFOLLOW_DAILY_LIMIT, spacing)
+    if ahead:
+        start = ahead[-1] + spacing
+    start = max(start, not_before or start)
+    return build_calendar(count, start, sorted(used + ahead), UNFOLLOW_HOURLY_LIMIT, UNFOLLOW_DAILY_LIMIT, spacing)
+
+def admission_calendar(user_id, quota_count, ahead_count):
+    """
+    Lay a batch's unfollows out in quota slots after the account's queued work.
+    
+    Args:
+        user_id (str): Account
+        quota_count (int): Unfollows the batch spends quota on
+        ahead_count (int): Targets still to run in the account's active batches
         
-        # Layer 1: Simple sequential processing
-        for i, username in enumerate(usernames):
-            # Check for cancellation
-            if operation['status'] == 'cancelled':
-                break
-                
-            # Update current progress
-            operation['current_username'] = username
-            operation['current_index'] = i
-            operation['completed_count'] = i + 1
-            operation['last_update'] = time.time()
-            
-            # Layer 1: Basic unfollow attempt
-            success = False
-            error_msg = None
+    Returns:
+        tuple: (slots, calendar summary, rejection payload - None if it fits in ADMISSION_MAX_DAYS)
+    """
+    slots = quota_calendar(user_id, quota_count, ahead_count)
+    calendar = summarize_calendar(slots, time.time(), UNFOLLOW_HOURLY_LIMIT, UNFOLLOW_DAILY_LIMIT)
+    if calendar['span_seconds'] <= ADMISSION_MAX_DAYS * DAY:
+        return slots, calendar, None
+    logging.info(f"Admission refused for {user_id}: {quota_count} unfollows after {ahead_count} queued "
+                 f"would take {calendar['span_seconds'] / DAY:.1f} days")
+    return slots, calendar, {
+        'error': f"This batch needs up to {quota_count} unfollows after {ahead_count} already queued for your account. "
+                 f"At {UNFOLLOW_HOURLY_LIMIT}/hour and {UNFOLLOW_DAILY_LIMIT}/day it would take "
+                 f"{calendar['span_seconds'] / DAY:.1f} days (limit {ADMISSION_MAX_DAYS:g}). "
+                 f"Submit fewer users or wait for queued batches to finish.",
+        'calendar': calendar
+    }
+
+def compact_calendar(calendar):
+    """Calendar summary kept on the operation (per-day counts, without the hour windows)."""
+    if calendar is None:
+        return None
+    return {key: value for key, value in calendar.items() if key != 'windows'}
+
+def remaining_account_work(user_id):
+    """Targets still to run in an account's running and queued batches."""
+    return sum(operation['total_count'] - operation['completed_count'] for operation in all_operations(user_id)
+               if operation['status'] in ACTIVE_STATUSES)
+
+def start_scan_thread(scan_id, user_id):
+    """Start a worker for a relationship scan unless this process is already driving it."""
+    with scan_threads_lock:
+        thread = scan_threads.get(scan_id)
+        if thread is not None and thread.is_alive():
+            return False
+        thread = threading.Thread(target=relationship_scan_worker, args=(scan_id, user_id),
+                                  name=f"scan-{scan_id}", daemon=True)
+        scan_threads[scan_id] = thread
+        thread.start()
+    return True
+
+def relationship_scan_worker(scan_id, user_id):
+    """Page through the following list, then the followers list, checkpointing after every page."""
+    client = client_pool.acquire(user_id)
+    try:
+        while True:
+            scan = relationship_store.get_scan(scan_id)
+            if scan is None or scan['status'] not in ACTIVE_SCAN_STATUSES or scan['phase'] == 'done':
+                return
             
+            relation = scan['phase']
             try:
-                # Resolve username to ID (if needed)
-                target_id = username if username.isdigit() else x_client.resolve_username_to_id(username)
-                
-                if target_id:
-                    # Layer 2 Simplified: Direct unfollow with smart error classification
-                    # Note: Following pre-check removed due to X API permission requirements
-                    logging.info(f"🔄 Layer 2: Attempting unfollow for @{username}")
-                    success = x_client.unfollow_user(user_id, target_id)
-                    
-                    if success:
-                        track_unfollow_attempt(True)
-                        logging.info(f"✅ Unfollowed @{username} ({i+1}/{len(usernames)})")
-                    else:
-                        track_unfollow_attempt(False)
-                        error_msg = "Not following this account"
-                        logging.info(f"ℹ️ Cannot unfollow @{username} - not following")
-                else:
-                    error_msg = "User not found"
-                    logging.warning(f"⚠️ User @{username} not found")
-                    
+                page = client.get_relationship_page(user_id, relation, scan['next_token'], RELATIONSHIP_PAGE_SIZE)
             except Exception as e:
-                error_msg = str(e)
-                track_unfollow_attempt(False)
-                logging.error(f"❌ Error unfollowing @{username}: {error_msg}")
-            
-            # Layer 1: Simple result tracking
-            if success:
-                operation['results'].append({'username': username, 'success': True})
-                operation['success_count'] += 1
-                operation['successful_usernames'] = operation.get('successful_usernames', [])
-                operation['successful_usernames'].append(username)
-            else:
-                operation['results'].append({'username': username, 'success': False, 'error': error_msg or 'Unfollow failed'})
-                operation['failed_count'] += 1
-            
-            # Layer 1: Simple completion notification
-            operation['completed_count'] = i + 1  # Ensure completed count is updated
-            operation['last_completion_time'] = time.time()
-            operation['completion_pending'] = True
-            logging.info(f"UNFOLLOW_COMPLETED: {operation_id} - {i+1}/{len(usernames)} processed")
-            
-            # Layer 2: Smart wait based on error classification (except for last user)
-            if i < len(usernames) - 1 and operation['status'] != 'cancelled':
-                # Debug: Log classification inputs (can be removed after Layer 2 verification)
-                logging.info(f"🔍 Layer 2 Classification: success={success}, error_msg='{error_msg}', username=@{username}")
-                error_type, classified_wait = classify_unfollow_error(error_msg, success)
-                operation['next_unfollow_time'] = time.time() + classified_wait
+                if 'Rate limit exceeded' not in str(e):
+                    raise
                 
-                if classified_wait == 5:
-                    logging.info(f"⚡ {error_type.upper()} error - waiting 5 seconds before next unfollow...")
-                else:
-                    wait_minutes = classified_wait // 60
-                    logging.info(f"⏳ {error_type.upper()} - waiting {wait_minutes} minutes before next unfollow...")
+                # Wait out this list's window, then resume from the same pagination token
+                reset = client.rate_limits.get(relation, {}).get('reset') or 0
+                wait_until = reset if isinstance(reset, (int, float)) and reset > time.time() else time.time() + 15 * 60
+                relationship_store.set_status(scan_id, 'waiting_for_rate_limit_reset', wait_until=wait_until)
+                logging.info(f"⏳ Scan {scan_id} waiting {int(wait_until - time.time())}s for {relation} rate limit reset")
                 
                 # Wait in 1-second increments to allow cancellation
-                for second in range(classified_wait):
-                    if operation['status'] == 'cancelled':
-                        break
+                while time.time() < wait_until:
+                    current = relationship_store.get_scan(scan_id)
+                    if current is None or current['status'] not in ACTIVE_SCAN_STATUSES:
+                        return
                     time.sleep(1)
-                    
-                    # Layer 2: Progress updates during fast waits (5 seconds) for responsive UI
-                    if classified_wait == 5:
-                        operation['last_completion_time'] = time.time()
-                        operation['completion_pending'] = True
+                relationship_store.set_status(scan_id, 'running')
+                continue
+            
+            relationship_store.record_page(scan_id, relation, page['users'], page['next_token'])
+            logging.info(f"Scan {scan_id}: {len(page['users'])} {relation} IDs stored"
+                         f"{'' if page['next_token'] else f' - {relation} list complete'}")
+            if not page['next_token']:
+                save_scan_snapshot(scan_id, user_id, relation, complete=True)
+        
+    except Exception as e:
+        logging.error(f"Relationship scan {scan_id} failed: {str(e)}")
+        relationship_store.set_status(scan_id, 'error', error=str(e))
+        
+        # Keep what was fetched as a partial snapshot (flagged incomplete, never reused for batches)
+        scan = relationship_store.get_scan(scan_id)
+        if scan and scan['phase'] != 'done' and scan[f"{scan['phase']}_count"] > 0:
+            save_scan_snapshot(scan_id, user_id, scan['phase'], complete=False)
+    
+    finally:
+        client_pool.release(client)
+
+def save_scan_snapshot(scan_id, user_id, relation, complete):
+    """Write one list collected by a scan as a snapshot."""
+    try:
+        snapshot_store.write(user_id, relation, relationship_store.iter_ids(scan_id, relation),
+                             complete=complete, source=scan_id)
+    except Exception as e:
+        logging.error(f"Error writing {relation} snapshot for scan {scan_id}: {str(e)}")
+
+def scan_from_snapshots(user_id, max_age):
+    """
+    Build a completed scan from recent complete snapshots instead of refetching.
+    
+    Args:
+        user_id (str): Account being scanned
+        max_age (float): Maximum snapshot age in seconds
+        
+    Returns:
+        dict: The completed scan, or None if either list has no fresh snapshot
+    """
+    following = snapshot_store.latest(user_id, 'following', max_age=max_age)
+    followers = snapshot_store.latest(user_id, 'followers', max_age=max_age)
+    if following is None or followers is None:
+        return None
+    
+    scan_id = f"scan_{int(time.time())}_{user_id}_{secrets.token_hex(3)}"
+    relationship_store.create_scan(scan_id, user_id)
+    for meta in (following, followers):
+        with snapshot_store.open(meta['id']) as snapshot:
+            relationship_store.import_relation(scan_id, meta['relation'], snapshot.ids)
+    logging.info(f"Built scan {scan_id} from snapshots {following['id']} and {followers['id']} (no API calls)")
+    return relationship_store.get_scan(scan_id)
+
+def scan_summary(scan):
+    """Format a relationship scan for API responses."""
+    summary = {
+        'scan_id': scan['id'],
+        'status': scan['status'],
+        'phase': scan['phase'],
+        'pages': scan['pages'],
+        'following_count': scan['following_count'],
+        'followers_count': scan['followers_count'],
+        'resumable': scan['phase'] != 'done',
+        'wait_until': scan['wait_until'],
+        'error': scan['error'],
+        'started': datetime.fromtimestamp(scan['created_at']).strftime('%Y-%m-%d %H:%M:%S'),
+        'updated': datetime.fromtimestamp(scan['updated_at']).strftime('%Y-%m-%d %H:%M:%S')
+    }
+    if scan['status'] == 'completed':
+        summary['non_mutual_count'] = relationship_store.count_non_mutuals(scan['id'])
+    return summary
+
+def classify_batch_targets(user_id, targets):
+    """
+    Classify targets for the batch planner from the ledger and the account's latest following list.
+    
+    Args:
+        user_id (str): Account doing the unfollowing
+        targets (list): Handles or numeric IDs
+        
+    Returns:
+        tuple: (dict of target -> planner class, the completed scan used or None)
+    """
+    following = {}
+    scan = relationship_store.latest_scan(user_id, status='completed')
+    if scan is not None and time.time() - scan['updated_at'] > PLANNER_FOLLOWING_MAX_AGE:
+        scan = None  # Too old to say who the account still follows
+    if scan is not None:
+        ids = [target for target in targets if target.isdigit()]
+        handles = [normalize_target(target) for target in targets if not target.isdigit()]
+        found_ids, found_handles, has_usernames = relationship_store.following_membership(scan['id'], ids, handles)
+        for target in targets:
+            if target.isdigit():
+                following[target] = target in found_ids
+            elif has_usernames:
+                following[target] = normalize_target(target) in found_handles
+    
+    classes = {}
+    for target in targets:
+        entry = target_ledger.get(user_id, target)
+        classes[target] = classify_target(entry['outcome'] if entry else None, following.get(target))
+    return classes, scan
+
+def plan_operation(operation, state_lock):
+    """
+    Reorder a starting batch for throughput, pulling zero-quota targets forward from the
+    account's queued batches (see batch_planner).
+    
+    Args:
+        operation (dict): Live operation about to start (updated in place)
+        state_lock: Lock guarding the operation
+        
+    Returns:
+        dict: The plan stored on the operation
+    """
+    user_id = operation['user_id']
+    entries = shared_state.queue_entries(user_id) if shared_state is not None else batch_state.queue_entries(user_id)
+    queued = [(entry['operation_id'], entry['usernames']) for entry in entries if entry['operation_id'] != operation['id']]
+    classes, scan = classify_batch_targets(user_id, operation['usernames'] + [t for _, targets in queued for t in targets])
+    
+    pulled = []
+    queued_targets = dict(queued)
+    store = shared_state if shared_state is not None else batch_state
+    for queued_id, targets in pick_moves(queued, classes).items():
+        taken, updated = store.take_queued_targets(
+            queued_id, targets, note=f"{len(targets)} targets resolvable without quota moved into batch {operation['id']}")
+        if taken:
+            if shared_state is None:
+                operation_index.update(updated)
+            pulled.append((queued_id, queued_targets[queued_id], taken))
+            logging.info(f"📋 Planner moved {len(taken)} zero-quota targets from queued batch {queued_id} into {operation['id']}")
+    
+    _, quota_wait = classify_unfollow_error(None, True)
+    ordered, plan = plan_batch(operation['usernames'], classes, quota_wait, get_eta_model().mean_duration, pulled)
+    plan['following_list_at'] = scan['updated_at'] if scan else None
+    with state_lock:
+        operation['usernames'] = ordered
+        operation['total_count'] = len(ordered)
+        operation['plan'] = plan
+        if plan['saving_seconds'] >= 60:
+            operation.setdefault('notes', []).append(
+                f"Planner reordered targets: projected {plan['saving_seconds'] // 60} minutes faster")
+    logging.info(f"📋 Plan for {operation['id']}: {plan['counts']}, projected saving {plan['saving_seconds']}s")
+    return plan
+
+# Debug API endpoint removed - not needed for production batch processing
+
+# Core batch processing functions below - all debug/single features removed
+
+def wait_for_slot(operation, user_id, fence, wait_until, budget_wait=False, progress_updates=False):
+    """
+    Sleep until the next unfollow slot in 1-second steps, stopping early if the batch is cancelled.
+    
+    Args:
+        operation (dict): Live operation
+        user_id (str): Account running the batch
+        fence (tuple): Lease the worker is fenced on (None in single-process mode)
+        wait_until (float): End of the wait (epoch seconds)
+        budget_wait (bool): The hourly/daily budget is used up - shown in the status while it lasts
+        progress_updates (bool): Notify clients every second (fast waits)
+        
+    Raises:
+        LeaseLostError: If the lease is lost during the wait
+    """
+    state_lock = batch_state.lock_for(user_id)
+    if budget_wait:
+        with state_lock:
+            operation['waiting_for_reset'] = True
+            operation['reset_wait_seconds'] = round(wait_until - time.time())
+            operation['rate_limit_wait_until'] = wait_until
+        publish_operation(operation, fence)
+        logging.info(f"⏳ Unfollow budget used up ({UNFOLLOW_HOURLY_LIMIT}/hour, {UNFOLLOW_DAILY_LIMIT}/day) - "
+                     f"waiting until {datetime.fromtimestamp(wait_until).strftime('%Y-%m-%d %H:%M:%S')}...")
+    
+    # Wait in 1-second increments to allow cancellation
+    with tracer.span('wait', wait_seconds=round(wait_until - time.time())):
+        while time.time() < wait_until:
+            if is_cancelled(operation):
+                break
+            if fence_lost(fence, user_id):
+                raise LeaseLostError(f"Lease {fence[0]} lost during wait")
+            time.sleep(1)
+            
+            if progress_updates:
+                with state_lock:
+                    operation['last_completion_time'] = time.time()
+                    operation['completion_pending'] = True
+                publish_operation(operation, fence)
+    
+    if budget_wait:
+        with state_lock:
+            operation['waiting_for_reset'] = False
+        publish_operation(operation, fence)
+
+def slow_batch_worker(operation_id, user_id, usernames, interval_minutes=15, start_index=0, fence=None):
+    """Layer 1: Clean basic batch worker - simple, predictable processing."""
+    operation = None
+    target_span = NOOP_SPAN
+    # The account's own client, held for the whole batch (never evicted mid-batch)
+    client = client_pool.acquire(user_id)
+    try:
+        # Verify operation exists
+        operation = batch_state.get_live(operation_id)
+        if operation is None:
+            logging.error(f"Operation {operation_id} not found in batch operations")
+            return
+        
+        # Every mutation of the live operation happens under its account's lock, so readers
+        # (status, list, cancel) always see a consistent copy
+        state_lock = batch_state.lock_for(user_id)
         
-        # Layer 1: Simple completion handling
-        if operation['status'] == 'cancelled':
+        with state_lock:
+            if is_cancelled(operation):
+                logging.info(f"Batch {operation_id} was cancelled before it started")
+                cancelled_before_start = True
+            else:
+                cancelled_before_start = False
+                operation['status'] = 'running'
+                operation['start_time'] = operation.get('start_time') or time.time()
+        if cancelled_before_start:
+            start_next_queued_batch()
+            return
+        
+        # Plan once, before the first target - a resumed batch keeps its planned order
+        if BATCH_PLANNER_ENABLED and start_index == 0 and 'plan' not in operation:
+            try:
+                plan_operation(operation, state_lock)
+                usernames = operation['usernames']
+            except Exception as e:
+                logging.error(f"Batch planning failed for {operation_id}, keeping submitted order: {str(e)}")
+        not_following = set(operation.get('plan', {}).get('not_following', []))
+        
+        # A target that was in flight when the previous executor died has an unknown
+        # outcome - record it as interrupted rather than risk unfollowing it twice
+        if operation.get('inflight_index') is not None and operation['inflight_index'] == start_index:
+            interrupted = start_index < len(usernames) and not target_ledger.get(user_id, usernames[start_index])
+            with state_lock:
+                if interrupted:
+                    operation['results'].append({'username': usernames[start_index], 'success': False, 'interrupted': True,
+                                                 'error': 'Interrupted during executor failover - outcome unknown',
+                                                 'error_type': 'interrupted'})
+                    operation['failed_count'] += 1
+                    start_index += 1
+                operation['inflight_index'] = None
+        
+        publish_operation(operation, fence)
+        
+        logging.info(f"Starting batch {operation_id} for {len(usernames)} users (from index {start_index})")
+        
+        # Layer 1: Simple sequential processing
+        i = start_index
+        budget_checked = False
+        for i in range(start_index, len(usernames)):
+            username = usernames[i]
+            
+            # Check for cancellation
+            if is_cancelled(operation):
+                break
+            if fence_lost(fence, user_id):
+                raise LeaseLostError(f"Lease {fence[0]} lost before target {i + 1}")
+                
+            # Update current progress
+            with state_lock:
+                operation['current_username'] = username
+                operation['current_index'] = i
+                operation['completed_count'] = i + 1
+                operation['last_update'] = time.time()
+            
+            # One trace per target - child spans time each stage of the attempt
+            target_span = tracer.start_trace('unfollow_target', **{
+                'operation.id': operation_id, 'account.id': user_id,
+                'target': username, 'target.index': i
+            })
+            
+            # Skip targets already settled by an earlier batch - no API call, no wait
+            ledger_entry = target_ledger.get(user_id, username)
+            if ledger_entry:
+                with state_lock:
+                    operation['results'].append({'username': username, 'success': False, 'skipped': True,
+                                                 'error': f"Already settled: {ledger_entry['outcome']}",
+                                                 'error_type': 'already_settled'})
+                    operation['skipped_count'] = operation.get('skipped_count', 0) + 1
+                    operation['last_completion_time'] = time.time()
+                    operation['completion_pending'] = True
+                logging.info(f"⏭️ Skipping @{username} - already settled ({ledger_entry['outcome']})")
+                publish_operation(operation, fence)
+                target_span.set_attribute('outcome', 'skipped')
+                target_span.end()
+                continue
+            
+            # Absent from a fresh following list - an unfollow call would only cost a quota wait
+            if username in not_following:
+                with state_lock:
+                    operation['results'].append({'username': username, 'success': False, 'skipped': True,
+                                                 'error': 'Not following (per following list)',
+                                                 'error_type': 'not_following'})
+                    operation['skipped_count'] = operation.get('skipped_count', 0) + 1
+                    operation['last_completion_time'] = time.time()
+                    operation['completion_pending'] = True
+                logging.info(f"⏭️ Skipping @{username} - not in following list")
+                publish_operation(operation, fence)
+                target_span.set_attribute('outcome', 'skipped')
+                target_span.end()
+                continue
+            
+            # The first unfollow waits for a budget slot too - an earlier batch, or this one
+            # before a resume, may have used the account's hourly/daily budget up to now
+            if not budget_checked and ADMISSION_CONTROL_ENABLED:
+                budget_checked = True
+                wait_until = next_slot(time.time(), quota_history(user_id), UNFOLLOW_HOURLY_LIMIT, UNFOLLOW_DAILY_LIMIT)
+                if wait_until > time.time() + 1:
+                    with state_lock:
+                        operation['next_unfollow_time'] = wait_until
+                    wait_for_slot(operation, user_id, fence, wait_until, budget_wait=True)
+                    if is_cancelled(operation):
+                        break
+            
+            # Checkpoint the in-flight target before any API call (fenced in lease mode)
+            with state_lock:
+                operation['inflight_index'] = i
+            with tracer.span('checkpoint'):
+                publish_operation(operation, fence)
+            
+            # Layer 1: Basic unfollow attempt
+            success = False
+            error_msg = None
+            target_id = None
+            step_started = time.time()
+            
+            try:
+                # Resolve username to ID (if needed)
+                if username.isdigit():
+                    target_id = username
+                else:
+                    with tracer.span('resolve') as resolve_span:
+                        target_id = client.resolve_username_to_id(username)
+                        resolve_span.set_attribute('found', bool(target_id))
+                
+                if target_id:
+                    # Layer 2 Simplified: Direct unfollow with smart error classification
+                    # Note: Following pre-check removed due to X API permission requirements
+                    logging.info(f"🔄 Layer 2: Attempting unfollow for @{username}")
+                    with tracer.span('unfollow', **{'target.id': target_id}) as unfollow_span:
+                        success = client.unfollow_user(user_id, target_id)
+                        unfollow_span.set_attribute('success', success)
+                    
+                    if success:
+                        logging.info(f"✅ Unfollowed @{username} ({i+1}/{len(usernames)})")
+                    else:
+                        error_msg = "Not following this account"
+                        logging.info(f"ℹ️ Cannot unfollow @{username} - not following")
+                else:
+                    error_msg = "User not found"
+                    logging.warning(f"⚠️ User @{username} not found")
+                    
+            except Exception as e:
+                error_msg = str(e)
+                logging.error(f"❌ Error unfollowing @{username}: {error_msg}")
+            
+            # Layer 2: Classify once - drives the wait below and the ETA history
+            with tracer.span('classify') as classify_span:
+                error_type, classified_wait = classify_unfollow_error(error_msg, success, client.last_api_error)
+                classify_span.set_attribute('error_type', error_type)
+            with tracer.span('track'):
+                track_unfollow_attempt(success, error_type, classified_wait, time.time() - step_started, user_id)
+            with tracer.span('ledger'):
+                record_target_outcome(user_id, username, target_id, success, client.last_api_error)
+            target_span.set_attribute('outcome', 'success' if success else 'failed')
+            target_span.set_attribute('error_type', error_type)
+            if error_msg:
+                target_span.set_error(error_msg)
+            
+            with state_lock:
+                # Layer 1: Simple result tracking
+                if success:
+                    operation['results'].append({'username': username, 'success': True})
+                    operation['success_count'] += 1
+                    operation['successful_usernames'] = operation.get('successful_usernames', [])
+                    operation['successful_usernames'].append(username)
+                else:
+                    operation['results'].append({'username': username, 'success': False, 'error': error_msg or 'Unfollow failed',
+                                                 'error_type': error_type})
+                    operation['failed_count'] += 1
+                
+                # Layer 1: Simple completion notification
+                operation['inflight_index'] = None
+                operation['completed_count'] = i + 1  # Ensure completed count is updated
+                operation['last_completion_time'] = time.time()
+                operation['completion_pending'] = True
+            logging.info(f"UNFOLLOW_COMPLETED: {operation_id} - {i+1}/{len(usernames)} processed")
+            
+            # Layer 2: Smart wait based on error classification (except for last user)
+            wait_before_next = i < len(usernames) - 1 and not is_cancelled(operation)
+            if wait_before_next:
+                # Sleep until the next slot the hourly/daily budgets allow, not just the classified
+                # spacing, so the next unfollow never runs into the limit
+                wait_until = time.time() + classified_wait
+                if ADMISSION_CONTROL_ENABLED:
+                    wait_until = next_slot(wait_until, quota_history(user_id), UNFOLLOW_HOURLY_LIMIT, UNFOLLOW_DAILY_LIMIT)
+                budget_wait = wait_until - time.time() > classified_wait + 1
+                with state_lock:
+                    operation['next_unfollow_time'] = wait_until
+            update_estimated_completion(operation)
+            publish_operation(operation, fence)
+            
+            if wait_before_next:
+                # Debug: Log classification inputs (can be removed after Layer 2 verification)
+                logging.info(f"🔍 Layer 2 Classification: success={success}, error_msg='{error_msg}', username=@{username}")
+                
+                if classified_wait == 5 and not budget_wait:
+                    logging.info(f"⚡ {error_type.upper()} error - waiting 5 seconds before next unfollow...")
+                elif not budget_wait:
+                    wait_minutes = classified_wait // 60
+                    logging.info(f"⏳ {error_type.upper()} - waiting {wait_minutes} minutes before next unfollow...")
+                
+                # Layer 2: Progress updates during fast waits (5 seconds) for responsive UI
+                wait_for_slot(operation, user_id, fence, wait_until, budget_wait=budget_wait,
+                              progress_updates=classified_wait == 5)
+            target_span.end()
+        
+        # Layer 1: Simple completion handling (checked and set under the lock, so a cancel
+        # arriving now is never overwritten by 'completed')
+        with state_lock:
+            cancelled = is_cancelled(operation)
             operation['end_time'] = time.time()
+            if not cancelled:
+                operation['status'] = 'completed'
+        if cancelled:
             logging.info(f"Batch {operation_id} cancelled at user {i+1}/{len(usernames)}")
         else:
-            operation['status'] = 'completed'
-            operation['end_time'] = time.time()
             logging.info(f"✅ Batch {operation_id} completed: {operation['success_count']} successful, {operation['failed_count']} failed")
         
+        publish_operation(operation, fence)
+        
+        # Finished - move it out of the hot state into the archive
+        archive_operation(operation_id)
+        
         # Start next queued batch
         start_next_queued_batch()
         
+    except LeaseLostError as e:
+        # Another node (executor or lane holder) resumes from the last checkpoint -
+        # stop without writing anything further
+        logging.warning(f"Batch {operation_id} stopped on this node: {str(e)}")
+        batch_state.remove([operation_id])
+        
     except Exception as e:
         # Layer 1: Simple error handling
         logging.critical(f"Critical error in batch {operation_id}: {str(e)}")
         
         if operation is not None:
-            operation['status'] = 'error'
-            operation['error'] = str(e)
-            operation['end_time'] = time.time()
+            with batch_state.lock_for(user_id):
+                operation['status'] = 'error'
+                operation['error'] = str(e)
+                operation['end_time'] = time.time()
+            try:
+                publish_operation(operation, fence)
+                archive_operation(operation_id)
+            except LeaseLostError:
+                pass
+        if shared_state is not None:
+            batch_state.remove([operation_id])
         
         # Try to start next batch
         start_next_queued_batch()
+        
+    finally:
+        # A target interrupted by an error, lease loss or cancellation still exports its trace
+        target_span.end()
+        client_pool.release(client)
+        if fence is not None and LEASE_MODE_ENABLED:
+            finish_lane_batch(user_id, operation_id)
+
+def submit_slow_batch(user_id, username, usernames, interval_minutes=15, batch_type='regular'):
+    """
+    Validate, deduplicate and queue (or start) a slow batch for an account.
+    
+    Args:
+        user_id (str): Account doing the unfollowing
+        username (str): Account's handle (for display)
+        usernames (list): Raw targets (handles, URLs or numeric IDs)
+        interval_minutes (int): Interval between unfollows
+        batch_type (str): 'test' or 'regular'
+        
+    Returns:
+        tuple: (response payload, HTTP status code)
+    """
+    # Clean up old operations before starting new one
+    cleanup_old_operations()
+    
+    if not usernames:
+        return {'error': 'No users selected'}, 400
+    if not isinstance(usernames, list):
+        return {'error': 'usernames must be a list'}, 400
+    
+    # Normalize and validate locally - malformed handles never cost a lookup or a wait
+    validation = validate_targets(usernames)
+    usernames = validation['valid']
+    if validation['rejected'] or validation['duplicates']:
+        logging.info(f"Submission validation: {validation['counts']}")
+    if not usernames:
+        return {'error': 'No valid usernames or user IDs submitted', 'validation': validation}, 400
+    
+    # Check batch limits
+    active_batch_count = get_active_batch_count(user_id)
+    if active_batch_count >= MAX_TOTAL_BATCHES:
+        return {'error': f'Maximum {MAX_TOTAL_BATCHES} batches allowed (running + queued). Complete or cancel existing batches first.'}, 400
+    
+    # Enforce limits based on batch type
+    if batch_type == 'test' and len(usernames) > 5:
+        return {'error': 'Maximum 5 users allowed for test batch'}, 400
+    elif batch_type == 'regular' and len(usernames) > 1000:
+        return {'error': 'Maximum 1000 users allowed for regular batch'}, 400
+        
+    # Only allow 15-minute intervals for free API tier
+    if interval_minutes != 15:
+        return {'error': 'Only 15-minute intervals supported for free API tier'}, 400
+    
+    # Drop duplicates and targets already settled or pending in another batch
+    submitted_count = len(usernames)
+    usernames, settled_entries = target_ledger.partition(user_id, usernames)
+    pending_targets = get_pending_targets(user_id)
+    unique_usernames = []
+    for target in usernames:
+        key = normalize_target(target)
+        if key not in pending_targets:
+            pending_targets.add(key)
+            unique_usernames.append(target)
+    duplicate_count = len(usernames) - len(unique_usernames)
+    usernames = unique_usernames
+    
+    if settled_entries or duplicate_count:
+        logging.info(f"Submission dedup: {len(settled_entries)} settled, {duplicate_count} duplicates skipped of {submitted_count}")
+    
+    if not usernames:
+        return {
+            'error': 'All selected users were already processed or are pending in another batch',
+            'skipped_settled': [entry['submitted'] for entry in settled_entries],
+            'skipped_duplicates': duplicate_count,
+            'validation': validation
+        }, 400
+    
+    # Unfollows the batch will spend quota on (settled / known not-followed targets take no slot)
+    quota_count = 0
+    if ADMISSION_CONTROL_ENABLED:
+        classes, _ = classify_batch_targets(user_id, usernames)
+        quota_count = sum(1 for target_class in classes.values() if target_class not in NO_QUOTA_CLASSES)
+    
+    # Create operation ID (random suffix keeps IDs unique across processes and same-second submissions)
+    operation_id = f"{batch_type}_batch_{interval_minutes}min_{int(time.time())}_{user_id}_{secrets.token_hex(3)}"
+    
+    # Check if a batch is currently running (across all users, or this account's lane in lease mode).
+    # In single-process mode this is decided atomically when the batch is admitted below.
+    running_batch = None
+    if LEASE_MODE_ENABLED and shared_state is not None:
+        running_batch = get_running_batch(user_id)
+    elif shared_state is not None:
+        for operation in all_operations():
+            if operation['status'] in ['running', 'waiting_for_rate_limit_reset']:
+                running_batch = operation
+                break
+    
+    # Initialize operation tracking
+    operation = {
+        'id': operation_id,
+        'user_id': user_id,
+        'username': username,
+        'status': 'queued' if running_batch else 'starting',
+        'interval_minutes': interval_minutes,
+        'total_count': len(usernames),
+        'completed_count': 0,
+        'success_count': 0,
+        'failed_count': 0,
+        'skipped_count': 0,
+        'current_username': None,
+        'current_index': 0,
+        'usernames': usernames,
+        'results': [],
+        'start_time': None,
+        'end_time': None,
+        'last_update': time.time(),
+        'next_unfollow_time': None,
+        'estimated_completion': None,  # Set from the ETA model once the batch is queued
+        'calendar': None,  # Set by the admission check
+        'queue_position': get_queue_length() + 1 if running_batch else 0,
+        # Simplified - no complex timing tracking for now
+    }
+    queue_entry = {
+        'operation_id': operation_id,
+        'user_id': user_id,
+        'usernames': usernames,
+        'interval_minutes': interval_minutes
+    }
+    
+    # Admission: lay the batch out in quota slots after the work the account already has queued,
+    # and refuse it if the schedule would run past ADMISSION_MAX_DAYS. The check and the admit it
+    # allows are one step per account, so concurrent submissions can't claim the same slots.
+    admission = {'slots': [], 'calendar': None}
+    def admission_check(ahead_count):
+        admission['slots'], admission['calendar'], rejection = admission_calendar(user_id, quota_count, ahead_count)
+        operation['calendar'] = compact_calendar(admission['calendar'])
+        if rejection is not None:
+            rejection['validation'] = validation
+        return rejection
+    
+    if shared_state is not None:
+        # Every batch goes through the shared queue - the elected executor starts it
+        rejection = shared_state.admit_operation(operation, queue_entry,
+                                                 admission_check if ADMISSION_CONTROL_ENABLED else None)
+        if rejection is None:
+            start_next_queued_batch()
+    else:
+        with batch_state.admission_lock(user_id):
+            rejection = admission_check(remaining_account_work(user_id)) if ADMISSION_CONTROL_ENABLED else None
+            if rejection is None:
+                # Queue behind the busy executor, or reserve it, in one step
+                running_batch = batch_state.admit(operation, queue_entry)
+        if rejection is None:
+            operation_index.update(operation)
+    if rejection is not None:
+        return rejection, 400
+    calendar_slots, calendar = admission['slots'], admission['calendar']
+    
+    # Estimate from observed timing, including everything queued ahead
+    eta = estimate_operation_eta(operation)
+    if eta is not None:
+        with batch_state.lock_for(user_id):
+            operation['eta'] = eta
+            operation['estimated_completion'] = eta['computed_at'] + eta['remaining_seconds']
+        
+        # Other accounts' batches ahead on the executor push the whole calendar back
+        if calendar_slots and eta['queue_wait_seconds'] > 0 and not LEASE_MODE_ENABLED:
+            not_before = time.time() + eta['queue_wait_seconds']
+            if not_before > calendar_slots[0]:
+                calendar_slots = quota_calendar(user_id, len(calendar_slots), max(0, remaining_account_work(user_id) - len(usernames)),
+                                                not_before=not_before)
+                calendar = summarize_calendar(calendar_slots, time.time(), UNFOLLOW_HOURLY_LIMIT, UNFOLLOW_DAILY_LIMIT)
+                operation['calendar'] = compact_calendar(calendar)
+    schedule = dict(calendar, slots=[round(slot) for slot in calendar_slots]) if calendar else None
+    if shared_state is not None and eta is not None:
+        # Store the estimate for batch lists, unless the executor has already picked the batch up
+        shared_state.set_status(operation_id, operation['status'], from_statuses=(operation['status'],),
+                                eta=eta, estimated_completion=operation['estimated_completion'],
+                                calendar=operation['calendar'])
+    
+    if running_batch:
+        queue_position = get_queue_length()
+        
+        logging.info(f"Queued batch {operation_id} at position {queue_position}. Current batch: {running_batch['id']}")
+        
+        return {
+            'success': True,
+            'operation_id': operation_id,
+            'queued': True,
+            'queue_position': queue_position,
+            'message': f'Batch queued at position {queue_position}. Will start when current batch completes.',
+            'estimated_wait_hours': round(eta['queue_wait_seconds'] / 3600, 1) if eta else None,
+            'eta': eta,
+            'schedule': schedule,
+            'current_running_batch': running_batch['id'],
+            'skipped_settled': [entry['submitted'] for entry in settled_entries],
+            'skipped_duplicates': duplicate_count,
+            'validation': validation
+        }, 200
+    elif shared_state is None:
+        # Start immediately
+        start_batch_thread(operation_id, user_id, usernames, interval_minutes)
+    
+    logging.info(f"Started {interval_minutes}-minute slow batch operation {operation_id} for {len(usernames)} users")
+    
+    return {
+        'success': True,
+        'operation_id': operation_id,
+        'message': f'Started slow batch unfollow for {len(usernames)} users ({interval_minutes}min intervals)',
+        'estimated_duration_hours': round(eta['remaining_seconds'] / 3600, 1) if eta else None,
+        'eta': eta,
+        'schedule': schedule,
+        'skipped_settled': [entry['submitted'] for entry in settled_entries],
+        'skipped_duplicates': duplicate_count,
+        'validation': validation
+    }, 200
 
 @app.route('/unfollow/slow-batch', methods=['POST'])
 def unfollow_slow_batch():
@@ -624,116 +1900,350 @@ def unfollow_slow_batch():
         return jsonify({'error': 'Not authenticated'}), 401
     
     try:
-        # Clean up old operations before starting new one
-        cleanup_old_operations()
-        
         data = request.get_json()
-        usernames = data.get('usernames', [])
-        interval_minutes = data.get('interval_minutes', 15)  # Default to 15 minutes
-        batch_type = data.get('batch_type', 'regular')  # 'test' or 'regular'
-        
-        if not usernames:
-            return jsonify({'error': 'No users selected'}), 400
-        
-        # Check batch limits
-        active_batch_count = get_active_batch_count(session['user_id'])
-        if active_batch_count >= MAX_TOTAL_BATCHES:
-            return jsonify({'error': f'Maximum {MAX_TOTAL_BATCHES} batches allowed (running + queued). Complete or cancel existing batches first.'}), 400
-        
-        # Enforce limits based on batch type
-        if batch_type == 'test' and len(usernames) > 5:
-            return jsonify({'error': 'Maximum 5 users allowed for test batch'}), 400
-        elif batch_type == 'regular' and len(usernames) > 1000:
-            return jsonify({'error': 'Maximum 1000 users allowed for regular batch'}), 400
-            
-        # Only allow 15-minute intervals for free API tier
-        if interval_minutes != 15:
-            return jsonify({'error': 'Only 15-minute intervals supported for free API tier'}), 400
+        payload, status_code = submit_slow_batch(
+            session['user_id'], session.get('username', 'Unknown'), data.get('usernames', []),
+            data.get('interval_minutes', 15),  # Default to 15 minutes
+            data.get('batch_type', 'regular')  # 'test' or 'regular'
+        )
+        return jsonify(payload), status_code
         
-        # Create operation ID
-        operation_id = f"{batch_type}_batch_{interval_minutes}min_{int(time.time())}_{session['user_id']}"
+    except Exception as e:
+        logging.error(f"Slow batch unfollow error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/targets/validate', methods=['POST'])
+def validate_target_list():
+    """Validate and normalize a target list without submitting it."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    data = request.get_json(silent=True) or {}
+    usernames = data.get('usernames', [])
+    if not isinstance(usernames, list):
+        return jsonify({'error': 'usernames must be a list'}), 400
+    
+    return jsonify(validate_targets(usernames))
+
+@app.route('/api/non-mutuals/scan', methods=['POST'])
+def start_non_mutual_scan():
+    """Start (or resume) a scan of the following and followers lists."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        user_id = session['user_id']
+        scan = relationship_store.latest_scan(user_id)
+        
+        # Resume an unfinished scan from its last pagination token unless a restart is requested
+        if scan and scan['phase'] != 'done' and not data.get('restart'):
+            if scan['status'] not in ACTIVE_SCAN_STATUSES:
+                relationship_store.set_status(scan['id'], 'running')
+            if start_scan_thread(scan['id'], user_id):
+                logging.info(f"Resuming scan {scan['id']} at {scan['phase']} page {scan['pages'] + 1}")
+            return jsonify(scan_summary(relationship_store.get_scan(scan['id'])))
+        
+        if scan and scan['phase'] == 'done' and not data.get('restart'):
+            return jsonify(scan_summary(scan))
+        
+        if scan and scan['status'] in ACTIVE_SCAN_STATUSES:
+            relationship_store.set_status(scan['id'], 'cancelled')
+        
+        # Reuse recent complete snapshots when the caller accepts their age
+        if data.get('max_age_hours') is not None:
+            scan = scan_from_snapshots(user_id, float(data['max_age_hours']) * 3600)
+            if scan is not None:
+                relationship_store.delete_scans(user_id, keep_scan_id=scan['id'])
+                return jsonify(dict(scan_summary(scan), from_snapshots=True))
+        
+        scan_id = f"scan_{int(time.time())}_{user_id}_{secrets.token_hex(3)}"
+        scan = relationship_store.create_scan(scan_id, user_id)
+        relationship_store.delete_scans(user_id, keep_scan_id=scan_id)
+        start_scan_thread(scan_id, user_id)
+        logging.info(f"Started non-mutual scan {scan_id} for user {user_id}")
+        return jsonify(scan_summary(scan))
         
-        # Check if a batch is currently running (across all users)
-        running_batch = None
-        for operation in slow_batch_operations.values():
-            if operation['status'] in ['running', 'waiting_for_rate_limit_reset']:
-                running_batch = operation
+    except Exception as e:
+        logging.error(f"Non-mutual scan error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/non-mutuals/scan', methods=['GET'])
+def get_non_mutual_scan():
+    """Get progress of the latest following/followers scan."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    scan = relationship_store.latest_scan(session['user_id'])
+    if scan is None:
+        return jsonify({'error': 'No scan found'}), 404
+    return jsonify(scan_summary(scan))
+
+@app.route('/api/non-mutuals/scan/cancel', methods=['POST'])
+def cancel_non_mutual_scan():
+    """Stop the latest scan (it can be resumed later from its checkpoint)."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    scan = relationship_store.latest_scan(session['user_id'])
+    if scan is None:
+        return jsonify({'error': 'No scan found'}), 404
+    if scan['status'] in ACTIVE_SCAN_STATUSES:
+        relationship_store.set_status(scan['id'], 'cancelled')
+    return jsonify(scan_summary(relationship_store.get_scan(scan['id'])))
+
+@app.route('/api/non-mutuals')
+def list_non_mutuals():
+    """List accounts followed but not following back (from the latest completed scan)."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    try:
+        limit = min(int(request.args.get('limit', 100)), 1000)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    
+    scan = relationship_store.latest_scan(session['user_id'])
+    if scan is None or scan['status'] != 'completed':
+        return jsonify({'error': 'No completed scan - start one with POST /api/non-mutuals/scan'}), 404
+    
+    return jsonify({
+        'scan_id': scan['id'],
+        'total': relationship_store.count_non_mutuals(scan['id']),
+        'limit': limit,
+        'offset': offset,
+        'candidates': relationship_store.non_mutuals(scan['id'], limit, offset)
+    })
+
+@app.route('/api/non-mutuals/batch', methods=['POST'])
+def batch_non_mutuals():
+    """Submit non-mutual accounts (by ID, no lookups needed) as a slow batch."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        batch_type = data.get('batch_type', 'regular')
+        limit = min(int(data.get('limit', 1000)), 5 if batch_type == 'test' else 1000)
+        offset = max(int(data.get('offset', 0)), 0)
+        user_id = session['user_id']
+        
+        scan = relationship_store.latest_scan(user_id)
+        if scan is None or scan['status'] != 'completed':
+            return jsonify({'error': 'No completed scan - start one with POST /api/non-mutuals/scan'}), 404
+        
+        # Page through candidates, skipping targets already settled or pending in another batch
+        pending_targets = get_pending_targets(user_id)
+        targets = []
+        while len(targets) < limit:
+            page = relationship_store.non_mutuals(scan['id'], RELATIONSHIP_PAGE_SIZE, offset)
+            if not page:
                 break
+            offset += len(page)
+            for candidate in page:
+                if normalize_target(candidate['id']) not in pending_targets and not target_ledger.get(user_id, candidate['id']):
+                    targets.append(candidate['id'])
+                    if len(targets) >= limit:
+                        break
+        
+        if not targets:
+            return jsonify({'error': 'No unprocessed non-mutual accounts left in this scan'}), 400
+        
+        payload, status_code = submit_slow_batch(user_id, session.get('username', 'Unknown'), targets,
+                                                 data.get('interval_minutes', 15), batch_type)
+        payload['scan_id'] = scan['id']
+        return jsonify(payload), status_code
         
-        # Initialize operation tracking
-        slow_batch_operations[operation_id] = {
-            'id': operation_id,
-            'user_id': session['user_id'],
-            'username': session.get('username', 'Unknown'),
-            'status': 'queued' if running_batch else 'starting',
-            'interval_minutes': interval_minutes,
-            'total_count': len(usernames),
-            'completed_count': 0,
-            'success_count': 0,
-            'failed_count': 0,
-            'current_username': None,
-            'current_index': 0,
-            'usernames': usernames,
-            'results': [],
-            'start_time': None,
-            'end_time': None,
-            'last_update': time.time(),
-            'next_unfollow_time': None,
-            'estimated_completion': time.time() + ((len(usernames) - 1) * interval_minutes * 60),
-            'queue_position': len(batch_queue) + 1 if running_batch else 0,
-            # Simplified - no complex timing tracking for now
+    except Exception as e:
+        logging.error(f"Non-mutual batch error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/archive/following', methods=['POST'])
+def import_archive_following():
+    """Submit account IDs from an uploaded X archive following.js (or archive zip) as a slow batch."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({'error': 'Upload the archive following.js (or the archive .zip) as "file"'}), 400
+    
+    try:
+        batch_type = request.form.get('batch_type', 'regular')
+        limit = min(int(request.form.get('limit', 1000)), 5 if batch_type == 'test' else 1000)
+        offset = max(int(request.form.get('offset', 0)), 0)
+        submit = request.form.get('submit', 'true').lower() != 'false'
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    
+    try:
+        user_id = session['user_id']
+        
+        # Stream the file: keep only the page being submitted, count everything else
+        pending_targets = get_pending_targets(user_id)
+        stats = {}
+        targets = []
+        settled_count = 0
+        position = 0
+        for account_id in iter_archive_following_ids(upload.stream, stats):
+            position += 1
+            if position <= offset or len(targets) >= limit:
+                continue
+            if normalize_target(account_id) in pending_targets or target_ledger.get(user_id, account_id):
+                settled_count += 1
+                continue
+            targets.append(account_id)
+        
+        archive = {
+            'entries': stats.get('entries', 0),
+            'account_ids': position,
+            'invalid': stats.get('invalid', 0),
+            'files': stats.get('files', 0),
+            'offset': offset,
+            'already_processed': settled_count,
+            'selected': len(targets),
+            'next_offset': offset + len(targets) + settled_count if offset + len(targets) + settled_count < position else None
         }
+        logging.info(f"Archive import for {user_id}: {archive}")
         
-        if running_batch:
-            # Add to queue
-            batch_queue.append({
-                'operation_id': operation_id,
-                'user_id': session['user_id'],
-                'usernames': usernames,
-                'interval_minutes': interval_minutes
-            })
-            
-            queue_position = len(batch_queue)
-            estimated_wait_time = 0
-            
-            # Calculate estimated wait time based on running batch
-            if running_batch['total_count'] > running_batch['completed_count']:
-                remaining_unfollows = running_batch['total_count'] - running_batch['completed_count']
-                estimated_wait_time = remaining_unfollows * interval_minutes
-            
-            logging.info(f"Queued batch {operation_id} at position {queue_position}. Current batch: {running_batch['id']}")
-            
-            return jsonify({
-                'success': True,
-                'operation_id': operation_id,
-                'queued': True,
-                'queue_position': queue_position,
-                'message': f'Batch queued at position {queue_position}. Will start when current batch completes.',
-                'estimated_wait_hours': round(estimated_wait_time / 60, 1),
-                'current_running_batch': running_batch['id']
-            })
-        else:
-            # Start immediately
-            thread = threading.Thread(
-                target=slow_batch_worker, 
-                args=(operation_id, session['user_id'], usernames, interval_minutes),
-                daemon=True
-            )
-            thread.start()
+        if not submit:
+            return jsonify({'archive': archive, 'targets': targets})
+        if not targets:
+            return jsonify({'error': 'No unprocessed account IDs in this part of the archive', 'archive': archive}), 400
         
-        logging.info(f"Started {interval_minutes}-minute slow batch operation {operation_id} for {len(usernames)} users")
+        # Numeric IDs go straight to the unfollow call - no user_lookup requests
+        payload, status_code = submit_slow_batch(user_id, session.get('username', 'Unknown'), targets,
+                                                 int(request.form.get('interval_minutes', 15)), batch_type)
+        payload['archive'] = archive
+        return jsonify(payload), status_code
+        
+    except ValueError as e:
+        return jsonify({'error': f'Invalid archive file: {str(e)}'}), 400
+    except Exception as e:
+        logging.error(f"Archive import error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/snapshots')
+def list_snapshots():
+    """List stored following/followers snapshots for the current user."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    relation = request.args.get('relation')
+    if relation not in (None, 'following', 'followers'):
+        return jsonify({'error': 'relation must be following or followers'}), 400
+    
+    snapshots = []
+    for meta in snapshot_store.list(session['user_id'], relation):
+        snapshots.append(dict(meta, created=datetime.fromtimestamp(meta['created_at']).strftime('%Y-%m-%d %H:%M:%S')))
+    return jsonify({'snapshots': snapshots})
+
+@app.route('/api/snapshots/diff')
+def diff_snapshot_lists():
+    """Diff two snapshots of a list (defaults to the two newest complete ones)."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    try:
+        relation = request.args.get('relation', 'following')
+        limit = min(int(request.args.get('limit', 1000)), 10000)
+        if relation not in ('following', 'followers'):
+            return jsonify({'error': 'relation must be following or followers'}), 400
+        
+        from_id = request.args.get('from')
+        to_id = request.args.get('to')
+        if not from_id or not to_id:
+            complete = [meta for meta in snapshot_store.list(session['user_id'], relation) if meta['complete']]
+            if len(complete) < 2:
+                return jsonify({'error': f'Need two complete {relation} snapshots to diff'}), 404
+            to_id = to_id or complete[0]['id']
+            from_id = from_id or complete[1]['id']
+        
+        metas = [snapshot_store.get(from_id), snapshot_store.get(to_id)]
+        if any(meta is None or meta['account'] != str(session['user_id']) for meta in metas):
+            return jsonify({'error': 'Snapshot not found'}), 404
+        
+        started = time.time()
+        with snapshot_store.open(from_id) as old, snapshot_store.open(to_id) as new:
+            changes = diff_snapshots(old.ids, new.ids)
+        elapsed_ms = (time.time() - started) * 1000
         
         return jsonify({
-            'success': True,
-            'operation_id': operation_id,
-            'message': f'Started slow batch unfollow for {len(usernames)} users ({interval_minutes}min intervals)',
-            'estimated_duration_hours': round((len(usernames) - 1) * interval_minutes / 60, 1)
+            'relation': relation,
+            'from': metas[0],
+            'to': metas[1],
+            'added_count': len(changes['added']),
+            'removed_count': len(changes['removed']),
+            'added': [str(user_id) for user_id in changes['added'][:limit]],
+            'removed': [str(user_id) for user_id in changes['removed'][:limit]],
+            'diff_ms': round(elapsed_ms, 2)
         })
         
     except Exception as e:
-        logging.error(f"Slow batch unfollow error: {str(e)}")
+        logging.error(f"Snapshot diff error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def build_status_payload(operation, current_time=None):
+    """
+    Build the status response for an operation (shared by the status poll and the event stream).
+    
+    Args:
+        operation (dict): Operation state
+        current_time (float): Time to compute progress against (defaults to now)
+        
+    Returns:
+        dict: Status payload
+    """
+    current_time = current_time or time.time()
+    progress_percentage = (operation['completed_count'] / operation['total_count']) * 100 if operation['total_count'] > 0 else 0
+    
+    # Calculate time estimates
+    time_elapsed = (current_time - operation['start_time']) if operation['start_time'] else 0
+    time_remaining = max(0, operation['next_unfollow_time'] - current_time) if operation['next_unfollow_time'] else 0
+    
+    # Recompute from the live model so the range tracks actual progress
+    eta = estimate_operation_eta(operation, current_time)
+    
+    # Check for rate limit wait status
+    rate_limit_info = {}
+    if operation.get('waiting_for_reset'):
+        rate_limit_info = {
+            'waiting_for_reset': True,
+            'reset_wait_seconds': operation.get('reset_wait_seconds', 0),
+            'wait_until': operation.get('rate_limit_wait_until', 0)
+        }
+    
+    return {
+        'operation_id': operation['id'],
+        'status': operation['status'],
+        'progress': {
+            'completed': operation['completed_count'],
+            'total': operation['total_count'],
+            'percentage': round(progress_percentage, 1),
+            'successful': operation['success_count'],
+            'failed': operation['failed_count'],
+            'skipped': operation.get('skipped_count', 0)
+        },
+        'current': {
+            'username': operation['current_username'],
+            'index': operation['current_index']
+        },
+        'timing': {
+            'elapsed_minutes': round(time_elapsed / 60, 1),
+            'next_unfollow_in_minutes': round(time_remaining / 60, 1),
+            'estimated_completion': eta['estimated_completion'] if eta else (datetime.fromtimestamp(operation['estimated_completion']).strftime('%Y-%m-%d %H:%M:%S') if operation.get('estimated_completion') else None),
+            'eta': eta,
+            'last_activity': operation.get('last_activity', 'Unknown')
+        },
+        'rate_limits': operation.get('current_rate_limits', {}),
+        'rate_limit_wait': rate_limit_info,
+        'last_update': operation['last_update'],
+        'notes': operation.get('notes', []),
+        'calendar': operation.get('calendar'),
+        'plan': {key: value for key, value in operation['plan'].items() if key != 'not_following'} if operation.get('plan') else None
+    }
+
 @app.route('/unfollow/slow-batch/<operation_id>/status')
 def slow_batch_status(operation_id):
     """Get status of a slow batch operation."""
@@ -741,61 +2251,113 @@ def slow_batch_status(operation_id):
         return jsonify({'error': 'Not authenticated'}), 401
     
     try:
-        if operation_id not in slow_batch_operations:
+        operation = find_operation(operation_id)
+        if operation is None:
             return jsonify({'error': 'Operation not found'}), 404
         
-        operation = slow_batch_operations[operation_id]
-        
         # Check if user owns this operation
         if operation['user_id'] != session['user_id']:
             return jsonify({'error': 'Access denied'}), 403
         
-        current_time = time.time()
-        progress_percentage = (operation['completed_count'] / operation['total_count']) * 100 if operation['total_count'] > 0 else 0
-        
-        # Calculate time estimates
-        time_elapsed = (current_time - operation['start_time']) if operation['start_time'] else 0
-        time_remaining = max(0, operation['next_unfollow_time'] - current_time) if operation['next_unfollow_time'] else 0
-        
-        # Check for rate limit wait status
-        rate_limit_info = {}
-        if operation.get('waiting_for_reset'):
-            rate_limit_info = {
-                'waiting_for_reset': True,
-                'reset_wait_seconds': operation.get('reset_wait_seconds', 0),
-                'wait_until': operation.get('rate_limit_wait_until', 0)
-            }
-        
-        return jsonify({
-            'operation_id': operation_id,
-            'status': operation['status'],
-            'progress': {
-                'completed': operation['completed_count'],
-                'total': operation['total_count'],
-                'percentage': round(progress_percentage, 1),
-                'successful': operation['success_count'],
-                'failed': operation['failed_count']
-            },
-            'current': {
-                'username': operation['current_username'],
-                'index': operation['current_index']
-            },
-            'timing': {
-                'elapsed_minutes': round(time_elapsed / 60, 1),
-                'next_unfollow_in_minutes': round(time_remaining / 60, 1),
-                'estimated_completion': datetime.fromtimestamp(operation['estimated_completion']).strftime('%Y-%m-%d %H:%M:%S') if operation.get('estimated_completion') else None,
-                'last_activity': operation.get('last_activity', 'Unknown')
-            },
-            'rate_limits': operation.get('current_rate_limits', {}),
-            'rate_limit_wait': rate_limit_info,
-            'last_update': operation['last_update'],
-            'notes': operation.get('notes', [])
-        })
+        return jsonify(build_status_payload(operation))
         
     except Exception as e:
         logging.error(f"Slow batch status error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/unfollow/slow-batch/<operation_id>/events')
+def slow_batch_events(operation_id):
+    """
+    Stream status updates for an operation as server-sent events.
+    
+    Each connection sleeps between cheap version checks, so under the cooperative
+    server (serve.py) thousands of idle streams cost one greenlet each.
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    operation = find_operation(operation_id)
+    if operation is None:
+        return jsonify({'error': 'Operation not found'}), 404
+    if operation['user_id'] != session['user_id']:
+        return jsonify({'error': 'Access denied'}), 403
+    
+    def stream():
+        last_version = None
+        last_sent = time.time()
+        while True:
+            version = operation_version(operation_id)
+            if version is None:
+                yield "event: gone\ndata: {}\n\n"
+                return
+            if version != last_version:
+                current = find_operation(operation_id)
+                if current is None:
+                    yield "event: gone\ndata: {}\n\n"
+                    return
+                last_version = version
+                last_sent = time.time()
+                yield f"event: status\ndata: {json.dumps(build_status_payload(current), default=str)}\n\n"
+                if current['status'] not in ACTIVE_STATUSES:
+                    return
+            elif time.time() - last_sent >= SSE_KEEPALIVE_INTERVAL:
+                last_sent = time.time()
+                yield ": keepalive\n\n"
+            time.sleep(SSE_POLL_INTERVAL)
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Don't let a reverse proxy buffer the stream
+    })
+
+@app.route('/unfollow/slow-batch/<operation_id>/results')
+def slow_batch_results(operation_id):
+    """Page through an operation's per-target results (filter by outcome and error class)."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    outcome = request.args.get('outcome') or None
+    if outcome and outcome not in RESULT_OUTCOMES:
+        return jsonify({'error': f'Invalid outcome. Expected one of: {", ".join(RESULT_OUTCOMES)}'}), 400
+    error_type = request.args.get('error_type') or None
+    limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    cursor = request.args.get('cursor')
+    
+    try:
+        # Every source pages in place: SQL in the shared store and the archive, a walk under
+        # the stripe lock in process - never a copy of the whole operation
+        if shared_state is not None:
+            owner = shared_state.get_owner(operation_id)
+        else:
+            operation = batch_state.get_live(operation_id)
+            owner = operation['user_id'] if operation else None
+        archived = owner is None
+        if archived:
+            owner = operation_archive.get_owner(operation_id)
+        if owner is None:
+            return jsonify({'error': 'Operation not found'}), 404
+        if owner != session['user_id']:
+            return jsonify({'error': 'Access denied'}), 403
+        
+        page = None
+        if not archived:
+            if shared_state is not None:
+                page = shared_state.page_results(operation_id, cursor, limit, outcome, error_type)
+            else:
+                page = batch_state.page_results(operation_id, cursor, limit, outcome, error_type)
+        if page is None:
+            # Archived (possibly since the owner check - it is archived before the hot copy goes)
+            page = operation_archive.page_results(operation_id, cursor, limit, outcome, error_type)
+        
+        page.update({'operation_id': operation_id, 'limit': limit, 'outcome': outcome, 'error_type': error_type})
+        return jsonify(page)
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    except Exception as e:
+        logging.error(f"Slow batch results error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/unfollow/slow-batch/<operation_id>/cancel', methods=['POST'])
 def cancel_slow_batch(operation_id):
     """Cancel a slow batch operation."""
@@ -803,32 +2365,54 @@ def cancel_slow_batch(operation_id):
         return jsonify({'error': 'Not authenticated'}), 401
     
     try:
-        if operation_id not in slow_batch_operations:
+        operation = find_operation(operation_id)
+        if operation is None:
             return jsonify({'error': 'Operation not found'}), 404
         
-        operation = slow_batch_operations[operation_id]
-        
         # Check if user owns this operation
         if operation['user_id'] != session['user_id']:
             return jsonify({'error': 'Access denied'}), 403
+        if operation.get('archived_at'):
+            return jsonify({'error': f"Operation already {operation['status']}"}), 409
         
         # Enhanced cancellation with cleanup
         previous_status = operation['status']
-        operation['status'] = 'cancelled'
-        operation['end_time'] = time.time()
-        operation['cancellation_reason'] = 'user_requested'
-        operation['cancelled_from_status'] = previous_status
-        
-        # Add cancellation context to notes
-        operation['notes'] = operation.get('notes', [])
         current_user = operation.get('current_username', 'unknown')
         current_index = operation.get('current_index', 0)
-        operation['notes'].append(f"User cancelled operation at user: {current_user} ({current_index + 1}/{operation['total_count']})")
+        cancel_fields = {
+            'end_time': time.time(),
+            'cancellation_reason': 'user_requested',
+            'cancelled_from_status': previous_status,
+            # Add cancellation context to notes
+            'notes': operation.get('notes', []) + [
+                f"User cancelled operation at user: {current_user} ({current_index + 1}/{operation['total_count']})"
+            ]
+        }
+        
+        # Compare-and-set: a batch that finished meanwhile is never rewritten as cancelled
+        if shared_state is not None:
+            # The executing process picks the cancellation up from the store within a second
+            operation = shared_state.set_status(operation_id, 'cancelled', from_statuses=ACTIVE_STATUSES, **cancel_fields)
+            if operation is not None:
+                shared_state.remove_queued(operation_id=operation_id)
+        else:
+            operation = batch_state.transition(operation_id, 'cancelled', from_statuses=ACTIVE_STATUSES, **cancel_fields)
+            if operation is not None:
+                operation_index.update(operation)
+        if operation is None:
+            current = find_operation(operation_id)
+            if current is None:
+                return jsonify({'error': 'Operation not found'}), 404
+            return jsonify({'error': f"Operation already {current['status']}"}), 409
         
         # Log detailed cancellation info
-        elapsed_time = operation['end_time'] - operation.get('start_time', operation['end_time'])
+        elapsed_time = operation['end_time'] - (operation.get('start_time') or operation['end_time'])
         logging.info(f"Cancelled slow batch operation {operation_id} after {elapsed_time:.1f}s (was: {previous_status})")
         
+        # No worker will finish a batch cancelled in the queue - archive it now
+        if previous_status == 'queued':
+            archive_operation(operation_id)
+        
         # Start next queued batch after cancellation
         start_next_queued_batch()
         
@@ -853,7 +2437,413 @@ def cancel_slow_batch(operation_id):
         logging.error(f"Cancel slow batch error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-# Removed SSE endpoint - using direct completion flags instead
+
+def parse_time_arg(value, default):
+    """Parse an epoch-seconds or ISO 8601 query parameter."""
+    if value is None or value == '':
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+@app.route('/api/history')
+def get_attempt_history():
+    """Query attempt throughput and outcomes over a time range (served from rollups)."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    try:
+        end = parse_time_arg(request.args.get('end'), time.time())
+        start = parse_time_arg(request.args.get('start'), end - 7 * 86400)
+        resolution = request.args.get('resolution') or None
+        if start >= end:
+            return jsonify({'error': 'start must be before end'}), 400
+        if resolution is not None and resolution not in RESOLUTIONS:
+            return jsonify({'error': f"resolution must be one of {', '.join(RESOLUTIONS)}"}), 400
+    except ValueError:
+        return jsonify({'error': 'start and end must be epoch seconds or ISO 8601 timestamps'}), 400
+    
+    try:
+        result = attempt_history.query(start, end, resolution, account=session['user_id'],
+                                       outcome=request.args.get('outcome') or None)
+        for point in result['series']:
+            point['time'] = datetime.fromtimestamp(point['bucket']).strftime('%Y-%m-%d %H:%M:%S')
+        result['start'] = start
+        result['end'] = end
+        return jsonify(result)
+        
+    except Exception as e:
+        logging.error(f"Attempt history query error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+def admin_source():
+    """Get the store serving admin views (shared store or the in-process index)."""
+    return shared_state if shared_state is not None else operation_index
+
+def check_admin_token():
+    """
+    Check the operator token on an admin request.
+    
+    Returns:
+        tuple: Error response and status code, or None when authorized
+    """
+    if not ADMIN_API_TOKEN:
+        return jsonify({'error': 'Admin API disabled (set ADMIN_API_TOKEN)'}), 404
+    token = request.headers.get('X-Admin-Token')
+    auth_header = request.headers.get('Authorization', '')
+    if token is None and auth_header.startswith('Bearer '):
+        token = auth_header[len('Bearer '):]
+    if token is None or not secrets.compare_digest(token, ADMIN_API_TOKEN):
+        return jsonify({'error': 'Admin token required'}), 401
+    return None
+
+def admin_queue_entries():
+    """List queued batches across all accounts, in order."""
+    if shared_state is not None:
+        return shared_state.queue_entries()
+    return batch_state.queue_entries()
+
+def admin_executor_lease(now):
+    """Current holder of the batch executor lease (shared mode without lease mode), or None."""
+    if shared_state is None or LEASE_MODE_ENABLED:
+        return None
+    lease = shared_state.get_lease('batch_executor')
+    if lease is None:
+        return None
+    return dict(lease, expired=lease['expires_at'] < now, this_process=lease['owner'] == executor_identity())
+
+@app.route('/admin/api/overview')
+def admin_overview():
+    """Operator overview: batch counts by status and account, queue depth, stuck batches, throughput."""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    
+    try:
+        source = admin_source()
+        now = time.time()
+        stuck = source.stale_operations(('running', 'waiting_for_rate_limit_reset'), now - ADMIN_STUCK_AFTER)
+        # A batch waiting out a known reset is not stuck until the reset has passed
+        stuck = [op for op in stuck if not op.get('next_unfollow_time') or op['next_unfollow_time'] < now - ADMIN_STUCK_AFTER]
+        
+        return jsonify({
+            'status_counts': source.status_counts(),
+            'accounts': source.account_status_counts(),
+            'queue_length': get_queue_length(),
+            'stuck_operations': stuck,
+            'throughput': {
+                'last_hour': attempt_history.query(now - 3600, now, 'minute')['totals'],
+                'last_24_hours': attempt_history.query(now - 86400, now, 'hour')['totals']
+            },
+            'mode': 'lease' if LEASE_MODE_ENABLED else ('shared' if shared_state is not None else 'single'),
+            'executor': admin_executor_lease(now),
+            'timestamp': int(now)
+        })
+        
+    except Exception as e:
+        logging.error(f"Admin overview error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/api/operations')
+def admin_list_operations():
+    """Page through batch summaries across all accounts, filtered by status and/or account."""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    
+    try:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        operations, total = admin_source().query_operation_summaries(
+            status=request.args.get('status') or None,
+            user_id=request.args.get('user_id') or None,
+            limit=limit,
+            offset=offset
+        )
+        return jsonify({'operations': operations, 'total': total, 'limit': limit, 'offset': offset})
+        
+    except Exception as e:
+        logging.error(f"Admin operations query error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/api/queue')
+def admin_queue():
+    """List queued batches across all accounts (target lists omitted)."""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    
+    try:
+        entries = [
+            {'position': position, 'operation_id': entry['operation_id'], 'user_id': entry['user_id'],
+             'target_count': len(entry.get('usernames', [])), 'interval_minutes': entry.get('interval_minutes')}
+            for position, entry in enumerate(admin_queue_entries(), 1)
+        ]
+        return jsonify({'queue': entries, 'length': len(entries)})
+        
+    except Exception as e:
+        logging.error(f"Admin queue error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/api/rate-limits')
+def admin_rate_limits():
+    """Live rate-limit windows for every account."""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    
+    try:
+        return jsonify({'accounts': rate_limit_store.all_rate_limits(), 'timestamp': int(time.time())})
+        
+    except Exception as e:
+        logging.error(f"Admin rate limits error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/api/throughput')
+def admin_throughput():
+    """Per-account attempt totals over the last N hours (served from hourly rollups)."""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    
+    try:
+        hours = min(max(request.args.get('hours', 24, type=float), 1), 24 * 90)
+        now = time.time()
+        accounts = attempt_history.account_totals(now - hours * 3600, now)
+        return jsonify({
+            'hours': hours,
+            'accounts': accounts,
+            'totals': {
+                'attempts': sum(totals['attempts'] for totals in accounts.values()),
+                'successes': sum(totals['successes'] for totals in accounts.values())
+            }
+        })
+        
+    except Exception as e:
+        logging.error(f"Admin throughput error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/api/profile', methods=['POST'])
+def admin_start_profile():
+    """Start sampling every thread (request, batch and scan workers) for N seconds."""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        seconds = data.get('seconds', 30)
+        interval_ms = data.get('interval_ms', PROFILE_DEFAULT_INTERVAL_MS)
+        if not isinstance(seconds, (int, float)) or not 0 < seconds <= PROFILE_MAX_SECONDS:
+            return jsonify({'error': f'seconds must be between 0 and {PROFILE_MAX_SECONDS}'}), 400
+        if not isinstance(interval_ms, (int, float)) or not 1 <= interval_ms <= 1000:
+            return jsonify({'error': 'interval_ms must be between 1 and 1000'}), 400
+        
+        if not profiler.start(seconds, interval_ms / 1000):
+            return jsonify({'error': 'A profile is already running', 'profile': profiler.status()}), 409
+        logging.info(f"Profiling started for {seconds}s at {interval_ms}ms intervals")
+        return jsonify({'success': True, 'profile': profiler.status()}), 202
+        
+    except Exception as e:
+        logging.error(f"Admin profile start error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/api/profile/stop', methods=['POST'])
+def admin_stop_profile():
+    """Stop the running profile early (its samples are kept)."""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    
+    profiler.stop()
+    return jsonify({'success': True, 'profile': profiler.status()})
+
+@app.route('/admin/api/profile')
+def admin_get_profile():
+    """Get the current or last profile as JSON (?format=collapsed or ?format=pstats for tools)."""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    
+    try:
+        if profiler.started_at is None:
+            return jsonify({'error': 'No profile has been collected'}), 404
+        
+        output_format = request.args.get('format', 'json')
+        if output_format == 'collapsed':
+            return Response(profiler.collapsed(), mimetype='text/plain')
+        if output_format == 'pstats':
+            return Response(profiler.pstats_dump(), mimetype='application/octet-stream', headers={
+                'Content-Disposition': f'attachment; filename=profile-{int(profiler.started_at)}.prof'
+            })
+        if output_format != 'json':
+            return jsonify({'error': 'format must be json, collapsed or pstats'}), 400
+        
+        top = min(max(request.args.get('top', 30, type=int), 1), 500)
+        return jsonify(dict(profiler.summary(top), route_timing=route_timer.snapshot()))
+        
+    except Exception as e:
+        logging.error(f"Admin profile error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/api/profile/routes')
+def admin_route_timing():
+    """Per-route request timing for the polling endpoints."""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    
+    return jsonify(route_timer.snapshot())
+
+def memory_structures():
+    """
+    Deep sizes of this process's in-memory structures.
+    
+    Returns:
+        dict: Per-structure byte counts (batch operations broken down by field and status)
+    """
+    queue = batch_state.queue_entries()
+    with scan_threads_lock:
+        scans = dict(scan_threads)
+    with lanes_lock:
+        lanes = dict(held_lanes)
+    ledger_bloom = getattr(target_ledger, '_bloom', None)
+    clients = client_pool.clients()
+    return {
+        # In shared mode these are only the working copies of batches driven by this process
+        'batch_operations': operation_memory(batch_state.live_operations()),
+        'batch_queue': {'entries': len(queue), 'bytes': deep_sizeof(queue)},
+        'operation_index': {'bytes': deep_sizeof(operation_index)},
+        # Warm summaries and decoded cache in memory; archived rows and bytes are on disk
+        'operation_archive': dict(operation_archive.stats(), bytes=deep_sizeof(operation_archive)),
+        'api_clients': dict(client_pool.stats(), bytes=deep_sizeof(client_pool),
+                            rate_limits_bytes=sum(deep_sizeof(client.rate_limits) for client in clients.values())),
+        'rate_limit_cache': {'bytes': deep_sizeof(rate_limit_cache)},
+        'eta_model_cache': {'bytes': deep_sizeof(eta_model_cache)},
+        'ledger_bloom_filter': {'bytes': deep_sizeof(ledger_bloom)},
+        'scan_threads': {'entries': len(scans), 'bytes': deep_sizeof(scans)},
+        'held_lanes': {'entries': len(lanes), 'bytes': deep_sizeof(lanes)},
+        'trace_buffer': {'bytes': deep_sizeof(tracer)},
+        'profiler_samples': {'bytes': deep_sizeof(profiler)}
+    }
+
+@app.route('/admin/api/memory')
+def admin_memory():
+    """Process memory, deep sizes of in-process structures and tracemalloc status."""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    
+    try:
+        started = time.perf_counter()
+        structures = memory_structures()
+        return jsonify({
+            'process': process_memory(),
+            'structures': structures,
+            'tracemalloc': tracemalloc_snapshots.status(),
+            'measure_seconds': round(time.perf_counter() - started, 3),
+            'timestamp': int(time.time())
+        })
+        
+    except Exception as e:
+        logging.error(f"Admin memory error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/api/memory/tracemalloc', methods=['POST'])
+def admin_tracemalloc():
+    """Start or stop allocation tracing (stopping drops all snapshots)."""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    
+    data = request.get_json(silent=True) or {}
+    enabled = data.get('enabled')
+    if not isinstance(enabled, bool):
+        return jsonify({'error': 'enabled must be true or false'}), 400
+    frames = data.get('frames', TRACEMALLOC_DEFAULT_FRAMES)
+    if not isinstance(frames, int) or not 1 <= frames <= 100:
+        return jsonify({'error': 'frames must be between 1 and 100'}), 400
+    
+    if enabled:
+        tracemalloc_snapshots.start(frames)
+        logging.info(f"tracemalloc started ({frames} frames)")
+    else:
+        tracemalloc_snapshots.stop()
+        logging.info("tracemalloc stopped")
+    return jsonify({'success': True, 'tracemalloc': tracemalloc_snapshots.status()})
+
+@app.route('/admin/api/memory/snapshots', methods=['POST'])
+def admin_take_memory_snapshot():
+    """Take a tracemalloc snapshot to diff against later."""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    
+    try:
+        label = (request.get_json(silent=True) or {}).get('label')
+        return jsonify({'success': True, 'snapshot': tracemalloc_snapshots.take(label)}), 201
+    except RuntimeError as e:
+        return jsonify({'error': f'{str(e)} - enable it first via /admin/api/memory/tracemalloc'}), 409
+    except Exception as e:
+        logging.error(f"Admin memory snapshot error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/api/memory/snapshots/diff')
+def admin_memory_snapshot_diff():
+    """Compare two tracemalloc snapshots (?from=&to=, default the last two)."""
+    denied = check_admin_token()
+    if denied:
+        return denied
+    
+    try:
+        snapshot_ids = [snapshot['id'] for snapshot in tracemalloc_snapshots.status()['snapshots']]
+        from_id = request.args.get('from', type=int)
+        to_id = request.args.get('to', type=int)
+        if from_id is None or to_id is None:
+            if len(snapshot_ids) < 2:
+                return jsonify({'error': 'At least two snapshots are needed'}), 400
+            from_id, to_id = snapshot_ids[-2], snapshot_ids[-1]
+        key_type = request.args.get('key', 'lineno')
+        if key_type not in DIFF_KEY_TYPES:
+            return jsonify({'error': f'key must be one of: {", ".join(DIFF_KEY_TYPES)}'}), 400
+        limit = min(max(request.args.get('limit', 25, type=int), 1), 500)
+        return jsonify(tracemalloc_snapshots.diff(from_id, to_id, key_type, limit))
+        
+    except KeyError as e:
+        return jsonify({'error': f'Snapshot not found: {str(e)}'}), 404
+    except Exception as e:
+        logging.error(f"Admin memory diff error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/ledger')
+def get_target_ledger():
+    """Query settled target outcomes for the current user."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    try:
+        outcome = request.args.get('outcome')
+        if outcome and outcome not in SETTLED_OUTCOMES:
+            return jsonify({'error': f'Invalid outcome. Expected one of: {", ".join(SETTLED_OUTCOMES)}'}), 400
+        
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        
+        result = target_ledger.query(
+            session['user_id'],
+            outcome=outcome,
+            target=request.args.get('target'),
+            since=request.args.get('since', type=float),
+            limit=limit,
+            offset=offset
+        )
+        result.update({'limit': limit, 'offset': offset})
+        return jsonify(result)
+        
+    except Exception as e:
+        logging.error(f"Ledger query error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/unfollow/slow-batch/list')
 def list_slow_batch_operations():
@@ -862,17 +2852,28 @@ def list_slow_batch_operations():
         return jsonify({'error': 'Not authenticated'}), 401
     
     try:
+        expire_archive()
+        
+        # Live operations, then summaries of those finished within the warm window
+        operations = all_operations(session['user_id'])
+        live_ids = {operation['id'] for operation in operations}
+        archived_operations = [summary for summary in operation_archive.recent_summaries(session['user_id'])
+                               if summary['id'] not in live_ids]
+        operations += archived_operations
         user_operations = []
-        for op_id, operation in slow_batch_operations.items():
+        for operation in operations:
             if operation['user_id'] == session['user_id']:
+                # Estimated when the batch was submitted and after each attempt - not per poll
+                eta = rebase_eta(operation['eta']) if operation.get('eta') and operation['status'] in ACTIVE_STATUSES else None
                 user_operations.append({
-                    'operation_id': op_id,
+                    'operation_id': operation['id'],
                     'status': operation['status'],
                     'total_count': operation['total_count'],
                     'completed_count': operation['completed_count'],
                     'success_count': operation['success_count'],
                     'start_time': datetime.fromtimestamp(operation['start_time']).strftime('%Y-%m-%d %H:%M:%S') if operation['start_time'] else None,
-                    'estimated_completion': datetime.fromtimestamp(operation['estimated_completion']).strftime('%Y-%m-%d %H:%M:%S') if operation.get('estimated_completion') else None,
+                    'estimated_completion': eta['estimated_completion'] if eta else (datetime.fromtimestamp(operation['estimated_completion']).strftime('%Y-%m-%d %H:%M:%S') if operation.get('estimated_completion') else None),
+                    'eta': eta,
                     'queue_position': operation.get('queue_position', 0)
                 })
         
@@ -880,25 +2881,31 @@ def list_slow_batch_operations():
         successful_unfollows = []
         completion_notifications = []
         
-        for operation in slow_batch_operations.values():
+        # Archived operations' unfollows come with their warm summaries
+        archived_ids = {operation['id'] for operation in archived_operations}
+        
+        for operation in operations:
             if operation['user_id'] == session['user_id']:
                 successful_unfollows.extend(operation.get('successful_usernames', []))
                 
-                # Check for pending completion notifications
-                if operation.get('completion_pending'):
+                # Check for pending completion notifications (claimed atomically so a notification
+                # set by the worker meanwhile isn't lost, and only one poller delivers each one)
+                if operation['id'] in archived_ids:
+                    claim_completion = operation_archive.claim_completion
+                else:
+                    claim_completion = batch_state.claim_completion if shared_state is None else shared_state.claim_completion
+                if operation.get('completion_pending') and claim_completion(operation['id']):
                     completion_notifications.append({
                         'operation_id': operation['id'],
                         'completed_count': operation['completed_count'],
                         'total_count': operation['total_count'],
                         'timestamp': operation['last_completion_time']
                     })
-                    # Clear the flag after sending
-                    operation['completion_pending'] = False
         
         return jsonify({
             'operations': user_operations,
             'active_count': len([op for op in user_operations if op['status'] in ['starting', 'running', 'queued']]),
-            'queue_length': len(batch_queue),
+            'queue_length': get_queue_length(),
             'successful_unfollows': successful_unfollows,
             'completion_notifications': completion_notifications
         })
@@ -907,6 +2914,44 @@ def list_slow_batch_operations():
         logging.error(f"List slow batch operations error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/unfollow/slow-batch/history')
+def slow_batch_history():
+    """Page through the current user's finished (archived) batch operations, newest first."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 200)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    
+    try:
+        summaries, total = operation_archive.history(session['user_id'], limit, offset)
+        operations = [{
+            'operation_id': summary['id'],
+            'status': summary['status'],
+            'interval_minutes': summary.get('interval_minutes'),
+            'total_count': summary['total_count'],
+            'completed_count': summary['completed_count'],
+            'success_count': summary['success_count'],
+            'failed_count': summary.get('failed_count'),
+            'skipped_count': summary.get('skipped_count'),
+            'start_time': datetime.fromtimestamp(summary['start_time']).strftime('%Y-%m-%d %H:%M:%S') if summary.get('start_time') else None,
+            'end_time': datetime.fromtimestamp(summary['end_time']).strftime('%Y-%m-%d %H:%M:%S') if summary.get('end_time') else None,
+            'cancellation_reason': summary.get('cancellation_reason')
+        } for summary in summaries]
+        return jsonify({
+            'operations': operations,
+            'total': total,
+            'limit': limit,
+            'offset': offset,
+            'next_offset': offset + len(operations) if offset + len(operations) < total else None
+        })
+    except Exception as e:
+        logging.error(f"Slow batch history error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/debug/test-following-permissions')
 def test_following_permissions():
     """Test following status check with main app's authentication."""
@@ -914,6 +2959,7 @@ def test_following_permissions():
         return jsonify({'error': 'Not authenticated'}), 401
     
     user_id = session['user_id']
+    client = client_pool.get(user_id)
     scott_id = "931286316"  # ScottPresler's ID
     
     results = {
@@ -930,7 +2976,7 @@ def test_following_permissions():
         logging.info(f"🧪 Testing direct following check: {user_id} → {scott_id}")
         
         # Make direct API call to get detailed response
-        response = x_client._make_api_request('GET', f'/users/{user_id}/following/{scott_id}', api_endpoint_type='user_lookup')
+        response = client._make_api_request('GET', f'/users/{user_id}/following/{scott_id}', api_endpoint_type='user_lookup')
         
         test_result = {
             'test': 'Direct Following Relationship Check',
@@ -983,7 +3029,7 @@ def test_following_permissions():
     # Test 2: Get user info to verify authentication works
     try:
         logging.info(f"🧪 Testing user info endpoint")
-        response = x_client._make_api_request('GET', '/users/me', api_endpoint_type='user_lookup')
+        response = client._make_api_request('GET', '/users/me', api_endpoint_type='user_lookup')
         
         if response.status_code == 200:
             data = response.json()
@@ -1020,7 +3066,7 @@ def test_following_permissions():
     # Test 3: Try getting your own following list (might work with basic permissions)
     try:
         logging.info(f"🧪 Testing following list endpoint")
-        response = x_client._make_api_request('GET', f'/users/{user_id}/following?max_results=10', api_endpoint_type='user_lookup')
+        response = client._make_api_request('GET', f'/users/{user_id}/following?max_results=10', api_endpoint_type='user_lookup')
         
         test_result = {
             'test': 'Following List Check (Alternative)',
@@ -1063,7 +3109,7 @@ def test_following_permissions():
     # Test 4: Try getting target user profile (might show relationship info)
     try:
         logging.info(f"🧪 Testing target user profile")
-        response = x_client._make_api_request('GET', f'/users/{scott_id}?user.fields=public_metrics', api_endpoint_type='user_lookup')
+        response = client._make_api_request('GET', f'/users/{scott_id}?user.fields=public_metrics', api_endpoint_type='user_lookup')
         
         test_result = {
             'test': 'Target User Profile Check',
@@ -0,0 +1,361 @@
+"""
+Tiered storage for finished batch operations.
+As soon as a batch completes, is cancelled or errors, it leaves the hot state (the
+in-process registry or the shared store) for this SQLite archive: transient
+fields are dropped and the rest is stored as compressed JSON. Three tiers result:
+
+- warm: compact summaries of operations finished within the last `warm_window`
+  seconds stay in memory with their unfollowed usernames (what batch lists show,
+  plus completion notifications)
+- cold: full state on disk, decompressed only when a status for that operation
+  is requested (a few recently decoded operations are cached); per-target results
+  are stored one row each, so a results page is an indexed range read
+- expired: deleted after the retention period
+
+Memory therefore tracks one window of summaries rather than every finished batch.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from results import decode_cursor, result_outcome
+
+# Operation fields kept in the in-memory summary
+SUMMARY_FIELDS = (
+    'id', 'user_id', 'username', 'status', 'interval_minutes', 'total_count',
+    'completed_count', 'success_count', 'failed_count', 'skipped_count', 'start_time', 'end_time',
+    'estimated_completion', 'last_update', 'last_completion_time', 'cancellation_reason'
+)
+
+# Live-progress fields that mean nothing once an operation has finished (successful_usernames
+# is stored in its own column; completion_pending is a column so it can be claimed in place)
+TRANSIENT_FIELDS = (
+    'inflight_index', 'queue_position', 'current_rate_limits', 'waiting_for_reset', 'reset_wait_seconds',
+    'rate_limit_wait_until', 'completion_pending', 'successful_usernames', 'eta'
+)
+
+COMPRESSION_LEVEL = 6
+DECODED_CACHE_SIZE = 16     # Recently decompressed operations kept for repeated status polls
+SCHEMA_VERSION = 1          # 1: results moved out of the compressed blob into archived_results rows
+
+
+def archive_summary(operation):
+    """Build the compact in-memory summary of a finished operation."""
+    summary = {field: operation.get(field) for field in SUMMARY_FIELDS}
+    summary['user_id'] = str(summary['user_id'])
+    return summary
+
+
+class OperationArchive:
+    """SQLite archive of finished operations with an in-memory summary tier."""
+
+    def __init__(self, db_path, warm_window=24 * 60 * 60):
+        """
+        Open (or create) the archive.
+
+        Args:
+            db_path (str): SQLite database file (may be shared by processes on one host)
+            warm_window (float): Seconds after finishing that summaries stay in memory
+        """
+        self.db_path = db_path
+        self.warm_window = warm_window
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._init_schema()
+
+        self._warm = {}             # operation_id -> summary (finished within warm_window)
+        self._warm_by_user = {}     # user_id -> {operation_id: summary}
+        self._high_water = 0        # Highest rowid merged into the warm tier
+        self._decoded = OrderedDict()
+        self._refresh()
+
+    def _init_schema(self):
+        """Create the archive table and indexes."""
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS archived_operations (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    end_time REAL NOT NULL,
+                    archived_at REAL NOT NULL,
+                    completion_pending INTEGER NOT NULL DEFAULT 0,
+                    summary TEXT NOT NULL,
+                    successful TEXT NOT NULL,
+                    data BLOB NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_archive_user_end ON archived_operations (user_id, end_time)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_archive_end ON archived_operations (end_time)")
+            # One row per target result, so a page is read without decoding the operation
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS archived_results (
+                    operation_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    outcome TEXT NOT NULL,
+                    error_type TEXT,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (operation_id, position)
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_archived_results_outcome ON archived_results (operation_id, outcome, position)"
+            )
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                self._split_results()
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _split_results(self):
+        """Move results out of operations archived before they had their own rows (once, on upgrade)."""
+        rows = self._conn.execute("SELECT id, data FROM archived_operations").fetchall()
+        for row in rows:
+            operation = json.loads(zlib.decompress(row['data']))
+            if 'results' not in operation:
+                continue
+            self._insert_results(row['id'], operation.pop('results'))
+            data = zlib.compress(json.dumps(operation, separators=(',', ':')).encode(), COMPRESSION_LEVEL)
+            self._conn.execute("UPDATE archived_operations SET data = ? WHERE id = ?", (data, row['id']))
+
+    def _insert_results(self, operation_id, results):
+        self._conn.execute("DELETE FROM archived_results WHERE operation_id = ?", (operation_id,))
+        self._conn.executemany("""
+            INSERT INTO archived_results (operation_id, position, outcome, error_type, data) VALUES (?, ?, ?, ?, ?)
+        """, ((operation_id, position, result_outcome(result), result.get('error_type'),
+               json.dumps(result, separators=(',', ':'))) for position, result in enumerate(results)))
+
+    # Warm tier
+
+    def _add_warm(self, summary):
+        self._warm[summary['id']] = summary
+        self._warm_by_user.setdefault(summary['user_id'], {})[summary['id']] = summary
+
+    def _drop_warm(self, operation_id):
+        summary = self._warm.pop(operation_id, None)
+        if summary is not None:
+            user_summaries = self._warm_by_user.get(summary['user_id'], {})
+            user_summaries.pop(operation_id, None)
+            if not user_summaries:
+                self._warm_by_user.pop(summary['user_id'], None)
+        self._decoded.pop(operation_id, None)
+
+    def _refresh(self):
+        """Merge operations archived since the last refresh (by any process) and age out old summaries."""
+        cutoff = time.time() - self.warm_window
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT rowid, summary, successful, completion_pending, end_time FROM archived_operations
+                WHERE rowid > ? ORDER BY rowid
+            """, (self._high_water,)).fetchall()
+            for row in rows:
+                self._high_water = row['rowid']
+                if row['end_time'] >= cutoff:
+                    summary = json.loads(row['summary'])
+                    summary['successful_usernames'] = json.loads(row['successful'])
+                    summary['completion_pending'] = bool(row['completion_pending'])
+                    self._add_warm(summary)
+            for operation_id in [op_id for op_id, summary in self._warm.items() if (summary['end_time'] or 0) < cutoff]:
+                self._drop_warm(operation_id)
+
+    def recent_summaries(self, user_id):
+        """
+        Get summaries of an account's operations finished within the warm window.
+
+        Returns:
+            list: Summary dicts (copies, with 'successful_usernames'), most recently finished first
+        """
+        self._refresh()
+        with self._lock:
+            summaries = [dict(summary) for summary in self._warm_by_user.get(str(user_id), {}).values()]
+        return sorted(summaries, key=lambda summary: summary['end_time'] or 0, reverse=True)
+
+    # Archiving
+
+    def archive(self, operation):
+        """
+        Move a finished operation into the archive (replacing any earlier copy).
+
+        Args:
+            operation (dict): Full operation state (its completion_pending flag is carried over)
+
+        Returns:
+            dict: Summary kept in the warm tier
+        """
+        now = time.time()
+        end_time = operation.get('end_time') or operation.get('last_update') or now
+        summary = archive_summary(dict(operation, end_time=end_time))
+        compact = {key: value for key, value in operation.items() if key not in TRANSIENT_FIELDS and key != 'results'}
+        compact['end_time'] = end_time
+        compact['next_unfollow_time'] = None
+        successful = operation.get('successful_usernames') or [
+            result['username'] for result in operation.get('results', []) if result.get('success')
+        ]
+        data = zlib.compress(json.dumps(compact, separators=(',', ':')).encode(), COMPRESSION_LEVEL)
+        completion_pending = bool(operation.get('completion_pending'))
+
+        with self._lock:
+            with self._conn:
+                self._conn.execute("""
+                    INSERT OR REPLACE INTO archived_operations
+                        (id, user_id, status, end_time, archived_at, completion_pending, summary, successful, data)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (summary['id'], summary['user_id'], summary['status'], end_time, now, int(completion_pending),
+                      json.dumps(summary, separators=(',', ':')), json.dumps(successful, separators=(',', ':')), data))
+                self._insert_results(summary['id'], operation.get('results', []))
+            self._decoded.pop(summary['id'], None)
+            if end_time >= now - self.warm_window:
+                self._add_warm(dict(summary, successful_usernames=successful, completion_pending=completion_pending))
+        return summary
+
+    # Cold tier
+
+    def get(self, operation_id):
+        """
+        Load an archived operation (decompressed on demand), without its results (see page_results).
+
+        Returns:
+            dict: Operation state with 'archived_at' set, or None if not archived
+        """
+        with self._lock:
+            operation = self._decoded.get(operation_id)
+            if operation is not None:
+                self._decoded.move_to_end(operation_id)
+                return dict(operation)
+            row = self._conn.execute("""
+                SELECT data, successful, archived_at, completion_pending FROM archived_operations WHERE id = ?
+            """, (operation_id,)).fetchone()
+            if row is None:
+                return None
+            operation = json.loads(zlib.decompress(row['data']))
+            operation['successful_usernames'] = json.loads(row['successful'])
+            operation['archived_at'] = row['archived_at']
+            operation['completion_pending'] = bool(row['completion_pending'])
+            self._decoded[operation_id] = operation
+            while len(self._decoded) > DECODED_CACHE_SIZE:
+                self._decoded.popitem(last=False)
+            return dict(operation)
+
+    def page_results(self, operation_id, cursor=None, limit=100, outcome=None, error_type=None):
+        """
+        Read one page of an archived operation's results from their rows.
+
+        Args:
+            operation_id (str): Operation identifier
+            cursor (str): Cursor from the previous page (None for the first page)
+            limit (int): Maximum results to return
+            outcome (str): Optional outcome filter ('success', 'failed', 'skipped', 'interrupted')
+            error_type (str): Optional classified error filter
+
+        Returns:
+            dict: {'results': [records with 'index' and 'outcome'], 'next_cursor': cursor or None}
+        """
+        clauses = ["operation_id = ?", "position >= ?"]
+        params = [operation_id, decode_cursor(cursor)]
+        if outcome:
+            clauses.append("outcome = ?")
+            params.append(outcome)
+        if error_type:
+            clauses.append("error_type = ?")
+            params.append(error_type)
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT position, outcome, data FROM archived_results
+                WHERE {' AND '.join(clauses)} ORDER BY position LIMIT ?
+            """, params + [int(limit) + 1]).fetchall()
+
+        page = [dict(json.loads(row['data']), index=row['position'], outcome=row['outcome']) for row in rows[:limit]]
+        next_cursor = str(rows[limit]['position']) if len(rows) > limit else None
+        return {'results': page, 'next_cursor': next_cursor}
+
+    def get_owner(self, operation_id):
+        """Get an archived operation's account without loading it, or None."""
+        summary = self._warm.get(operation_id)
+        if summary is not None:
+            return summary['user_id']
+        with self._lock:
+            row = self._conn.execute("SELECT user_id FROM archived_operations WHERE id = ?", (operation_id,)).fetchone()
+        return row['user_id'] if row else None
+
+    def get_archived_at(self, operation_id):
+        """Get when an operation was archived (change detection), or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT archived_at FROM archived_operations WHERE id = ?", (operation_id,)).fetchone()
+        return row['archived_at'] if row else None
+
+    def history(self, user_id, limit=50, offset=0):
+        """
+        Page through an account's archived operation summaries, newest first.
+
+        Returns:
+            tuple: (list of summaries, total count)
+        """
+        with self._lock:
+            total = self._conn.execute(
+                "SELECT COUNT(*) FROM archived_operations WHERE user_id = ?", (str(user_id),)
+            ).fetchone()[0]
+            rows = self._conn.execute("""
+                SELECT summary, archived_at FROM archived_operations WHERE user_id = ?
+                ORDER BY end_time DESC LIMIT ? OFFSET ?
+            """, (str(user_id), limit, offset)).fetchall()
+        return [dict(json.loads(row['summary']), archived_at=row['archived_at']) for row in rows], total
+
+    def claim_completion(self, operation_id):
+        """
+        Atomically consume an archived operation's completion notification.
+
+        Returns:
+            bool: True if a notification was pending (and is now cleared)
+        """
+        with self._lock:
+            with self._conn:
+                claimed = self._conn.execute("""
+                    UPDATE archived_operations SET completion_pending = 0 WHERE id = ? AND completion_pending = 1
+                """, (operation_id,)).rowcount == 1
+            summary = self._warm.get(operation_id)
+            if summary is not None:
+                summary['completion_pending'] = False
+        return claimed
+
+    # Expiry
+
+    def _delete_where(self, condition, params):
+        with self._lock:
+            with self._conn:
+                ids = [row['id'] for row in self._conn.execute(f"SELECT id FROM archived_operations WHERE {condition}", params)]
+                self._conn.execute(f"DELETE FROM archived_operations WHERE {condition}", params)
+                self._conn.executemany("DELETE FROM archived_results WHERE operation_id = ?", ((op_id,) for op_id in ids))
+            for operation_id in ids:
+                self._drop_warm(operation_id)
+        return ids
+
+    def expire(self, before):
+        """
+        Delete operations that finished before a time.
+
+        Returns:
+            list: Expired operation IDs
+        """
+        return self._delete_where("end_time < ?", (before,))
+
+    def delete_user(self, user_id):
+        """
+        Delete all of an account's archived operations.
+
+        Returns:
+            list: Deleted operation IDs
+        """
+        return self._delete_where("user_id = ?", (str(user_id),))
+
+    def stats(self):
+        """Get tier sizes: warm summaries in memory, archived rows and compressed bytes on disk."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) AS count, COALESCE(SUM(LENGTH(data)), 0) AS bytes FROM archived_operations"
+            ).fetchone()
+            result_rows = self._conn.execute("SELECT COUNT(*) FROM archived_results").fetchone()[0]
+            return {'warm_summaries': len(self._warm), 'decoded_cached': len(self._decoded),
+                    'archived': row['count'], 'archived_bytes': row['bytes'], 'archived_results': result_rows}
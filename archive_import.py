@@ -0,0 +1,138 @@
+"""
+Import of the X data-archive following list.
+The archive's data/following.js is a JavaScript assignment wrapping a JSON array
+(`window.YTD.following.part0 = [{"following": {"accountId": "...", ...}}, ...]`).
+It is parsed incrementally, one array element at a time from fixed-size chunks,
+so large follow lists are never held in memory, and yields the numeric account
+IDs, which batches use directly without any username lookups.
+"""
+
+import codecs
+import json
+import re
+import zipfile
+
+from validation import MAX_USER_ID
+
+READ_CHUNK = 64 * 1024     # Bytes read per chunk
+
+# Following data inside a full archive zip (large lists may be split into parts)
+FOLLOWING_MEMBER_PATTERN = re.compile(r'(^|/)following(-part\d+)?\.js$')
+
+SEPARATOR_PATTERN = re.compile(r'[\s,]*')   # Whitespace and commas between array elements
+
+
+def iter_array_elements(stream):
+    """
+    Stream the elements of a JSON array that may be preceded by a JavaScript prefix.
+
+    Args:
+        stream: Binary or text file object (only .read(size) is used)
+
+    Yields:
+        Decoded array elements, in order
+
+    Raises:
+        ValueError: If no array is found or the array is malformed / truncated
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+
+    def read():
+        chunk = stream.read(READ_CHUNK)
+        if isinstance(chunk, bytes):
+            return text_decoder.decode(chunk, final=not chunk)
+        return chunk
+
+    # Skip the `window.YTD.following.part0 =` assignment up to the opening bracket
+    buffer = ''
+    while '[' not in buffer:
+        buffer = read()
+        if not buffer:
+            raise ValueError("No JSON array found in following file")
+    buffer = buffer[buffer.index('[') + 1:]
+    pos = 0
+    eof = False
+
+    while True:
+        pos = SEPARATOR_PATTERN.match(buffer, pos).end()
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+
+        element = None
+        if pos < len(buffer):
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                element = None
+            # A value that ends exactly at the buffer end may continue in the next chunk
+            if element is not None and end == len(buffer) and not eof:
+                element = None
+
+        if element is None:
+            if eof:
+                raise ValueError("Following file is truncated or not valid JSON")
+            chunk = read()
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        yield element
+        pos = end
+
+
+def iter_following_ids(stream, stats=None):
+    """
+    Stream account IDs from one following.js file.
+
+    Args:
+        stream: File object for following.js
+        stats (dict): Optional counters updated in place ('entries', 'invalid')
+
+    Yields:
+        str: Canonical numeric account IDs
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault('entries', 0)
+    stats.setdefault('invalid', 0)
+    for element in iter_array_elements(stream):
+        stats['entries'] += 1
+        entry = element.get('following') if isinstance(element, dict) else None
+        account_id = str(entry.get('accountId', '')) if isinstance(entry, dict) else ''
+        if not account_id.isdigit() or not 0 < int(account_id) <= MAX_USER_ID:
+            stats['invalid'] += 1
+            continue
+        yield str(int(account_id))
+
+
+def iter_archive_following_ids(file, stats=None):
+    """
+    Stream account IDs from an uploaded following.js or a full archive zip.
+
+    Args:
+        file: Seekable binary file object (following.js, or the archive .zip)
+        stats (dict): Optional counters updated in place ('entries', 'invalid', 'files')
+
+    Yields:
+        str: Canonical numeric account IDs
+
+    Raises:
+        ValueError: If a zip has no following data or a file is malformed
+    """
+    stats = stats if stats is not None else {}
+    if not zipfile.is_zipfile(file):
+        file.seek(0)
+        stats['files'] = 1
+        yield from iter_following_ids(file, stats)
+        return
+
+    file.seek(0)
+    with zipfile.ZipFile(file) as archive:
+        members = sorted(name for name in archive.namelist() if FOLLOWING_MEMBER_PATTERN.search(name))
+        if not members:
+            raise ValueError("No following.js found in archive")
+        stats['files'] = len(members)
+        for name in members:
+            with archive.open(name) as member:
+                yield from iter_following_ids(member, stats)
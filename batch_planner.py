@@ -0,0 +1,137 @@
+"""
+Throughput planning for slow batches.
+The worker waits after every target according to that target's outcome, and
+nothing after the last one, so upload order decides how much wall-clock time a
+batch costs. Before a batch starts, each target is classified from data already
+on hand (no API calls):
+
+- settled: in the target ledger - skipped with no call and no wait
+- not_following: absent from a fresh, complete following list - an unfollow call
+  would only come back "following: false" and still cost a full quota wait, so
+  the worker records it without calling
+- unknown: no cached data - may still turn out not to exist (a fast failure)
+- quota: in the following list - a real unfollow that consumes a quota slot
+
+The plan runs the zero-quota classes first as one burst, then the unknowns, then
+the known unfollows back to back, so the batch ends on a quota-consuming target
+(whose trailing wait is never paid) rather than on a cheap failure.
+"""
+
+SETTLED = 'settled'
+NOT_FOLLOWING = 'not_following'
+UNKNOWN = 'unknown'
+QUOTA = 'quota'
+
+# Execution order of the classes
+PLAN_ORDER = (SETTLED, NOT_FOLLOWING, UNKNOWN, QUOTA)
+
+# Classes resolved without an API call or a wait (these may be moved between an account's batches)
+NO_QUOTA_CLASSES = (SETTLED, NOT_FOLLOWING)
+
+
+def classify_target(entry_outcome, following):
+    """
+    Classify one target.
+
+    Args:
+        entry_outcome (str): Ledger outcome if the target is settled, else None
+        following (bool): Whether the following list contains it (None if unknown)
+
+    Returns:
+        str: One of PLAN_ORDER
+    """
+    if entry_outcome:
+        return SETTLED
+    if following is False:
+        return NOT_FOLLOWING
+    if following is True:
+        return QUOTA
+    return UNKNOWN
+
+
+def projected_seconds(classes, interval_seconds, call_seconds, planned):
+    """
+    Project the wall-clock time of a batch with the worker's wait model.
+
+    Args:
+        classes (list): Target classes in execution order
+        interval_seconds (float): Wait after a quota-consuming target
+        call_seconds (float): Mean duration of one lookup + unfollow
+        planned (bool): Whether not_following targets are resolved without a call
+
+    Returns:
+        float: Projected seconds from start to the last target
+    """
+    total = 0.0
+    for position, target_class in enumerate(classes):
+        if target_class == SETTLED or (planned and target_class == NOT_FOLLOWING):
+            continue
+        total += call_seconds
+        if position < len(classes) - 1:
+            total += interval_seconds
+    return total
+
+
+def pick_moves(queued, classes):
+    """
+    Choose zero-quota targets to pull forward from an account's queued batches.
+
+    A batch always keeps at least one target, so it still runs (and reports) normally.
+
+    Args:
+        queued (list): (operation_id, targets) of the account's queued batches, in queue order
+        classes (dict): Target -> class
+
+    Returns:
+        dict: operation_id -> targets to move into the starting batch
+    """
+    moves = {}
+    for operation_id, targets in queued:
+        movable = [target for target in targets if classes.get(target) in NO_QUOTA_CLASSES]
+        if movable and len(movable) < len(targets):
+            moves[operation_id] = movable
+    return moves
+
+
+def plan_batch(targets, classes, interval_seconds, call_seconds, pulled=()):
+    """
+    Reorder a batch's targets for throughput, merging in targets pulled from queued batches.
+
+    Args:
+        targets (list): The batch's own targets in submitted order
+        classes (dict): Target -> class (missing targets count as unknown)
+        interval_seconds (float): Wait after a quota-consuming target
+        call_seconds (float): Mean duration of one lookup + unfollow
+        pulled (list): (operation_id, targets before, targets taken) per queued batch merged in
+
+    Returns:
+        tuple: (targets in planned order, plan dict with per-class counts, the
+                not_following targets, merged batches and projected seconds with and
+                without planning, queued batches included)
+    """
+    def project(sequence, planned):
+        return projected_seconds([classes.get(target, UNKNOWN) for target in sequence],
+                                 interval_seconds, call_seconds, planned)
+
+    combined = list(targets)
+    original = project(targets, planned=False)
+    remaining = 0.0
+    for _, before, taken in pulled:
+        combined.extend(taken)
+        taken_set = set(taken)
+        original += project(before, planned=False)
+        remaining += project([target for target in before if target not in taken_set], planned=False)
+
+    ordered = sorted(combined, key=lambda target: PLAN_ORDER.index(classes.get(target, UNKNOWN)))
+    planned = project(ordered, planned=True) + remaining
+    ordered_classes = [classes.get(target, UNKNOWN) for target in ordered]
+    plan = {
+        'counts': {target_class: ordered_classes.count(target_class) for target_class in PLAN_ORDER},
+        'not_following': [target for target in ordered if classes.get(target) == NOT_FOLLOWING],
+        'merged_from': {operation_id: len(taken) for operation_id, _, taken in pulled if taken},
+        'reordered': ordered != combined,
+        'original_projected_seconds': round(original),
+        'projected_seconds': round(planned),
+        'saving_seconds': round(original - planned)
+    }
+    return ordered, plan
@@ -0,0 +1,271 @@
+"""
+Thread-safe owner of this process's batch operations and batch queue.
+Each live operation is guarded by one of a fixed set of lock stripes keyed on its
+account, so workers and request threads for different accounts never contend;
+the operation registry and the queue sit behind one short-held lock. Readers get
+copies taken under the stripe lock (counters always agree with results), and
+status changes, queue admission and completion notifications are atomic
+transitions instead of read-then-write sequences.
+
+Submissions for an account are serialized by a separate admission lock, so an
+admission check and the admit it allows happen as one step.
+
+Lock order is admission -> registry -> stripe; a stripe lock is never held while
+taking the registry lock.
+"""
+
+import threading
+import time
+from results import page_results, DEFAULT_PAGE_SIZE
+
+LOCK_STRIPES = 16
+
+# Statuses that occupy the (single, process-wide) batch executor
+BUSY_STATUSES = ('starting', 'running', 'waiting_for_rate_limit_reset')
+
+
+def copy_operation(operation):
+    """Copy an operation deep enough that later worker updates don't show through."""
+    copy = dict(operation)
+    for key, value in operation.items():
+        if isinstance(value, list):
+            copy[key] = list(value)
+        elif isinstance(value, dict):
+            copy[key] = dict(value)
+    return copy
+
+
+class BatchStateManager:
+    """Operation registry and queue with striped per-account locking."""
+
+    def __init__(self, stripes=LOCK_STRIPES):
+        """
+        Initialize empty state.
+
+        Args:
+            stripes (int): Number of per-account lock stripes
+        """
+        self._registry_lock = threading.Lock()
+        self._stripes = [threading.RLock() for _ in range(stripes)]
+        self._admission_locks = [threading.Lock() for _ in range(stripes)]
+        self._operations = {}
+        self._queue = []
+
+    def lock_for(self, user_id):
+        """Get the lock guarding an account's operations (hold it while mutating a live operation)."""
+        return self._stripes[hash(str(user_id)) % len(self._stripes)]
+
+    def admission_lock(self, user_id):
+        """Get the lock serializing an account's submissions (hold it from the admission check to admit())."""
+        return self._admission_locks[hash(str(user_id)) % len(self._admission_locks)]
+
+    # Registry
+
+    def add(self, operation):
+        """Register a live operation (e.g. a working copy adopted from the shared store)."""
+        with self._registry_lock:
+            self._operations[operation['id']] = operation
+
+    def contains(self, operation_id):
+        """Check whether an operation is registered in this process."""
+        with self._registry_lock:
+            return operation_id in self._operations
+
+    def get_live(self, operation_id):
+        """
+        Get the live operation dict, or None.
+
+        Only the worker driving the operation should use this - and only mutate it
+        while holding lock_for(operation['user_id']).
+        """
+        with self._registry_lock:
+            return self._operations.get(operation_id)
+
+    def live_operations(self):
+        """List the live operation dicts (read-only use, e.g. size accounting)."""
+        with self._registry_lock:
+            return list(self._operations.values())
+
+    def snapshot(self, operation_id):
+        """Get a consistent copy of an operation, or None."""
+        operation = self.get_live(operation_id)
+        if operation is None:
+            return None
+        with self.lock_for(operation['user_id']):
+            return copy_operation(operation)
+
+    def page_results(self, operation_id, cursor=None, limit=DEFAULT_PAGE_SIZE, outcome=None, error_type=None):
+        """
+        Read one page of a live operation's results under its stripe lock, without copying the operation.
+
+        Returns:
+            dict: Page as returned by results.page_results, or None if the operation isn't registered
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        operation = self.get_live(operation_id)
+        if operation is None:
+            return None
+        with self.lock_for(operation['user_id']):
+            return page_results(operation['results'], cursor, limit, outcome, error_type)
+
+    def snapshots(self, user_id=None):
+        """Get consistent copies of all operations (optionally for one account)."""
+        with self._registry_lock:
+            operations = [op for op in self._operations.values() if user_id is None or op['user_id'] == user_id]
+        copies = []
+        for operation in operations:
+            with self.lock_for(operation['user_id']):
+                copies.append(copy_operation(operation))
+        return copies
+
+    def remove(self, operation_ids, cancel=False):
+        """
+        Unregister operations (and drop their queue entries).
+
+        Args:
+            operation_ids (list): Operations to remove
+            cancel (bool): Mark removed operations cancelled so a worker still holding one stops
+
+        Returns:
+            list: IDs that were registered
+        """
+        operation_ids = set(operation_ids)
+        with self._registry_lock:
+            removed = [self._operations.pop(op_id) for op_id in operation_ids if op_id in self._operations]
+            self._queue = [entry for entry in self._queue if entry['operation_id'] not in operation_ids]
+        if cancel:
+            for operation in removed:
+                with self.lock_for(operation['user_id']):
+                    operation['status'] = 'cancelled'
+        return [operation['id'] for operation in removed]
+
+    # Transitions
+
+    def admit(self, operation, queue_entry):
+        """
+        Register a new operation and either queue it or reserve the executor for it, atomically.
+
+        Args:
+            operation (dict): New operation (its 'status' and 'queue_position' are set here)
+            queue_entry (dict): Queue entry used if another batch is busy
+
+        Returns:
+            dict: Copy of the busy batch the new one was queued behind, or None if it may start now
+        """
+        with self._registry_lock:
+            busy = next((op for op in self._operations.values() if op['status'] in BUSY_STATUSES), None)
+            if busy is None:
+                operation['status'] = 'starting'
+                operation['queue_position'] = 0
+            else:
+                self._queue.append(queue_entry)
+                operation['status'] = 'queued'
+                operation['queue_position'] = len(self._queue)
+            self._operations[operation['id']] = operation
+            return copy_operation(busy) if busy is not None else None
+
+    def start_next(self):
+        """
+        Atomically take the next queued batch and mark it running, if the executor is free.
+
+        Returns:
+            tuple: (queue entry, live operation), or None if busy or nothing is startable
+        """
+        with self._registry_lock:
+            if any(op['status'] in BUSY_STATUSES for op in self._operations.values()):
+                return None
+            while self._queue:
+                entry = self._queue.pop(0)
+                operation = self._operations.get(entry['operation_id'])
+                # Skip batches that were cancelled or cleared while waiting in the queue
+                if operation is None:
+                    continue
+                with self.lock_for(operation['user_id']):
+                    if operation['status'] == 'cancelled':
+                        continue
+                    operation['status'] = 'running'
+                return entry, operation
+        return None
+
+    def transition(self, operation_id, status, from_statuses=None, **fields):
+        """
+        Change an operation's status (compare-and-set) and apply fields in one step.
+
+        Args:
+            operation_id (str): Operation to change
+            status (str): New status
+            from_statuses (tuple): Only transition from these statuses (None = any)
+            **fields: Extra fields to set
+
+        Returns:
+            dict: Copy of the updated operation, or None if missing or not in from_statuses
+        """
+        operation = self.get_live(operation_id)
+        if operation is None:
+            return None
+        with self.lock_for(operation['user_id']):
+            if from_statuses is not None and operation['status'] not in from_statuses:
+                return None
+            operation.update(fields)
+            operation['status'] = status
+            return copy_operation(operation)
+
+    def claim_completion(self, operation_id):
+        """
+        Atomically consume an operation's completion notification.
+
+        Returns:
+            bool: True if a notification was pending (and is now cleared)
+        """
+        operation = self.get_live(operation_id)
+        if operation is None:
+            return False
+        with self.lock_for(operation['user_id']):
+            if not operation.get('completion_pending'):
+                return False
+            operation['completion_pending'] = False
+            return True
+
+    def take_queued_targets(self, operation_id, targets, note=None):
+        """
+        Remove targets from a still-queued batch (and its queue entry) to run them elsewhere.
+
+        Args:
+            operation_id (str): Queued operation
+            targets (list): Targets to take
+            note (str): Optional note appended to the operation
+
+        Returns:
+            tuple: (targets taken, copy of the updated operation) - ([], None) if it is no longer queued
+        """
+        with self._registry_lock:
+            operation = self._operations.get(operation_id)
+            entry = next((entry for entry in self._queue if entry['operation_id'] == operation_id), None)
+            if operation is None or entry is None:
+                return [], None
+            with self.lock_for(operation['user_id']):
+                if operation['status'] != 'queued':
+                    return [], None
+                wanted = set(targets)
+                taken = [target for target in operation['usernames'] if target in wanted]
+                operation['usernames'] = [target for target in operation['usernames'] if target not in wanted]
+                operation['total_count'] = len(operation['usernames'])
+                operation['last_update'] = time.time()
+                if note and taken:
+                    operation.setdefault('notes', []).append(note)
+                entry['usernames'] = list(operation['usernames'])
+                return taken, copy_operation(operation)
+
+    # Queue
+
+    def queue_entries(self, user_id=None):
+        """List queue entries in order (copies)."""
+        with self._registry_lock:
+            return [dict(entry) for entry in self._queue if user_id is None or entry['user_id'] == user_id]
+
+    def queue_length(self):
+        """Get number of queued entries."""
+        with self._registry_lock:
+            return len(self._queue)
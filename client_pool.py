@@ -0,0 +1,235 @@
+"""
+Per-account pool of X API clients.
+Every account gets its own XAPIClient - HTTP session, tokens (under its own keyring
+entries) and rate-limit counters - so accounts served by one process never share
+credentials or quota state. Clients are created on first use and kept in LRU order;
+idle ones are evicted once the pool is full or after an idle timeout. Evicting loses
+nothing: tokens stay in the keyring and rate-limit windows in the rate-limit store,
+so the next use rebuilds the client as it was.
+
+An OAuth login does not know its account until the callback, so it runs on a pending
+client keyed by the OAuth state and joins the pool once the account is known.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+
+class XAPIClientPool:
+    """LRU pool of XAPIClient instances keyed by account ID."""
+
+    def __init__(self, factory, max_clients=256, idle_ttl=3600, login_ttl=600, on_evict=None):
+        """
+        Create an empty pool.
+
+        Args:
+            factory (callable): factory(account_id) -> XAPIClient (account_id None for a login)
+            max_clients (int): Clients kept before idle ones are evicted (in-use clients never are)
+            idle_ttl (float): Seconds since last use after which an idle client is evicted
+            login_ttl (float): Seconds a pending OAuth login stays valid
+            on_evict (callable): Called with the account ID of each evicted client
+        """
+        self._factory = factory
+        self.max_clients = max_clients
+        self.idle_ttl = idle_ttl
+        self.login_ttl = login_ttl
+        self._on_evict = on_evict
+        self._lock = threading.Lock()
+        self._clients = OrderedDict()   # account_id -> client, least recently used first
+        self._last_used = {}            # account_id -> last use (epoch seconds)
+        self._in_use = {}               # account_id -> number of holders (batch workers, scans)
+        self._pending_logins = {}       # OAuth state -> (client, started_at)
+        self.stats_counters = {'created': 0, 'evicted': 0, 'hits': 0}
+
+    def get(self, account_id):
+        """
+        Get an account's client, creating it on first use.
+
+        Args:
+            account_id (str): Account ID
+
+        Returns:
+            XAPIClient: The account's client
+        """
+        account_id = str(account_id)
+        with self._lock:
+            client = self._clients.get(account_id)
+            if client is not None:
+                self._clients.move_to_end(account_id)
+                self.stats_counters['hits'] += 1
+            else:
+                client = self._factory(account_id)
+                self._clients[account_id] = client
+                self.stats_counters['created'] += 1
+            self._last_used[account_id] = time.time()
+            evicted = self._evict_locked()
+        self._notify_evicted(evicted)
+        return client
+
+    def acquire(self, account_id):
+        """
+        Get an account's client and hold it against eviction until release().
+
+        Long-running work (batch workers, scans) holds its client so the rate-limit state it
+        is updating is never dropped and rebuilt underneath it.
+        """
+        client = self.get(account_id)
+        with self._lock:
+            self._in_use[str(account_id)] = self._in_use.get(str(account_id), 0) + 1
+        return client
+
+    def release(self, client):
+        """
+        Release a client obtained with acquire().
+
+        Released by client, not by the account ID it was acquired under: rekey() may have
+        moved it, and its holders, to a new account ID since.
+        """
+        account_id = str(client.account_id)
+        with self._lock:
+            holders = self._in_use.get(account_id, 0) - 1
+            if holders > 0:
+                self._in_use[account_id] = holders
+            else:
+                self._in_use.pop(account_id, None)
+            self._last_used[account_id] = time.time()
+
+    def discard(self, account_id):
+        """
+        Log an account out: delete its stored tokens and drop its client.
+
+        A batch worker still holding the client keeps its reference (and fails on its next
+        call, since the tokens are gone).
+        """
+        account_id = str(account_id)
+        with self._lock:
+            client = self._clients.pop(account_id, None)
+            self._last_used.pop(account_id, None)
+        if client is None:
+            client = self._factory(account_id)
+        client.clear_tokens()
+        if not self._in_use.get(account_id):
+            client.close()
+        self._notify_evicted([account_id])
+
+    def rekey(self, old_account_id, client):
+        """
+        Move a client to its new account ID after bind_account() changed it.
+
+        Args:
+            old_account_id (str): Key the client was pooled under
+            client (XAPIClient): The client (already bound to its new account)
+        """
+        old_account_id = str(old_account_id)
+        with self._lock:
+            if self._clients.get(old_account_id) is client:
+                del self._clients[old_account_id]
+                self._last_used.pop(old_account_id, None)
+                holders = self._in_use.pop(old_account_id, 0)
+                if holders:
+                    self._in_use[client.account_id] = self._in_use.get(client.account_id, 0) + holders
+        self.add(client)
+
+    def add(self, client):
+        """
+        Put a bound client into the pool, replacing any client the account already had.
+
+        A replaced client that is in use is told to reload its tokens (so a running batch
+        picks up a fresh login) rather than being swapped out from under its holder.
+        """
+        account_id = str(client.account_id)
+        with self._lock:
+            existing = self._clients.get(account_id)
+            if existing is not None and existing is not client and self._in_use.get(account_id):
+                existing.reload_tokens()
+                client.close()
+                client = existing
+            elif existing is not None and existing is not client:
+                existing.close()
+            self._clients[account_id] = client
+            self._clients.move_to_end(account_id)
+            self._last_used[account_id] = time.time()
+            evicted = self._evict_locked()
+        self._notify_evicted(evicted)
+        return client
+
+    # OAuth logins
+
+    def begin_login(self):
+        """
+        Start an OAuth login on a new unbound client.
+
+        Returns:
+            str: Authorization URL to redirect to
+        """
+        client = self._factory(None)
+        auth_url = client.get_authorization_url()
+        now = time.time()
+        with self._lock:
+            for state in [state for state, (_, started) in self._pending_logins.items() if now - started > self.login_ttl]:
+                self._pending_logins.pop(state)[0].close()
+            self._pending_logins[client.state] = (client, now)
+        return auth_url
+
+    def complete_login(self, state):
+        """
+        Take the pending login started with an OAuth state.
+
+        Returns:
+            XAPIClient: The login's client, or None if the state is unknown or expired
+        """
+        with self._lock:
+            pending = self._pending_logins.pop(state, None)
+        if pending is None:
+            return None
+        client, started = pending
+        if time.time() - started > self.login_ttl:
+            client.close()
+            return None
+        return client
+
+    # Eviction
+
+    def _evict_locked(self):
+        """Evict idle clients past the TTL, then least recently used idle ones over the cap."""
+        now = time.time()
+        evicted = []
+        for account_id in list(self._clients):
+            idle = not self._in_use.get(account_id)
+            if idle and (len(self._clients) > self.max_clients or now - self._last_used.get(account_id, now) > self.idle_ttl):
+                self._clients.pop(account_id).close()
+                self._last_used.pop(account_id, None)
+                evicted.append(account_id)
+        self.stats_counters['evicted'] += len(evicted)
+        return evicted
+
+    def evict_idle(self):
+        """Evict clients idle for longer than the TTL (run from housekeeping - get() only evicts on use)."""
+        with self._lock:
+            evicted = self._evict_locked()
+        self._notify_evicted(evicted)
+        return evicted
+
+    def _notify_evicted(self, account_ids):
+        if self._on_evict is None:
+            return
+        for account_id in account_ids:
+            try:
+                self._on_evict(account_id)
+            except Exception as e:
+                logging.error(f"Error in client pool eviction hook for {account_id}: {str(e)}")
+
+    # Introspection
+
+    def clients(self):
+        """Snapshot of the pooled clients (account_id -> client), least recently used first."""
+        with self._lock:
+            return OrderedDict(self._clients)
+
+    def stats(self):
+        """Pool size, clients in use, pending logins and lifetime counters."""
+        with self._lock:
+            return dict(self.stats_counters, clients=len(self._clients), in_use=len(self._in_use),
+                        pending_logins=len(self._pending_logins), max_clients=self.max_clients)
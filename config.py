@@ -20,16 +20,29 @@ CLIENT_SECRET = os.getenv("X_CLIENT_SECRET")
 CALLBACK_URL = os.getenv("CALLBACK_URL", "http://localhost:5001/callback")
 # For production: CALLBACK_URL = "https://yourdomain.com/callback"
 
-# X API v2 Base URL
-API_BASE_URL = "https://api.x.com/2"
+# X API v2 Base URL (override to point the app at a mock API, e.g. for loadtest.py)
+API_BASE_URL = os.getenv("X_API_BASE_URL", "https://api.x.com/2")
+OAUTH_TOKEN_URL = os.getenv("X_OAUTH_TOKEN_URL", f"{API_BASE_URL}/oauth2/token")
 
 # Rate Limits (per 15-minute window)
 RATE_LIMITS = {
     'following_list': 15,      # GET /users/:id/following
+    'followers_list': 15,      # GET /users/:id/followers
     'unfollow': 50,            # DELETE /users/:source_user_id/following/:target_user_id
     'user_lookup': 300         # GET /users/by/username/:username
 }
 
+# X API client pool - one client (session, tokens, rate-limit state) per account. Idle clients
+# beyond CLIENT_POOL_MAX_CLIENTS, or unused for CLIENT_POOL_IDLE_TTL seconds, are evicted
+# (their tokens stay in the keyring and their rate-limit windows in the rate-limit store)
+CLIENT_POOL_MAX_CLIENTS = int(os.getenv("CLIENT_POOL_MAX_CLIENTS", "256"))
+CLIENT_POOL_IDLE_TTL = int(os.getenv("CLIENT_POOL_IDLE_TTL", "3600"))
+OAUTH_LOGIN_TTL = 600            # Seconds an OAuth login may take between /login and /callback
+
+# Persisted rate-limit windows (per account, per endpoint) - reloaded at startup
+RATE_LIMIT_STATE_FILE = os.getenv("RATE_LIMIT_STATE_FILE", "rate_limit_state.json")
+RATE_LIMIT_SYNC_INTERVAL = 5     # Seconds a cached /status rate-limit snapshot may go without re-reading the store
+
 # Layer 2 Error Classification Constants
 ERROR_CLASSIFICATION = {
     'free_errors': ['User not found', 'User has been suspended', 'User blocked you'],
@@ -40,6 +53,89 @@ ERROR_CLASSIFICATION = {
     }
 }
 
+# Target Ledger - settled outcomes per account, used to skip duplicate targets
+LEDGER_DB_FILE = os.getenv("LEDGER_DB_FILE", "unfollow_ledger.db")
+LEDGER_BLOOM_CAPACITY = 100000   # Initial Bloom filter capacity (grows automatically)
+LEDGER_BLOOM_ERROR_RATE = 0.01   # Bloom filter false positive rate
+
+# Attempt history - minute/hour/day rollups kept long-term (retention in days per resolution)
+TIMESERIES_DB_FILE = os.getenv("TIMESERIES_DB_FILE", "attempt_history.db")
+TIMESERIES_RETENTION_DAYS = {
+    'minute': float(os.getenv("TIMESERIES_MINUTE_RETENTION_DAYS", "2")),
+    'hour': float(os.getenv("TIMESERIES_HOUR_RETENTION_DAYS", "90")),
+    'day': float(os.getenv("TIMESERIES_DAY_RETENTION_DAYS", "730"))
+}
+
+# Conservative free tier unfollow limits (reported in rate limit status, and enforced as hard
+# budgets by admission control and the worker). These are unverified defaults, not published
+# X API limits - set them to what your API tier actually allows.
+UNFOLLOW_HOURLY_LIMIT = int(os.getenv("UNFOLLOW_HOURLY_LIMIT", "4"))
+UNFOLLOW_DAILY_LIMIT = int(os.getenv("UNFOLLOW_DAILY_LIMIT", "50"))
+
+# Admission control - batches are scheduled into slots that fit the hourly/daily budgets above;
+# a submission whose schedule would run past ADMISSION_MAX_DAYS is refused
+ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+ADMISSION_MAX_DAYS = float(os.getenv("ADMISSION_MAX_DAYS", "30"))
+
+# Server-sent status streams (/unfollow/slow-batch/<id>/events)
+SSE_POLL_INTERVAL = 1           # Seconds between change checks per stream
+SSE_KEEPALIVE_INTERVAL = 15     # Seconds between keepalive comments on an idle stream
+
+# Cooperative serving (serve.py): COOPERATIVE_SERVER=gevent|eventlet
+COOPERATIVE_MAX_CONNECTIONS = int(os.getenv("COOPERATIVE_MAX_CONNECTIONS", "10000"))
+
+# Operator admin API (/admin/api/*) - disabled unless a token is set
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+ADMIN_STUCK_AFTER = 1200        # Seconds without a state write before a running batch is reported as stuck
+
+# Per-target tracing (OTLP/JSON spans) - exported to OTLP_TRACES_ENDPOINT if set, else appended to TRACE_EXPORT_FILE
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "traces.jsonl")
+OTLP_TRACES_ENDPOINT = os.getenv("OTLP_TRACES_ENDPOINT")    # e.g. http://localhost:4318/v1/traces
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "x-unfollow")
+
+# On-demand sampling profiler (/admin/api/profile) and per-route timing of the polling endpoints
+PROFILE_MAX_SECONDS = 300
+PROFILE_DEFAULT_INTERVAL_MS = 10
+PROFILE_TIMED_ROUTES = ['/status', '/unfollow/slow-batch/list', '/unfollow/slow-batch/<operation_id>/status',
+                        '/api/rate-limits']
+ROUTE_TIMING_ENABLED = os.getenv("ROUTE_TIMING_ENABLED", "false").lower() == "true"   # Time routes outside profiles too
+
+# Tiered retention of finished batches - moved to a compressed on-disk archive as soon as they finish;
+# summaries stay in memory for ARCHIVE_WARM_HOURS, full state on disk for ARCHIVE_RETENTION_DAYS
+ARCHIVE_DB_FILE = os.getenv("ARCHIVE_DB_FILE", "operation_archive.db")
+ARCHIVE_WARM_HOURS = float(os.getenv("ARCHIVE_WARM_HOURS", "24"))
+ARCHIVE_RETENTION_DAYS = float(os.getenv("ARCHIVE_RETENTION_DAYS", "30"))
+ARCHIVE_EXPIRE_INTERVAL = int(os.getenv("ARCHIVE_EXPIRE_INTERVAL", "3600"))     # Seconds between expiry sweeps
+
+# Memory diagnostics (/admin/api/memory) - tracemalloc only runs between explicit start/stop
+TRACEMALLOC_DEFAULT_FRAMES = 10
+TRACEMALLOC_MAX_SNAPSHOTS = 4
+
+# Non-mutual scans - following/followers IDs collected page by page for the set difference
+RELATIONSHIP_DB_FILE = os.getenv("RELATIONSHIP_DB_FILE", "relationships.db")
+RELATIONSHIP_PAGE_SIZE = 1000   # IDs per page (X API maximum)
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")  # Memory-mapped following/followers ID snapshots
+SNAPSHOT_KEEP = 5               # Snapshots kept per account and list
+
+# Batch planner - reorders a starting batch (and pulls zero-quota targets forward from the account's
+# queued batches) using the ledger and a following list no older than PLANNER_FOLLOWING_MAX_AGE seconds
+BATCH_PLANNER_ENABLED = os.getenv("BATCH_PLANNER_ENABLED", "true").lower() == "true"
+PLANNER_FOLLOWING_MAX_AGE = int(os.getenv("PLANNER_FOLLOWING_MAX_AGE", str(6 * 60 * 60)))
+
+# Multi-worker Deployment - process-shared state and leader-elected batch executor
+SHARED_STATE_ENABLED = os.getenv("SHARED_STATE_ENABLED", "false").lower() == "true"
+SHARED_STATE_DB_FILE = os.getenv("SHARED_STATE_DB_FILE", "shared_state.db")
+SHARED_STATE_HOST = os.getenv("SHARED_STATE_HOST")  # Host the store is pinned to (defaults to hostname; set the same value in containers sharing a volume)
+EXECUTOR_LEASE_TTL = 30       # Seconds before a silent executor loses leadership
+EXECUTOR_POLL_INTERVAL = 2    # Seconds between lease renewals / queue checks
+
+# Lease Mode - per-account execution lanes spread across node processes on one host (requires shared state)
+LEASE_MODE_ENABLED = os.getenv("LEASE_MODE_ENABLED", "false").lower() == "true"
+ACCOUNT_LEASE_TTL = int(os.getenv("ACCOUNT_LEASE_TTL", "60"))               # Seconds before a silent node loses an account's lane
+LEASE_HEARTBEAT_INTERVAL = int(os.getenv("LEASE_HEARTBEAT_INTERVAL", "10"))  # Seconds between lane lease renewals
+NODE_ID = os.getenv("NODE_ID")  # Optional node name (defaults to hostname)
+
 # Application Settings
 SECRET_KEY_LENGTH = 32        # Length for Flask secret key generation
 SESSION_TIMEOUT = 7200        # Session timeout in seconds (2 hours - matches X token expiry)
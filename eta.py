@@ -0,0 +1,187 @@
+"""
+ETA estimation for slow batch operations.
+Learns the time each target takes (API call plus the classified wait after it)
+from the unfollow attempt rollups and projects remaining time, with a confidence
+range, for running batches and for every position in the queue.
+"""
+
+import math
+import time
+from datetime import datetime
+
+CONFIDENCE_Z = 1.645         # Two-sided 90% confidence range
+PRIOR_WEIGHT = 3             # Pseudo-observations of the default wait (stabilizes small histories)
+DEFAULT_STEP_DURATION = 2.0  # Seconds assumed for resolve + unfollow calls without history
+
+
+class EtaModel:
+    """Per-target timing model built from tracked unfollow attempts."""
+
+    def __init__(self, attempts, default_wait=900, prior_weight=PRIOR_WEIGHT):
+        """
+        Build the model from tracking history.
+
+        Args:
+            attempts (list): Tracking entries; 'wait_seconds', 'error_type' and 'duration' are used when present
+            default_wait (int): Wait assumed before any history exists (seconds)
+            prior_weight (int): Number of pseudo-observations of default_wait blended into the history
+        """
+        waits = [a['wait_seconds'] for a in attempts if isinstance(a.get('wait_seconds'), (int, float))]
+        durations = [a['duration'] for a in attempts if isinstance(a.get('duration'), (int, float))]
+
+        samples = waits + [default_wait] * prior_weight
+        self.observations = len(waits)
+        self.samples = len(samples)
+        self.mean_wait = sum(samples) / self.samples
+        self.wait_variance = sum((w - self.mean_wait) ** 2 for w in samples) / self.samples
+        self.min_wait = min(samples)
+        self.mean_duration = sum(durations) / len(durations) if durations else DEFAULT_STEP_DURATION
+
+        # Observed outcome mix, reported alongside estimates
+        classes = {}
+        for attempt in attempts:
+            if isinstance(attempt.get('wait_seconds'), (int, float)):
+                stats = classes.setdefault(attempt.get('error_type') or 'unknown', {'count': 0, 'total_wait': 0})
+                stats['count'] += 1
+                stats['total_wait'] += attempt['wait_seconds']
+        self.outcome_mix = {
+            error_type: {
+                'share': round(stats['count'] / self.observations, 3),
+                'mean_wait_seconds': round(stats['total_wait'] / stats['count'], 1)
+            }
+            for error_type, stats in classes.items()
+        }
+
+    @classmethod
+    def from_outcome_totals(cls, totals, default_wait=900, prior_weight=PRIOR_WEIGHT):
+        """
+        Build the model from rolled-up attempts (AttemptTimeSeries.outcome_totals).
+
+        The wait after an attempt is set by its outcome class, so each attempt is taken
+        at its class's mean wait and call time.
+
+        Args:
+            totals (dict): outcome -> {'attempts', 'wait_seconds', 'duration'}
+        """
+        attempts = []
+        for outcome, total in totals.items():
+            count = int(total['attempts'])
+            if count:
+                attempt = {'error_type': outcome, 'wait_seconds': total['wait_seconds'] / count,
+                           'duration': total['duration'] / count}
+                attempts.extend([attempt] * count)
+        return cls(attempts, default_wait=default_wait, prior_weight=prior_weight)
+
+    def estimate(self, targets, first_wait=0):
+        """
+        Estimate time to process a number of targets.
+
+        Args:
+            targets (int): Targets still to process
+            first_wait (float): Known delay before the first target (current wait, quota stall)
+
+        Returns:
+            dict: {'mean', 'variance', 'floor'} in seconds
+        """
+        if targets <= 0:
+            return {'mean': 0.0, 'variance': 0.0, 'floor': 0.0}
+
+        # No wait follows the last target of a batch
+        waits = targets - 1
+        base = first_wait + targets * self.mean_duration
+        # Step-to-step spread plus uncertainty in the learned mean itself
+        variance = waits * self.wait_variance + (waits ** 2) * self.wait_variance / self.samples
+        return {
+            'mean': base + waits * self.mean_wait,
+            'variance': variance,
+            'floor': base + waits * self.min_wait
+        }
+
+    def summary(self):
+        """Get the model parameters for API responses."""
+        return {
+            'observations': self.observations,
+            'mean_wait_seconds': round(self.mean_wait, 1),
+            'mean_call_seconds': round(self.mean_duration, 2),
+            'outcome_mix': self.outcome_mix
+        }
+
+
+def quota_stall(rate_limit, now=None):
+    """
+    Get the delay imposed by an exhausted rate-limit window.
+
+    Args:
+        rate_limit (dict): {'remaining', 'limit', 'reset'} for the unfollow endpoint
+
+    Returns:
+        float: Seconds until the window resets, 0 if requests are allowed
+    """
+    now = now or time.time()
+    remaining = rate_limit.get('remaining') if rate_limit else None
+    reset = rate_limit.get('reset') if rate_limit else None
+    if isinstance(remaining, int) and remaining <= 0 and isinstance(reset, (int, float)):
+        return max(0.0, reset - now)
+    return 0.0
+
+
+def combine(estimates):
+    """Sum independent estimates (batches run one after another)."""
+    return {
+        'mean': sum(e['mean'] for e in estimates),
+        'variance': sum(e['variance'] for e in estimates),
+        'floor': sum(e['floor'] for e in estimates)
+    }
+
+
+def confidence_range(estimate, now=None):
+    """
+    Convert an estimate into the range reported by the status APIs.
+
+    Args:
+        estimate (dict): {'mean', 'variance', 'floor'} in seconds
+
+    Returns:
+        dict: Remaining seconds and completion times for the expected value and the 90% range
+    """
+    now = now or time.time()
+    spread = CONFIDENCE_Z * math.sqrt(estimate['variance'])
+    expected = estimate['mean']
+    low = max(estimate['floor'], expected - spread)
+    high = expected + spread
+
+    def stamp(seconds):
+        return datetime.fromtimestamp(now + seconds).strftime('%Y-%m-%d %H:%M:%S')
+
+    return {
+        'remaining_seconds': round(expected),
+        'low_seconds': round(low),
+        'high_seconds': round(high),
+        'estimated_completion': stamp(expected),
+        'earliest_completion': stamp(low),
+        'latest_completion': stamp(high),
+        'confidence': 0.9,
+        'computed_at': now
+    }
+
+
+def rebase_eta(eta, now=None):
+    """
+    Bring a stored estimate up to date without recomputing it.
+
+    The completion times are absolute and stay as they are; only the remaining
+    seconds count down from when the estimate was computed.
+
+    Args:
+        eta (dict): Estimate from confidence_range (with 'computed_at')
+
+    Returns:
+        dict: Copy of the estimate as of `now`
+    """
+    now = now or time.time()
+    elapsed = max(0.0, now - eta.get('computed_at', now))
+    rebased = dict(eta)
+    for key in ('remaining_seconds', 'low_seconds', 'high_seconds', 'queue_wait_seconds'):
+        if key in rebased:
+            rebased[key] = max(0, round(rebased[key] - elapsed))
+    return rebased
@@ -0,0 +1,300 @@
+"""
+Persistent per-account ledger of settled unfollow targets.
+Records final outcomes (unfollowed, not following, not found, suspended) so the
+same target is never looked up or unfollowed twice across batches.
+"""
+
+import sqlite3
+import threading
+import hashlib
+import logging
+import math
+import time
+
+# Outcomes that settle a target permanently - transient failures are never recorded
+SETTLED_OUTCOMES = ('unfollowed', 'not_following', 'not_found', 'suspended')
+
+# X API error codes that identify a settled target
+NOT_FOUND_CODES = [17, 50]
+SUSPENDED_CODES = [63]
+
+
+# Ledger keys for numeric user IDs carry this prefix, so an all-digit handle (@123)
+# and the user ID 123 are never the same target
+ID_KEY_PREFIX = 'id:'
+
+SCHEMA_VERSION = 1  # 1: numeric-ID keys carry ID_KEY_PREFIX
+
+
+def normalize_target(target):
+    """Normalize a target for ledger keys and dedup (handles: strip '@', case-fold; bare digits: 'id:<id>')."""
+    text = str(target).strip()
+    if text.isdigit():
+        return f"{ID_KEY_PREFIX}{text}"
+    return text.lstrip('@').lower()
+
+
+def key_user_id(key):
+    """Get the numeric user ID from a normalized key, or None for a handle."""
+    return key[len(ID_KEY_PREFIX):] if key.startswith(ID_KEY_PREFIX) else None
+
+
+def settled_outcome(success, error_info):
+    """
+    Map an unfollow attempt to a ledger outcome.
+
+    Args:
+        success (bool): Whether the unfollow succeeded
+        error_info (dict): Structured error from XAPIClient.last_api_error
+
+    Returns:
+        str: Settled outcome, or None if the failure is transient
+    """
+    if success:
+        return 'unfollowed'
+
+    if not error_info:
+        return None
+
+    error_code = error_info.get('code', 0)
+    if error_code in SUSPENDED_CODES:
+        return 'suspended'
+    if error_code in NOT_FOUND_CODES:
+        return 'not_found'
+
+    message = (error_info.get('message') or '').lower()
+    if 'suspended' in message:
+        return 'suspended'
+    if 'not following' in message:
+        return 'not_following'
+    if 'not found' in message or 'does not exist' in message:
+        return 'not_found'
+
+    return None
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter used as a negative cache in front of the ledger store."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        """
+        Initialize Bloom filter.
+
+        Args:
+            capacity (int): Expected number of keys
+            error_rate (float): Target false positive rate
+        """
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / self.capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        """Derive bit positions with double hashing over one blake2b digest."""
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        """Add a key to the filter."""
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class TargetLedger:
+    """SQLite-backed ledger of settled targets, indexed per account."""
+
+    def __init__(self, db_path, bloom_capacity=100000, bloom_error_rate=0.01):
+        """
+        Initialize target ledger.
+
+        Args:
+            db_path (str): SQLite database file
+            bloom_capacity (int): Initial Bloom filter capacity (grows on demand)
+            bloom_error_rate (float): Bloom filter false positive rate
+        """
+        self.db_path = db_path
+        self.bloom_error_rate = bloom_error_rate
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._init_schema()
+        self._rebuild_bloom(bloom_capacity)
+
+    def _init_schema(self):
+        """Create ledger table and indexes."""
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS ledger (
+                    user_id TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    target_id TEXT,
+                    outcome TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (user_id, target)
+                )
+            """)
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                # Ledgers written before IDs were prefixed keyed them by bare digits. Only rows
+                # submitted as IDs move (their target_id is the target itself); an all-digit
+                # handle resolved to a different ID (or to none) and stays a handle.
+                self._conn.execute(f"""
+                    UPDATE ledger SET target = '{ID_KEY_PREFIX}' || target
+                    WHERE target != '' AND target NOT GLOB '*[^0-9]*' AND target_id = target
+                """)
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ledger_target_id ON ledger (user_id, target_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ledger_outcome ON ledger (user_id, outcome, updated_at)")
+
+    @staticmethod
+    def _bloom_key(user_id, target):
+        return f"{user_id}:{target}"
+
+    def _rebuild_bloom(self, capacity):
+        """Rebuild the Bloom filter from the store, sized for at least `capacity` keys."""
+        with self._lock:
+            rows = self._conn.execute("SELECT user_id, target, target_id FROM ledger").fetchall()
+            capacity = max(capacity, len(rows) * 4)
+            bloom = BloomFilter(capacity, self.bloom_error_rate)
+            for row in rows:
+                bloom.add(self._bloom_key(row['user_id'], row['target']))
+                if row['target_id']:
+                    bloom.add(self._bloom_key(row['user_id'], ID_KEY_PREFIX + row['target_id']))
+            self._bloom = bloom
+        logging.info(f"Loaded target ledger with {len(rows)} settled entries (bloom capacity {capacity})")
+
+    def record(self, user_id, target, outcome, target_id=None):
+        """
+        Record a settled outcome for a target.
+
+        Args:
+            user_id (str): Account that owns the ledger
+            target (str): Handle or numeric ID as submitted
+            outcome (str): One of SETTLED_OUTCOMES
+            target_id (str): Resolved numeric ID, if known
+        """
+        if outcome not in SETTLED_OUTCOMES:
+            raise ValueError(f"Invalid ledger outcome: {outcome}")
+
+        key = normalize_target(target)
+        target_id = str(target_id) if target_id else key_user_id(key)
+
+        with self._lock:
+            with self._conn:
+                self._conn.execute("""
+                    INSERT INTO ledger (user_id, target, target_id, outcome, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (user_id, target) DO UPDATE SET
+                        target_id = COALESCE(excluded.target_id, ledger.target_id),
+                        outcome = excluded.outcome,
+                        updated_at = excluded.updated_at
+                """, (str(user_id), key, target_id, outcome, time.time()))
+
+            self._bloom.add(self._bloom_key(user_id, key))
+            if target_id:
+                self._bloom.add(self._bloom_key(user_id, ID_KEY_PREFIX + target_id))
+            needs_resize = self._bloom.count > self._bloom.capacity
+
+        if needs_resize:
+            self._rebuild_bloom(self._bloom.capacity * 2)
+
+    def get(self, user_id, target):
+        """
+        Look up the settled outcome for a target.
+
+        Args:
+            user_id (str): Account that owns the ledger
+            target (str): Handle or numeric ID
+
+        Returns:
+            dict: Ledger entry or None if the target is not settled
+        """
+        key = normalize_target(target)
+
+        # Bloom filter answers the common "never seen" case without touching SQLite
+        if self._bloom_key(user_id, key) not in self._bloom:
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT target, target_id, outcome, updated_at FROM ledger "
+                "WHERE user_id = ? AND (target = ? OR target_id = ?) LIMIT 1",
+                (str(user_id), key, key_user_id(key))
+            ).fetchone()
+
+        return dict(row) if row else None
+
+    def partition(self, user_id, targets):
+        """
+        Split targets into unsettled and already-settled lists.
+
+        Args:
+            user_id (str): Account that owns the ledger
+            targets (list): Handles or numeric IDs
+
+        Returns:
+            tuple: (pending targets, list of settled ledger entries)
+        """
+        pending = []
+        settled = []
+        for target in targets:
+            entry = self.get(user_id, target)
+            if entry:
+                settled.append(dict(entry, submitted=target))
+            else:
+                pending.append(target)
+        return pending, settled
+
+    def query(self, user_id, outcome=None, target=None, since=None, limit=100, offset=0):
+        """
+        Query ledger entries for an account, newest first.
+
+        Args:
+            user_id (str): Account that owns the ledger
+            outcome (str): Optional outcome filter
+            target (str): Optional handle or ID filter
+            since (float): Optional minimum updated_at timestamp
+            limit (int): Page size
+            offset (int): Page offset
+
+        Returns:
+            dict: Entries plus total count and per-outcome counts
+        """
+        clauses = ["user_id = ?"]
+        params = [str(user_id)]
+        if outcome:
+            clauses.append("outcome = ?")
+            params.append(outcome)
+        if target:
+            key = normalize_target(target)
+            clauses.append("(target = ? OR target_id = ?)")
+            params.extend([key, key_user_id(key)])
+        if since:
+            clauses.append("updated_at >= ?")
+            params.append(float(since))
+        where = " AND ".join(clauses)
+
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM ledger WHERE {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT target, target_id, outcome, updated_at FROM ledger WHERE {where} "
+                "ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+                params + [int(limit), int(offset)]
+            ).fetchall()
+            counts = self._conn.execute(
+                "SELECT outcome, COUNT(*) FROM ledger WHERE user_id = ? GROUP BY outcome",
+                (str(user_id),)
+            ).fetchall()
+
+        return {
+            'entries': [dict(row) for row in rows],
+            'total': total,
+            'outcome_counts': {row[0]: row[1] for row in counts}
+        }
@@ -0,0 +1,400 @@
+"""
+Load test: N simulated browser sessions polling the app the way script.js does.
+Starts a mock X API and the app (Flask threaded server, or serve.py under
+gevent/eventlet) in a scratch directory, signs a session cookie per simulated
+user, optionally starts test batches, and then polls /status, /api/rate-limits,
+/unfollow/slow-batch/list and each active batch's status on jittered timers,
+revalidating with ETags like a browser. Reports throughput, latency percentiles
+per endpoint and the server's CPU and memory, and can fail on thresholds so
+regressions are caught:
+
+    python loadtest.py --sessions 200 --duration 60
+    python loadtest.py --sessions 1000 --server gevent --json results.json --max-p95-ms 250
+    python loadtest.py --url http://127.0.0.1:5001 --server-pid 12345 --secret-key ...
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from flask import Flask
+
+from mock_x_api import start_mock_server
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+MONITOR_INTERVAL = 1        # Seconds between server CPU / memory samples
+STARTUP_TIMEOUT = 30        # Seconds to wait for a spawned server to answer
+
+
+def percentile(sorted_values, fraction):
+    """Get a percentile from sorted values (None if empty)."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+class Recorder:
+    """Thread-safe request results per endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, seconds, status_code, size=0):
+        """Record one request (status_code None = connection error)."""
+        with self._lock:
+            entry = self._endpoints.setdefault(endpoint, {'latencies': [], 'statuses': {}, 'errors': 0, 'bytes': 0})
+            entry['latencies'].append(seconds)
+            key = str(status_code) if status_code is not None else 'error'
+            entry['statuses'][key] = entry['statuses'].get(key, 0) + 1
+            if status_code is None or status_code >= 500:
+                entry['errors'] += 1
+            entry['bytes'] += size
+
+    def report(self, elapsed):
+        """
+        Summarize per-endpoint and overall results.
+
+        Args:
+            elapsed (float): Measured duration in seconds
+
+        Returns:
+            dict: {'endpoints': {name: stats}, 'total': stats}
+        """
+        with self._lock:
+            endpoints = {name: dict(entry, latencies=sorted(entry['latencies']), statuses=dict(entry['statuses']))
+                         for name, entry in self._endpoints.items()}
+
+        def summarize(latencies, errors, statuses, size):
+            count = len(latencies)
+            ms = lambda value: round(value * 1000, 2) if value is not None else None
+            return {
+                'requests': count,
+                'rps': round(count / elapsed, 2) if elapsed else None,
+                'errors': errors,
+                'error_rate': round(errors / count, 4) if count else 0,
+                'not_modified': statuses.get('304', 0),
+                'statuses': statuses,
+                'bytes': size,
+                'mean_ms': ms(sum(latencies) / count) if count else None,
+                'p50_ms': ms(percentile(latencies, 0.50)),
+                'p90_ms': ms(percentile(latencies, 0.90)),
+                'p95_ms': ms(percentile(latencies, 0.95)),
+                'p99_ms': ms(percentile(latencies, 0.99)),
+                'max_ms': ms(latencies[-1]) if latencies else None
+            }
+
+        report = {name: summarize(entry['latencies'], entry['errors'], entry['statuses'], entry['bytes'])
+                  for name, entry in sorted(endpoints.items())}
+        all_statuses = {}
+        for entry in endpoints.values():
+            for status, count in entry['statuses'].items():
+                all_statuses[status] = all_statuses.get(status, 0) + count
+        total = summarize(sorted(value for entry in endpoints.values() for value in entry['latencies']),
+                          sum(entry['errors'] for entry in endpoints.values()), all_statuses,
+                          sum(entry['bytes'] for entry in endpoints.values()))
+        return {'endpoints': report, 'total': total}
+
+
+class ProcessMonitor:
+    """Samples a process's CPU use and resident memory from /proc (or psutil where available)."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.samples = []   # (timestamp, cpu percent since previous sample, rss bytes)
+        self._stop = threading.Event()
+        self._thread = None
+        try:
+            import psutil
+            self._process = psutil.Process(pid)
+        except ImportError:
+            self._process = None
+        self._ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+    def _read(self):
+        """Get (cpu seconds, rss bytes) for the process."""
+        if self._process is not None:
+            times = self._process.cpu_times()
+            return times.user + times.system, self._process.memory_info().rss
+        with open(f'/proc/{self.pid}/stat') as f:
+            # Fields after the parenthesized command name; utime and stime are fields 14 and 15
+            fields = f.read().rsplit(')', 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / self._ticks
+        with open(f'/proc/{self.pid}/status') as f:
+            rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith('VmRSS:'))
+        return cpu, rss
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        try:
+            last_cpu, _ = self._read()
+            last_time = time.perf_counter()
+            while not self._stop.wait(MONITOR_INTERVAL):
+                cpu, rss = self._read()
+                now = time.perf_counter()
+                self.samples.append((time.time(), (cpu - last_cpu) / (now - last_time) * 100, rss))
+                last_cpu, last_time = cpu, now
+        except (OSError, StopIteration, ValueError) as e:
+            print(f"Server monitor stopped: {e}", file=sys.stderr)
+
+    def report(self):
+        """Summarize CPU percent (of one core) and RSS."""
+        if not self.samples:
+            return None
+        cpu = [sample[1] for sample in self.samples]
+        rss = [sample[2] for sample in self.samples]
+        return {
+            'pid': self.pid,
+            'cpu_percent_mean': round(sum(cpu) / len(cpu), 1),
+            'cpu_percent_max': round(max(cpu), 1),
+            'rss_bytes_start': rss[0],
+            'rss_bytes_max': max(rss),
+            'rss_bytes_end': rss[-1]
+        }
+
+
+def session_cookie(secret_key, user_id, username):
+    """Sign a Flask session cookie for a simulated logged-in user."""
+    signer = Flask('loadtest')
+    signer.secret_key = secret_key
+    serializer = signer.session_interface.get_signing_serializer(signer)
+    return serializer.dumps({'user_id': user_id, 'username': username, 'display_name': username, '_permanent': True})
+
+
+class SimulatedBrowser:
+    """One logged-in browser tab polling on jittered timers."""
+
+    def __init__(self, index, args, recorder, stop_event):
+        self.index = index
+        self.args = args
+        self.recorder = recorder
+        self.stop_event = stop_event
+        self.http = requests.Session()
+        self.user_id = str(10 ** 6 + index)
+        self.username = f'loadtest{index}'
+        self.http.cookies.set(args.cookie_name, session_cookie(args.secret_key, self.user_id, self.username))
+        self.etags = {}
+        self.active_operations = set()
+
+    def request(self, endpoint, method, path, **kwargs):
+        """Make one request, revalidating GETs with the last ETag, and record it."""
+        headers = kwargs.pop('headers', {})
+        if method == 'GET' and self.args.conditional and path in self.etags:
+            headers['If-None-Match'] = self.etags[path]
+        started = time.perf_counter()
+        try:
+            response = self.http.request(method, self.args.url + path, headers=headers, timeout=self.args.timeout, **kwargs)
+        except requests.RequestException:
+            self.recorder.record(endpoint, time.perf_counter() - started, None)
+            return None
+        self.recorder.record(endpoint, time.perf_counter() - started, response.status_code, len(response.content))
+        if response.headers.get('ETag'):
+            self.etags[path] = response.headers['ETag']
+        return response
+
+    def submit_batch(self):
+        usernames = [f'lt{self.index}x{n}' for n in range(5)]
+        response = self.request('submit_batch', 'POST', '/unfollow/slow-batch',
+                                json={'usernames': usernames, 'batch_type': 'test'})
+        if response is not None and response.ok:
+            self.active_operations.add(response.json().get('operation_id'))
+
+    def poll_list(self):
+        response = self.request('batch_list', 'GET', '/unfollow/slow-batch/list')
+        if response is not None and response.status_code == 200:
+            self.active_operations = {operation['operation_id'] for operation in response.json().get('operations', [])
+                                      if operation.get('status') in ('queued', 'starting', 'running',
+                                                                      'waiting_for_rate_limit_reset')}
+
+    def poll_operations(self):
+        for operation_id in list(self.active_operations):
+            self.request('batch_status', 'GET', f'/unfollow/slow-batch/{operation_id}/status')
+
+    def run(self):
+        """Poll until stopped (each timer starts at a random phase, like tabs opened at different times)."""
+        timers = [
+            (self.args.status_interval, lambda: self.request('status', 'GET', '/status')),
+            (self.args.rate_limits_interval, lambda: self.request('rate_limits', 'GET', '/api/rate-limits')),
+            (self.args.list_interval, self.poll_list),
+            (self.args.operation_interval, self.poll_operations)
+        ]
+        now = time.monotonic()
+        due = [now + random.uniform(0, interval) for interval, _ in timers]
+        if self.index < self.args.batches:
+            self.submit_batch()
+        while not self.stop_event.is_set():
+            slot = min(range(len(timers)), key=due.__getitem__)
+            if self.stop_event.wait(max(0, due[slot] - time.monotonic())):
+                break
+            interval, action = timers[slot]
+            action()
+            jitter = 1 + random.uniform(-self.args.jitter, self.args.jitter)
+            due[slot] = time.monotonic() + interval * jitter
+
+
+def spawn_server(args, workdir, mock_url):
+    """Start the app in a scratch directory against the mock API; returns the process."""
+    env = dict(os.environ, X_API_BASE_URL=mock_url, FLASK_SECRET_KEY=args.secret_key,
+               PYTHONPATH=PROJECT_DIR, HOST='127.0.0.1', PORT=str(args.port))
+    if args.server == 'flask':
+        command = [sys.executable, '-c',
+                   f"import app; app.app.run(host='127.0.0.1', port={args.port}, threaded=True, debug=False)"]
+    else:
+        env['COOPERATIVE_SERVER'] = args.server
+        command = [sys.executable, os.path.join(PROJECT_DIR, 'serve.py')]
+    log = open(os.path.join(workdir, 'server.log'), 'w')
+    return subprocess.Popen(command, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_until_ready(url, process=None):
+    """Wait for the server to answer /status."""
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited during startup (code {process.returncode})")
+        try:
+            if requests.get(url + '/status', timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready within {STARTUP_TIMEOUT}s")
+
+
+def print_report(result):
+    """Print a human-readable summary table."""
+    columns = ('requests', 'rps', 'errors', 'not_modified', 'p50_ms', 'p90_ms', 'p95_ms', 'p99_ms', 'max_ms')
+    print(f"\n{result['sessions']} sessions for {result['elapsed_seconds']}s ({result['server']})")
+    print(f"{'endpoint':<16}" + ''.join(f"{column:>13}" for column in columns))
+    rows = list(result['endpoints'].items()) + [('TOTAL', result['total'])]
+    for name, stats in rows:
+        print(f"{name:<16}" + ''.join(f"{str(stats[column]):>13}" for column in columns))
+    server = result.get('server_resources')
+    if server:
+        print(f"\nServer pid {server['pid']}: CPU mean {server['cpu_percent_mean']}% / max {server['cpu_percent_max']}% "
+              f"(of one core), RSS {server['rss_bytes_start'] / 2**20:.1f} -> max {server['rss_bytes_max'] / 2**20:.1f} MiB")
+
+
+def check_thresholds(result, args):
+    """List threshold violations (empty = pass)."""
+    failures = []
+    if args.max_p95_ms is not None:
+        for name, stats in result['endpoints'].items():
+            if stats['p95_ms'] is not None and stats['p95_ms'] > args.max_p95_ms:
+                failures.append(f"{name} p95 {stats['p95_ms']}ms > {args.max_p95_ms}ms")
+    if result['total']['error_rate'] > args.max_error_rate:
+        failures.append(f"error rate {result['total']['error_rate']} > {args.max_error_rate}")
+    return failures
+
+
+def main():
+    """Run the load test and print (and optionally save) the report."""
+    parser = argparse.ArgumentParser(description='Polling load test for the X Unfollow app')
+    parser.add_argument('--sessions', type=int, default=50, help='Simulated browser sessions')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds of load after ramp-up')
+    parser.add_argument('--ramp-up', type=float, default=5, help='Seconds over which sessions start')
+    parser.add_argument('--server', choices=('flask', 'gevent', 'eventlet'), default='flask',
+                        help='How to run the spawned app (ignored with --url)')
+    parser.add_argument('--port', type=int, default=5099, help='Port for the spawned app')
+    parser.add_argument('--url', help='Test an already running app instead of spawning one')
+    parser.add_argument('--server-pid', type=int, help='Process to monitor when using --url')
+    parser.add_argument('--secret-key', default=os.getenv('FLASK_SECRET_KEY', 'loadtest-secret-key'),
+                        help="The app's FLASK_SECRET_KEY (used to sign session cookies)")
+    parser.add_argument('--cookie-name', default='session')
+    parser.add_argument('--mock-latency-ms', type=float, default=50, help='Latency of the mock X API')
+    parser.add_argument('--batches', type=int, default=1, help='Sessions that start a 5-target test batch')
+    parser.add_argument('--status-interval', type=float, default=5)
+    parser.add_argument('--rate-limits-interval', type=float, default=10)
+    parser.add_argument('--list-interval', type=float, default=5)
+    parser.add_argument('--operation-interval', type=float, default=2, help='Per active batch status poll')
+    parser.add_argument('--jitter', type=float, default=0.2, help='Fractional timer jitter')
+    parser.add_argument('--no-conditional', dest='conditional', action='store_false',
+                        help='Do not revalidate with If-None-Match')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout')
+    parser.add_argument('--json', dest='json_path', help='Write the full report as JSON')
+    parser.add_argument('--max-p95-ms', type=float, help='Fail if any endpoint p95 exceeds this')
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help='Fail above this error rate')
+    args = parser.parse_args()
+
+    process = None
+    mock = None
+    workdir = None
+    if args.url:
+        args.url = args.url.rstrip('/')
+        server_pid = args.server_pid
+        server_label = args.url
+    else:
+        mock = start_mock_server(latency=args.mock_latency_ms / 1000)
+        workdir = tempfile.mkdtemp(prefix='loadtest-')
+        process = spawn_server(args, workdir, f"http://127.0.0.1:{mock.server_port}/2")
+        args.url = f"http://127.0.0.1:{args.port}"
+        server_pid = process.pid
+        server_label = f"{args.server}, scratch dir {workdir}"
+
+    try:
+        wait_until_ready(args.url, process)
+        monitor = ProcessMonitor(server_pid) if server_pid else None
+        recorder = Recorder()
+        stop_event = threading.Event()
+        browsers = [SimulatedBrowser(index, args, recorder, stop_event) for index in range(args.sessions)]
+
+        if monitor is not None:
+            monitor.start()
+        started = time.perf_counter()
+        threads = []
+        for browser in browsers:
+            thread = threading.Thread(target=browser.run, name=f'browser-{browser.index}', daemon=True)
+            thread.start()
+            threads.append(thread)
+            if args.sessions > 1:
+                time.sleep(args.ramp_up / args.sessions)
+
+        time.sleep(args.duration)
+        stop_event.set()
+        for thread in threads:
+            thread.join(args.timeout)
+        elapsed = time.perf_counter() - started
+        if monitor is not None:
+            monitor.stop()
+
+        result = dict(recorder.report(elapsed), sessions=args.sessions, elapsed_seconds=round(elapsed, 1),
+                      server=server_label, server_resources=monitor.report() if monitor is not None else None,
+                      mock_api_calls=dict(mock.RequestHandlerClass.counts) if mock is not None else None)
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if mock is not None:
+            mock.shutdown()
+
+    print_report(result)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    failures = check_thresholds(result, args)
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""
+Memory diagnostics: deep size accounting of in-process structures and on-demand
+tracemalloc snapshot diffs.
+Sizes are computed by walking containers and plain instance attributes from a
+structure's root, so a report shows where retained operations (their target,
+result and success lists), caches and tracking data actually spend memory.
+tracemalloc only runs between an explicit start and stop, since tracing every
+allocation slows the whole process down.
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+import types
+from collections import deque
+
+# Objects whose size is not attributed to the structure referencing them
+_OPAQUE_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                 types.MethodType, types.CodeType, types.FrameType)
+
+# Allocations made by the diagnostics themselves are left out of diffs
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>')
+]
+
+DIFF_KEY_TYPES = ('lineno', 'filename', 'traceback')
+
+
+def deep_sizeof(obj):
+    """
+    Get the size of an object plus everything reachable through its containers and attributes.
+
+    Each object is counted once. Classes, modules, functions and code are not followed.
+
+    Args:
+        obj: Root object
+
+    Returns:
+        int: Size in bytes
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _OPAQUE_TYPES):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+
+        if isinstance(current, dict):
+            # list() copies in one step, so concurrent writers can't break the walk
+            for key, value in list(current.items()):
+                stack.append(key)
+                stack.append(value)
+        elif isinstance(current, (list, tuple, set, frozenset, deque)):
+            stack.extend(list(current))
+        elif isinstance(current, (str, bytes, bytearray, int, float, bool)) or current is None:
+            continue
+        else:
+            attributes = getattr(current, '__dict__', None)
+            if attributes is not None:
+                stack.append(attributes)
+            for slot in getattr(type(current), '__slots__', ()):
+                if hasattr(current, slot):
+                    stack.append(getattr(current, slot))
+    return total
+
+
+def operation_memory(operations, fields=('usernames', 'results', 'successful_usernames')):
+    """
+    Account the memory of batch operations, per field and per status.
+
+    Args:
+        operations (list): Operation dicts
+        fields (tuple): Fields reported separately (everything else is 'other')
+
+    Returns:
+        dict: {'count', 'bytes', 'fields': {field: bytes}, 'items': {field: entries},
+               'by_status': {status: {'count', 'bytes', 'oldest_end_time'}}}
+    """
+    report = {'count': len(operations), 'bytes': 0, 'fields': dict.fromkeys(fields + ('other',), 0),
+              'items': dict.fromkeys(fields, 0), 'by_status': {}}
+    for operation in operations:
+        size = sys.getsizeof(operation)
+        for key, value in list(operation.items()):
+            value_size = deep_sizeof(value)
+            size += value_size
+            if key in report['items']:
+                report['fields'][key] += value_size
+                report['items'][key] += len(value) if isinstance(value, (list, dict)) else 0
+            else:
+                report['fields']['other'] += value_size + sys.getsizeof(key)
+        report['bytes'] += size
+
+        status = report['by_status'].setdefault(operation.get('status'), {'count': 0, 'bytes': 0, 'oldest_end_time': None})
+        status['count'] += 1
+        status['bytes'] += size
+        end_time = operation.get('end_time')
+        if end_time and (status['oldest_end_time'] is None or end_time < status['oldest_end_time']):
+            status['oldest_end_time'] = end_time
+    return report
+
+
+def process_memory():
+    """
+    Get the process's resident memory and garbage collector counters.
+
+    Returns:
+        dict: {'rss_bytes', 'peak_rss_bytes', 'gc_counts'} (sizes None where unavailable)
+    """
+    info = {'rss_bytes': None, 'peak_rss_bytes': None, 'gc_counts': list(gc.get_count())}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    info['rss_bytes'] = int(line.split()[1]) * 1024
+                elif line.startswith('VmHWM:'):
+                    info['peak_rss_bytes'] = int(line.split()[1]) * 1024
+    except OSError:
+        try:
+            import resource
+            # ru_maxrss is KiB on Linux and bytes on macOS
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            info['peak_rss_bytes'] = peak if sys.platform == 'darwin' else peak * 1024
+        except ImportError:
+            pass
+    return info
+
+
+class TracemallocSnapshots:
+    """Numbered tracemalloc snapshots, taken on demand and compared pairwise."""
+
+    def __init__(self, max_snapshots=4):
+        """
+        Initialize with tracing off.
+
+        Args:
+            max_snapshots (int): Snapshots kept (the oldest is dropped beyond this)
+        """
+        self.max_snapshots = max_snapshots
+        self._snapshots = {}
+        self._next_id = 1
+
+    def start(self, frames=10):
+        """Start tracing allocations (keeping `frames` frames per traceback)."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self):
+        """Stop tracing and drop all snapshots."""
+        self._snapshots.clear()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def status(self):
+        """Describe tracing state and the stored snapshots."""
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            'tracing': tracing,
+            'frames': tracemalloc.get_traceback_limit() if tracing else None,
+            'traced_bytes': current,
+            'traced_peak_bytes': peak,
+            'overhead_bytes': tracemalloc.get_tracemalloc_memory() if tracing else 0,
+            'snapshots': [self._describe(snapshot_id) for snapshot_id in sorted(self._snapshots)]
+        }
+
+    def _describe(self, snapshot_id):
+        snapshot, label, taken_at = self._snapshots[snapshot_id]
+        return {'id': snapshot_id, 'label': label, 'taken_at': taken_at,
+                'traced_bytes': sum(stat.size for stat in snapshot.statistics('filename'))}
+
+    def take(self, label=None):
+        """
+        Take a snapshot now.
+
+        Args:
+            label (str): Optional description
+
+        Returns:
+            dict: Snapshot description ('id', 'label', 'taken_at', 'traced_bytes')
+
+        Raises:
+            RuntimeError: If tracing is not running
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running")
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        snapshot_id = self._next_id
+        self._next_id += 1
+        self._snapshots[snapshot_id] = (snapshot, label, time.time())
+        while len(self._snapshots) > self.max_snapshots:
+            del self._snapshots[min(self._snapshots)]
+        return self._describe(snapshot_id)
+
+    def diff(self, from_id, to_id, key_type='lineno', limit=25):
+        """
+        Compare two snapshots.
+
+        Args:
+            from_id (int): Earlier snapshot
+            to_id (int): Later snapshot
+            key_type (str): Grouping - 'lineno', 'filename' or 'traceback'
+            limit (int): Largest changes returned
+
+        Returns:
+            dict: {'from', 'to', 'size_diff', 'count_diff', 'top': [{'location', 'size_diff', 'size', 'count_diff', 'count'}]}
+
+        Raises:
+            KeyError: If a snapshot ID is unknown
+        """
+        old, _, _ = self._snapshots[from_id]
+        new, _, _ = self._snapshots[to_id]
+        stats = new.compare_to(old, key_type)
+        top = []
+        for stat in stats[:limit]:
+            frames = [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+            top.append({
+                'location': frames if key_type == 'traceback' else frames[0],
+                'size_diff': stat.size_diff,
+                'size': stat.size,
+                'count_diff': stat.count_diff,
+                'count': stat.count
+            })
+        return {
+            'from': self._describe(from_id),
+            'to': self._describe(to_id),
+            'size_diff': sum(stat.size_diff for stat in stats),
+            'count_diff': sum(stat.count_diff for stat in stats),
+            'top': top
+        }
@@ -0,0 +1,160 @@
+"""
+Mock X API v2 for load tests and local runs.
+Serves the endpoints the app calls (user info, username lookup, unfollow,
+following/followers pages, token refresh) with plausible bodies and rate-limit
+headers that never run out, plus an optional artificial latency. Point the app
+at it with X_API_BASE_URL:
+
+    python mock_x_api.py --port 5050 --latency-ms 80
+    X_API_BASE_URL=http://127.0.0.1:5050/2 python app.py
+"""
+
+import argparse
+import json
+import logging
+import re
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Window limits reported per endpoint (remaining never drops, so the app is never throttled)
+RATE_LIMITS = {'user_lookup': 300, 'unfollow': 50, 'following': 15, 'followers': 15, 'general': 300}
+
+MOCK_ACCOUNT_ID = '1000000000'
+MOCK_LIST_SIZE = 5000       # Accounts in each mocked following / followers list
+
+USER_ME = re.compile(r'^/2/users/me$')
+USER_BY_USERNAME = re.compile(r'^/2/users/by/username/([A-Za-z0-9_]+)$')
+UNFOLLOW = re.compile(r'^/2/users/(\d+)/following/(\d+)$')
+RELATION_PAGE = re.compile(r'^/2/users/(\d+)/(following|followers)$')
+
+
+def mock_user_id(username):
+    """Stable numeric ID for a handle."""
+    return str(10 ** 9 + zlib.crc32(username.lower().encode()))
+
+
+class MockXAPIHandler(BaseHTTPRequestHandler):
+    """Routes requests to canned X API responses."""
+
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    counts = {}
+    counts_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _count(self, name):
+        with self.counts_lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def _reply(self, status, body, endpoint_type='general'):
+        if self.latency:
+            time.sleep(self.latency)
+        payload = json.dumps(body).encode()
+        limit = RATE_LIMITS.get(endpoint_type, 300)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('x-rate-limit-limit', str(limit))
+        self.send_header('x-rate-limit-remaining', str(limit - 1))
+        self.send_header('x-rate-limit-reset', str(int(time.time()) + 900))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if USER_ME.match(url.path):
+            self._count('users_me')
+            return self._reply(200, {'data': {'id': MOCK_ACCOUNT_ID, 'name': 'Load Test', 'username': 'loadtest'}},
+                               'user_lookup')
+
+        match = USER_BY_USERNAME.match(url.path)
+        if match:
+            self._count('lookup')
+            username = match.group(1)
+            # Handles starting with "missing" exercise the not-found path
+            if username.lower().startswith('missing'):
+                return self._reply(200, {'errors': [{'detail': f'Could not find user with username: [{username}].'}]},
+                                   'user_lookup')
+            return self._reply(200, {'data': {'id': mock_user_id(username), 'username': username}}, 'user_lookup')
+
+        match = RELATION_PAGE.match(url.path)
+        if match:
+            relation = match.group(2)
+            self._count(relation)
+            query = parse_qs(url.query)
+            page_size = min(int(query.get('max_results', ['1000'])[0]), 1000)
+            start = int(query.get('pagination_token', ['0'])[0])
+            end = min(start + page_size, MOCK_LIST_SIZE)
+            # Followers overlap the first half of following, so scans find non-mutuals
+            offset = 0 if relation == 'following' else MOCK_LIST_SIZE // 2
+            users = [{'id': str(2 * 10 ** 9 + offset + n), 'username': f'user{offset + n}'} for n in range(start, end)]
+            meta = {'result_count': len(users)}
+            if end < MOCK_LIST_SIZE:
+                meta['next_token'] = str(end)
+            return self._reply(200, {'data': users, 'meta': meta}, relation)
+
+        self._reply(404, {'title': 'Not Found Error', 'detail': f'No mock for GET {url.path}'})
+
+    def do_DELETE(self):
+        url = urlparse(self.path)
+        if UNFOLLOW.match(url.path):
+            self._count('unfollow')
+            return self._reply(200, {'data': {'following': False}}, 'unfollow')
+        self._reply(404, {'title': 'Not Found Error', 'detail': f'No mock for DELETE {url.path}'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if url.path == '/2/oauth2/token':
+            self._count('token')
+            return self._reply(200, {'access_token': 'mock-access-token', 'refresh_token': 'mock-refresh-token',
+                                     'expires_in': 7200, 'token_type': 'bearer'})
+        self._reply(404, {'title': 'Not Found Error', 'detail': f'No mock for POST {url.path}'})
+
+
+def start_mock_server(host='127.0.0.1', port=0, latency=0.0):
+    """
+    Start the mock API on a background thread.
+
+    Args:
+        host (str): Bind address
+        port (int): Port (0 = pick a free one)
+        latency (float): Seconds added to every response
+
+    Returns:
+        ThreadingHTTPServer: Running server (base URL: f"http://{host}:{server.server_port}/2")
+    """
+    handler = type('ConfiguredMockXAPIHandler', (MockXAPIHandler,), {'latency': latency, 'counts': {}})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='mock-x-api', daemon=True).start()
+    return server
+
+
+def main():
+    """Run the mock API in the foreground."""
+    parser = argparse.ArgumentParser(description='Mock X API v2 server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5050)
+    parser.add_argument('--latency-ms', type=float, default=0, help='Artificial latency per response')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = start_mock_server(args.host, args.port, args.latency_ms / 1000)
+    logging.info(f"Mock X API listening on http://{args.host}:{server.server_port}/2")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
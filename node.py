@@ -0,0 +1,44 @@
+"""
+Headless batch execution node for lease mode.
+Claims per-account execution lanes from the shared store and drives their queues
+without serving HTTP. Run any number of nodes on the same host as the web
+workers, against the same shared store and archive (both are local SQLite files;
+the store refuses processes from another host):
+
+    SHARED_STATE_ENABLED=true LEASE_MODE_ENABLED=true NODE_ID=node-1 python node.py
+    SHARED_STATE_ENABLED=true LEASE_MODE_ENABLED=true NODE_ID=node-2 python node.py
+"""
+
+import logging
+import os
+import sys
+
+import app as web_app
+from config import SHARED_STATE_ENABLED, LEASE_MODE_ENABLED
+
+
+def main():
+    """Run the lease node loop in the foreground."""
+    if not (SHARED_STATE_ENABLED and LEASE_MODE_ENABLED):
+        logging.error("node.py requires SHARED_STATE_ENABLED=true and LEASE_MODE_ENABLED=true")
+        return 1
+
+    # Claim the executor slot so a stray request hook never starts a second loop
+    with web_app.executor_lock:
+        web_app.executor_state['pid'] = os.getpid()
+
+    logging.info(f"Starting batch node {web_app.executor_identity()}")
+    try:
+        web_app.lease_node_loop()
+    except KeyboardInterrupt:
+        # Lanes with a running batch are left to expire so the in-flight checkpoint stays fenced
+        with web_app.lanes_lock:
+            idle = [uid for uid, lane in web_app.held_lanes.items() if lane['operation_id'] is None]
+        for user_id in idle:
+            web_app.shared_state.release_lease(web_app.account_lease_name(user_id), web_app.executor_identity())
+        logging.info("Batch node stopped")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""
+On-demand wall-clock sampling profiler and per-route request timing.
+The profiler runs in its own thread for a bounded number of seconds, sampling the
+stacks of every other thread (Flask request threads, batch and scan workers) with
+sys._current_frames(). Results are available as collapsed stacks (for flamegraph
+tools), as a pstats dump synthesized from the samples (for pstats / snakeviz), or
+as a JSON summary. Nothing is hooked into the interpreter, so there is no cost at
+all when no profile is running.
+
+Route timing records request durations for selected routes while enabled; when
+disabled it costs one attribute check per request.
+"""
+
+import marshal
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+MAX_STACK_DEPTH = 128
+ROUTE_TIMING_SAMPLES = 5000     # Most recent durations kept per route for percentiles
+
+
+def thread_group(name):
+    """Group a thread name into a stable flamegraph root (request / batch_worker / scan_worker / ...)."""
+    if name.startswith('batch-'):
+        return 'batch_worker'
+    if name.startswith('scan-'):
+        return 'scan_worker'
+    if 'process_request_thread' in name:
+        return 'request'
+    return re.sub(r'\d+', 'N', name)
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})"
+
+
+def _pstats_key(code):
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+class SamplingProfiler:
+    """Samples all thread stacks at a fixed interval for a bounded duration."""
+
+    def __init__(self, route_timer=None):
+        """
+        Initialize an idle profiler.
+
+        Args:
+            route_timer (RouteTimer): Timer enabled for the duration of each profile (optional)
+        """
+        self.route_timer = route_timer
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._samples = Counter()   # (thread group, code objects root->leaf) -> seconds
+        self._counts = Counter()    # same key -> number of samples
+        self.started_at = None
+        self.ended_at = None
+        self.seconds = None
+        self.interval = None
+
+    @property
+    def running(self):
+        """Whether a profile is being collected."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds, interval):
+        """
+        Start a new profile, discarding the previous one.
+
+        Args:
+            seconds (float): How long to sample
+            interval (float): Seconds between samples
+
+        Returns:
+            bool: False if a profile is already running
+        """
+        with self._lock:
+            if self.running:
+                return False
+            self._samples = Counter()
+            self._counts = Counter()
+            self.started_at = time.time()
+            self.ended_at = None
+            self.seconds = seconds
+            self.interval = interval
+            self._stop.clear()
+            if self.route_timer is not None:
+                self.route_timer.start_session()
+            self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop the running profile early (results are kept)."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        deadline = time.perf_counter() + self.seconds
+        last = time.perf_counter()
+        try:
+            while not self._stop.is_set() and time.perf_counter() < deadline:
+                self._stop.wait(self.interval)
+                now = time.perf_counter()
+                weight, last = now - last, now
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                frames = sys._current_frames()
+                batch = []
+                for ident, frame in frames.items():
+                    if ident == own_ident:
+                        continue
+                    stack = []
+                    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                        stack.append(frame.f_code)
+                        frame = frame.f_back
+                    stack.reverse()
+                    batch.append((thread_group(names.get(ident, 'unknown')), tuple(stack)))
+                del frames
+                with self._lock:
+                    for key in batch:
+                        self._samples[key] += weight
+                        self._counts[key] += 1
+        finally:
+            self.ended_at = time.time()
+            if self.route_timer is not None:
+                self.route_timer.end_session()
+
+    def _copy(self):
+        with self._lock:
+            return Counter(self._samples), Counter(self._counts)
+
+    def status(self):
+        """Describe the current or last profile."""
+        _, counts = self._copy()
+        return {
+            'running': self.running,
+            'started_at': self.started_at,
+            'ended_at': self.ended_at,
+            'seconds': self.seconds,
+            'interval_ms': round(self.interval * 1000, 3) if self.interval else None,
+            'stack_samples': sum(counts.values())
+        }
+
+    def collapsed(self):
+        """
+        Render samples as collapsed stacks ("root;frame;frame count" lines, counts in samples).
+
+        Returns:
+            str: Input for flamegraph.pl / speedscope / inferno
+        """
+        _, counts = self._copy()
+        lines = Counter()
+        for (group, stack), count in counts.items():
+            lines[';'.join([group] + [_frame_label(code) for code in stack])] += count
+        return ''.join(f"{line} {count}\n" for line, count in sorted(lines.items()))
+
+    def _function_stats(self):
+        """Aggregate samples per function: {key: [samples, self s, cumulative s, caller samples, caller s]}."""
+        samples, counts = self._copy()
+        stats = {}
+        for key, seconds in samples.items():
+            stack = key[1]
+            count = counts[key]
+            seen = set()
+            for depth, code in enumerate(stack):
+                func = _pstats_key(code)
+                entry = stats.setdefault(func, [0, 0.0, 0.0, Counter(), Counter()])
+                if func not in seen:
+                    # Recursive frames count once toward cumulative time
+                    seen.add(func)
+                    entry[0] += count
+                    entry[2] += seconds
+                if depth + 1 == len(stack):
+                    entry[1] += seconds
+                if depth > 0:
+                    caller = _pstats_key(stack[depth - 1])
+                    entry[3][caller] += count
+                    entry[4][caller] += seconds
+        return stats
+
+    def pstats_dump(self):
+        """
+        Render samples as a marshalled pstats profile (sample counts stand in for call counts).
+
+        Returns:
+            bytes: Loadable with pstats.Stats(path) or snakeviz
+        """
+        dump = {}
+        for func, (count, own, cumulative, caller_counts, caller_seconds) in self._function_stats().items():
+            callers = {caller: (n, n, 0.0, caller_seconds[caller]) for caller, n in caller_counts.items()}
+            dump[func] = (count, count, own, cumulative, callers)
+        return marshal.dumps(dump)
+
+    def summary(self, top=30):
+        """
+        Summarize the profile as the hottest functions by self and cumulative time.
+
+        Args:
+            top (int): Functions per list
+
+        Returns:
+            dict: Status plus 'threads' (seconds sampled per thread group), 'self' and 'cumulative' lists
+        """
+        samples, _ = self._copy()
+        threads = Counter()
+        for (group, _), seconds in samples.items():
+            threads[group] += seconds
+
+        def row(func, entry):
+            filename, line, name = func
+            return {'function': name, 'file': filename, 'line': line, 'samples': entry[0],
+                    'self_seconds': round(entry[1], 4), 'cumulative_seconds': round(entry[2], 4)}
+
+        stats = self._function_stats()
+        by_self = sorted(stats.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        by_cumulative = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+        return dict(self.status(),
+                    threads={group: round(seconds, 3) for group, seconds in threads.most_common()},
+                    self=[row(func, entry) for func, entry in by_self if entry[1] > 0],
+                    cumulative=[row(func, entry) for func, entry in by_cumulative])
+
+
+class RouteTimer:
+    """Duration statistics per route, collected only while enabled."""
+
+    def __init__(self, routes, always_on=False):
+        """
+        Initialize timing for a set of routes.
+
+        Args:
+            routes (iterable): URL rules to time (e.g. '/status')
+            always_on (bool): Keep timing between profiling sessions
+        """
+        self.routes = frozenset(routes)
+        self.always_on = always_on
+        self.enabled = always_on
+        self.since = time.time() if always_on else None
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def start_session(self):
+        """Reset statistics and start timing."""
+        with self._lock:
+            self._routes = {}
+            self.since = time.time()
+        self.enabled = True
+
+    def end_session(self):
+        """Stop timing (unless always on); statistics are kept."""
+        if not self.always_on:
+            self.enabled = False
+
+    def record(self, rule, seconds, status_code):
+        """Record one request to a timed route (other routes are ignored)."""
+        if rule not in self.routes:
+            return
+        with self._lock:
+            entry = self._routes.get(rule)
+            if entry is None:
+                entry = self._routes[rule] = {'count': 0, 'total': 0.0, 'max': 0.0, 'statuses': Counter(),
+                                              'recent': deque(maxlen=ROUTE_TIMING_SAMPLES)}
+            entry['count'] += 1
+            entry['total'] += seconds
+            entry['max'] = max(entry['max'], seconds)
+            entry['statuses'][status_code] += 1
+            entry['recent'].append(seconds)
+
+    def snapshot(self):
+        """
+        Get per-route statistics.
+
+        Returns:
+            dict: {'enabled', 'since', 'routes': {rule: count, mean/max and p50/p95/p99 in ms, status counts}}
+        """
+        with self._lock:
+            entries = {rule: dict(entry, statuses=dict(entry['statuses']), recent=sorted(entry['recent']))
+                       for rule, entry in self._routes.items()}
+
+        def percentile(values, fraction):
+            return round(values[min(int(len(values) * fraction), len(values) - 1)] * 1000, 3)
+
+        routes = {}
+        for rule, entry in entries.items():
+            recent = entry['recent']
+            routes[rule] = {
+                'count': entry['count'],
+                'mean_ms': round(entry['total'] / entry['count'] * 1000, 3),
+                'max_ms': round(entry['max'] * 1000, 3),
+                'p50_ms': percentile(recent, 0.5),
+                'p95_ms': percentile(recent, 0.95),
+                'p99_ms': percentile(recent, 0.99),
+                'statuses': {str(code): count for code, count in entry['statuses'].items()}
+            }
+        return {'enabled': self.enabled, 'since': self.since, 'routes': routes}
@@ -0,0 +1,114 @@
+"""
+On-disk persistence for X API rate-limit windows.
+Keeps per-account, per-endpoint remaining/limit/reset state across restarts so
+the client never fires requests into a window it already knows is exhausted.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+
+def is_window_expired(info, now=None):
+    """Check whether a rate-limit window's reset time has passed."""
+    reset = info.get('reset') or 0
+    return not isinstance(reset, (int, float)) or reset <= (now or time.time())
+
+
+class RateLimitFileStore:
+    """JSON file store for rate-limit state, keyed by account then endpoint."""
+
+    def __init__(self, path):
+        """
+        Initialize rate-limit store and load persisted windows.
+
+        Args:
+            path (str): JSON file holding the persisted state
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = self._read()
+
+    def _read(self):
+        """Read persisted state, dropping windows that expired while the app was down."""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    state = json.load(f)
+            else:
+                return {}
+        except Exception as e:
+            logging.error(f"Error loading rate limit state: {str(e)}")
+            return {}
+
+        now = time.time()
+        live = {}
+        for account, endpoints in state.items():
+            kept = {endpoint: info for endpoint, info in endpoints.items() if not is_window_expired(info, now)}
+            if kept:
+                live[account] = kept
+
+        restored = sum(len(endpoints) for endpoints in live.values())
+        logging.info(f"Restored {restored} live rate limit windows from {self.path}")
+        return live
+
+    def _write(self):
+        """Atomically write state to disk (temp file + rename)."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self.path)
+
+    def load_rate_limits(self, account):
+        """
+        Get live rate-limit windows for an account.
+
+        Args:
+            account (str): Account key
+
+        Returns:
+            dict: endpoint -> {'remaining', 'limit', 'reset'}
+        """
+        now = time.time()
+        with self._lock:
+            endpoints = self._state.get(str(account), {})
+            expired = [endpoint for endpoint, info in endpoints.items() if is_window_expired(info, now)]
+            for endpoint in expired:
+                del endpoints[endpoint]
+            return {endpoint: dict(info) for endpoint, info in endpoints.items()}
+
+    def all_rate_limits(self):
+        """Get live rate-limit windows for every account: account -> endpoint -> info."""
+        now = time.time()
+        with self._lock:
+            return {
+                account: {endpoint: dict(info) for endpoint, info in endpoints.items() if not is_window_expired(info, now)}
+                for account, endpoints in self._state.items()
+            }
+
+    def save_rate_limits(self, account, rate_limits):
+        """
+        Persist rate-limit windows for an account.
+
+        Args:
+            account (str): Account key
+            rate_limits (dict): endpoint -> {'remaining', 'limit', 'reset'}
+        """
+        with self._lock:
+            endpoints = self._state.setdefault(str(account), {})
+            for endpoint, info in rate_limits.items():
+                if is_window_expired(info):
+                    endpoints.pop(endpoint, None)
+                else:
+                    endpoints[endpoint] = {
+                        'remaining': info.get('remaining'),
+                        'limit': info.get('limit'),
+                        'reset': info.get('reset'),
+                        'updated_at': time.time()
+                    }
+            try:
+                self._write()
+            except Exception as e:
+                logging.error(f"Error saving rate limit state: {str(e)}")
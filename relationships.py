@@ -0,0 +1,277 @@
+"""
+Non-mutual candidate generation from the following and followers lists.
+Scans both lists page by page into SQLite (so memory stays bounded at one page
+for accounts following 100k+ users), checkpoints the pagination token with each
+page so an interrupted scan resumes where it stopped when it is requested again
+(scans are not restarted automatically after a restart), and computes "following
+but not followed back" as a set difference over integer user IDs.
+"""
+
+import sqlite3
+import threading
+import time
+
+# Scan phases, in order - each list is read in a single pass
+SCAN_PHASES = ('following', 'followers', 'done')
+
+# Scan statuses that mean a worker should be driving the scan
+ACTIVE_SCAN_STATUSES = ('running', 'waiting_for_rate_limit_reset')
+
+
+class RelationshipScanStore:
+    """SQLite store for relationship scans and their collected user IDs."""
+
+    def __init__(self, db_path):
+        """
+        Initialize relationship scan store.
+
+        Args:
+            db_path (str): SQLite database file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._init_schema()
+
+    def _init_schema(self):
+        """Create scan tables."""
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS scans (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    phase TEXT NOT NULL,
+                    next_token TEXT,
+                    pages INTEGER NOT NULL DEFAULT 0,
+                    following_count INTEGER NOT NULL DEFAULT 0,
+                    followers_count INTEGER NOT NULL DEFAULT 0,
+                    wait_until REAL,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scans_user ON scans (user_id, created_at)")
+            # Integer IDs in a WITHOUT ROWID table: compact, and already sorted for the EXCEPT
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS scan_ids (
+                    scan_id TEXT NOT NULL,
+                    relation TEXT NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    username TEXT,
+                    PRIMARY KEY (scan_id, relation, user_id)
+                ) WITHOUT ROWID
+            """)
+
+    def create_scan(self, scan_id, user_id):
+        """
+        Create a new scan starting at the first following page.
+
+        Args:
+            scan_id (str): Scan identifier
+            user_id (str): Account being scanned
+
+        Returns:
+            dict: The new scan
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO scans (id, user_id, status, phase, created_at, updated_at) VALUES (?, ?, 'running', ?, ?, ?)",
+                (scan_id, str(user_id), SCAN_PHASES[0], now, now)
+            )
+        return self.get_scan(scan_id)
+
+    def get_scan(self, scan_id):
+        """Get a scan by ID, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM scans WHERE id = ?", (scan_id,)).fetchone()
+        return dict(row) if row else None
+
+    def latest_scan(self, user_id, status=None):
+        """Get the most recent scan for an account (optionally only with a given status), or None."""
+        with self._lock:
+            if status is None:
+                row = self._conn.execute(
+                    "SELECT * FROM scans WHERE user_id = ? ORDER BY created_at DESC LIMIT 1", (str(user_id),)
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT * FROM scans WHERE user_id = ? AND status = ? ORDER BY created_at DESC LIMIT 1",
+                    (str(user_id), status)
+                ).fetchone()
+        return dict(row) if row else None
+
+    def record_page(self, scan_id, relation, users, next_token):
+        """
+        Store one page of IDs and advance the checkpoint in the same transaction.
+
+        Args:
+            scan_id (str): Scan identifier
+            relation (str): 'following' or 'followers' (must be the scan's current phase)
+            users (list): [{'id', 'username'}] from the page
+            next_token (str): Pagination token for the next page, None after the last page
+        """
+        rows = [(scan_id, relation, int(user['id']), user.get('username')) for user in users]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO scan_ids (scan_id, relation, user_id, username) VALUES (?, ?, ?, ?)", rows
+            )
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM scan_ids WHERE scan_id = ? AND relation = ?", (scan_id, relation)
+            ).fetchone()[0]
+
+            if next_token:
+                phase = relation
+            else:
+                phase = SCAN_PHASES[SCAN_PHASES.index(relation) + 1]
+            status = 'completed' if phase == 'done' else 'running'
+
+            self._conn.execute(f"""
+                UPDATE scans SET phase = ?, next_token = ?, pages = pages + 1, {relation}_count = ?,
+                    status = ?, wait_until = NULL, error = NULL, updated_at = ?
+                WHERE id = ?
+            """, (phase, next_token, count, status, time.time(), scan_id))
+
+    def import_relation(self, scan_id, relation, ids):
+        """
+        Load a complete list from another source (e.g. a snapshot) and advance past its phase.
+
+        Args:
+            scan_id (str): Scan identifier
+            relation (str): 'following' or 'followers' (must be the scan's current phase)
+            ids (iterable): Integer user IDs (streamed into the store)
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO scan_ids (scan_id, relation, user_id) VALUES (?, ?, ?)",
+                ((scan_id, relation, int(user_id)) for user_id in ids)
+            )
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM scan_ids WHERE scan_id = ? AND relation = ?", (scan_id, relation)
+            ).fetchone()[0]
+            phase = SCAN_PHASES[SCAN_PHASES.index(relation) + 1]
+            self._conn.execute(f"""
+                UPDATE scans SET phase = ?, next_token = NULL, {relation}_count = ?,
+                    status = ?, updated_at = ?
+                WHERE id = ?
+            """, (phase, count, 'completed' if phase == 'done' else 'running', time.time(), scan_id))
+
+    def iter_ids(self, scan_id, relation, chunk_size=10000):
+        """
+        Stream a scan's IDs for one list in ascending order (keyset-paged, bounded memory).
+
+        Args:
+            scan_id (str): Scan identifier
+            relation (str): 'following' or 'followers'
+            chunk_size (int): IDs read per query
+
+        Yields:
+            int: User IDs in ascending order
+        """
+        last_id = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT user_id FROM scan_ids WHERE scan_id = ? AND relation = ? AND user_id > ? "
+                    "ORDER BY user_id LIMIT ?", (scan_id, relation, last_id, chunk_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row['user_id']
+            last_id = rows[-1]['user_id']
+
+    def set_status(self, scan_id, status, wait_until=None, error=None):
+        """Update a scan's status (pagination checkpoint is kept)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE scans SET status = ?, wait_until = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, wait_until, error, time.time(), scan_id)
+            )
+
+    def non_mutuals(self, scan_id, limit=100, offset=0):
+        """
+        Get accounts followed but not following back, in ID order.
+
+        Args:
+            scan_id (str): Completed scan identifier
+            limit (int): Page size
+            offset (int): Page offset
+
+        Returns:
+            list: [{'id', 'username'}]
+        """
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT f.user_id, f.username FROM scan_ids f
+                WHERE f.scan_id = ? AND f.relation = 'following'
+                  AND NOT EXISTS (
+                      SELECT 1 FROM scan_ids b
+                      WHERE b.scan_id = f.scan_id AND b.relation = 'followers' AND b.user_id = f.user_id
+                  )
+                ORDER BY f.user_id
+                LIMIT ? OFFSET ?
+            """, (scan_id, int(limit), int(offset))).fetchall()
+        return [{'id': str(row['user_id']), 'username': row['username']} for row in rows]
+
+    def following_membership(self, scan_id, ids, handles, chunk_size=500):
+        """
+        Check which IDs and handles a scan's following list contains.
+
+        Args:
+            scan_id (str): Scan identifier
+            ids (list): Numeric user IDs
+            handles (list): Lowercased handles
+            chunk_size (int): Values per query
+
+        Returns:
+            tuple: (set of contained IDs as str, set of contained handles, whether the
+                    list carries usernames at all - lists imported from snapshots don't)
+        """
+        found_ids = set()
+        found_handles = set()
+        with self._lock:
+            for start in range(0, len(ids), chunk_size):
+                chunk = [int(user_id) for user_id in ids[start:start + chunk_size]]
+                rows = self._conn.execute(f"""
+                    SELECT user_id FROM scan_ids WHERE scan_id = ? AND relation = 'following'
+                      AND user_id IN ({','.join('?' * len(chunk))})
+                """, [scan_id] + chunk).fetchall()
+                found_ids.update(str(row['user_id']) for row in rows)
+            has_usernames = self._conn.execute("""
+                SELECT 1 FROM scan_ids WHERE scan_id = ? AND relation = 'following' AND username IS NOT NULL LIMIT 1
+            """, (scan_id,)).fetchone() is not None
+            if has_usernames:
+                for start in range(0, len(handles), chunk_size):
+                    chunk = list(handles[start:start + chunk_size])
+                    rows = self._conn.execute(f"""
+                        SELECT LOWER(username) AS handle FROM scan_ids WHERE scan_id = ? AND relation = 'following'
+                          AND LOWER(username) IN ({','.join('?' * len(chunk))})
+                    """, [scan_id] + chunk).fetchall()
+                    found_handles.update(row['handle'] for row in rows)
+        return found_ids, found_handles, has_usernames
+
+    def count_non_mutuals(self, scan_id):
+        """Count accounts followed but not following back."""
+        with self._lock:
+            return self._conn.execute("""
+                SELECT COUNT(*) FROM (
+                    SELECT user_id FROM scan_ids WHERE scan_id = ? AND relation = 'following'
+                    EXCEPT
+                    SELECT user_id FROM scan_ids WHERE scan_id = ? AND relation = 'followers'
+                )
+            """, (scan_id, scan_id)).fetchone()[0]
+
+    def delete_scans(self, user_id, keep_scan_id=None):
+        """Delete an account's scans (and their IDs), optionally keeping one."""
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id FROM scans WHERE user_id = ? AND id != ?", (str(user_id), keep_scan_id or '')
+            ).fetchall()
+            for row in rows:
+                self._conn.execute("DELETE FROM scan_ids WHERE scan_id = ?", (row['id'],))
+                self._conn.execute("DELETE FROM scans WHERE id = ?", (row['id'],))
+        return len(rows)
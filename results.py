@@ -0,0 +1,69 @@
+"""
+Per-target results of a batch, paged with a cursor.
+Results are kept in processing order, so a result's position is a stable cursor:
+pages are read by walking forward from it (with outcome / error-class filters)
+instead of copying or sorting the whole list.
+"""
+
+from itertools import islice
+
+# Outcome of a single target, derived from its result record
+RESULT_OUTCOMES = ('success', 'failed', 'skipped', 'interrupted')
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def result_outcome(result):
+    """Get the outcome of a result record ('success', 'failed', 'skipped' or 'interrupted')."""
+    if result.get('success'):
+        return 'success'
+    if result.get('skipped'):
+        return 'skipped'
+    if result.get('interrupted'):
+        return 'interrupted'
+    return 'failed'
+
+
+def decode_cursor(cursor):
+    """
+    Turn a cursor from a previous page into a result position.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if cursor is None or cursor == '':
+        return 0
+    position = int(cursor)
+    if position < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return position
+
+
+def page_results(results, cursor=None, limit=DEFAULT_PAGE_SIZE, outcome=None, error_type=None):
+    """
+    Read one page of results, starting at a cursor.
+
+    Args:
+        results (list): Result records in processing order
+        cursor (str): Cursor from the previous page (None for the first page)
+        limit (int): Maximum results to return
+        outcome (str): Optional outcome filter (one of RESULT_OUTCOMES)
+        error_type (str): Optional classified error filter (e.g. 'user_specific')
+
+    Returns:
+        dict: {'results': [records with 'index' and 'outcome'], 'next_cursor': cursor or None}
+    """
+    start = decode_cursor(cursor)
+    page = []
+    for position, result in enumerate(islice(results, start, None), start):
+        result_class = result_outcome(result)
+        if outcome and result_class != outcome:
+            continue
+        if error_type and result.get('error_type') != error_type:
+            continue
+        if len(page) == limit:
+            # One more match exists - the next page starts here
+            return {'results': page, 'next_cursor': str(position)}
+        page.append(dict(result, index=position, outcome=result_class))
+    return {'results': page, 'next_cursor': None}
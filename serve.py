@@ -0,0 +1,66 @@
+"""
+Cooperative (green-thread) server for the web app.
+Monkey-patches the standard library before anything else is imported, so the
+batch worker and scan threads, their 1-second waits, the Python-level store locks
+and the blocking `requests` client all yield to the event loop. Running batches
+and thousands of idle status streams (/unfollow/slow-batch/<id>/events) then
+share one process.
+
+SQLite calls do not yield: they run in C and block the hub while they execute.
+The shared store (SHARED_STATE_ENABLED) therefore shares one connection per OS
+thread between its greenlets, and waits for the write lock with short cooperative
+sleeps instead of SQLite's blocking busy timeout:
+
+    python serve.py                               # gevent
+    COOPERATIVE_SERVER=eventlet python serve.py   # eventlet
+"""
+
+import os
+import sys
+
+SERVER = os.getenv("COOPERATIVE_SERVER", "gevent").lower()
+
+# Patch before importing anything that touches sockets, threads or time (requests, app)
+if SERVER == 'gevent':
+    try:
+        from gevent import monkey
+    except ImportError:
+        sys.exit("COOPERATIVE_SERVER=gevent requires the gevent package (pip install gevent)")
+    monkey.patch_all()
+elif SERVER == 'eventlet':
+    try:
+        import eventlet
+    except ImportError:
+        sys.exit("COOPERATIVE_SERVER=eventlet requires the eventlet package (pip install eventlet)")
+    eventlet.monkey_patch()
+else:
+    sys.exit(f"Unknown COOPERATIVE_SERVER '{SERVER}' (expected gevent or eventlet)")
+
+import logging
+
+import app as web_app
+from config import DEV_SERVER_HOST, DEV_SERVER_PORT, COOPERATIVE_MAX_CONNECTIONS
+
+
+def main():
+    """Serve the app on a green-thread WSGI server until interrupted."""
+    host = os.getenv("HOST", DEV_SERVER_HOST)
+    port = int(os.getenv("PORT", DEV_SERVER_PORT))
+    logging.info(f"Starting X Unfollow app on {SERVER} at {host}:{port} (max {COOPERATIVE_MAX_CONNECTIONS} connections)")
+
+    try:
+        if SERVER == 'gevent':
+            from gevent.pool import Pool
+            from gevent.pywsgi import WSGIServer
+            WSGIServer((host, port), web_app.app, spawn=Pool(COOPERATIVE_MAX_CONNECTIONS), log=None).serve_forever()
+        else:
+            from eventlet import wsgi
+            wsgi.server(eventlet.listen((host, port)), web_app.app,
+                        max_size=COOPERATIVE_MAX_CONNECTIONS, log_output=False)
+    except KeyboardInterrupt:
+        logging.info("Server stopped")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
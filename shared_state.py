@@ -0,0 +1,695 @@
+"""
+Process-shared state for multi-worker deployments.
+SQLite (WAL mode) store for batch operations, the batch queue, rate-limit
+counters, and leases used to elect a single batch executor.
+"""
+
+import sqlite3
+import sys
+import threading
+import logging
+import json
+import time
+from rate_limit_store import is_window_expired
+from admin import operation_summary
+from results import decode_cursor
+
+# Operation statuses that still need (or are receiving) worker time
+ACTIVE_STATUSES = ('queued', 'starting', 'running', 'waiting_for_rate_limit_reset')
+
+# Cooperative mode: SQLite's own busy wait (per attempt) - it runs in C and blocks the whole hub
+COOPERATIVE_BUSY_TIMEOUT_MS = 50
+COOPERATIVE_RETRY_INTERVAL = 0.01
+
+
+def cooperative_thread_ident():
+    """
+    Get the real OS thread ident function if gevent or eventlet has monkey-patched threading
+    (serve.py), else None. Once patched, threading.local and get_ident are per greenlet.
+    """
+    gevent_monkey = sys.modules.get('gevent.monkey')
+    if gevent_monkey is not None and gevent_monkey.is_module_patched('threading'):
+        return gevent_monkey.get_original('_thread', 'get_ident')
+    eventlet_patcher = sys.modules.get('eventlet.patcher')
+    if eventlet_patcher is not None and eventlet_patcher.is_monkey_patched('thread'):
+        return eventlet_patcher.original('_thread').get_ident
+    return None
+
+
+class LeaseLostError(Exception):
+    """Raised when a fenced write is attempted by a node that no longer holds the lease."""
+
+
+class SharedStateStore:
+    """SQLite WAL store shared by every process serving the app."""
+
+    def __init__(self, db_path, busy_timeout_ms=5000):
+        """
+        Initialize shared state store.
+
+        Args:
+            db_path (str): SQLite database file shared by all processes
+            busy_timeout_ms (int): How long to wait on a locked database
+        """
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._thread_ident = cooperative_thread_ident()
+        self._shared_connections = {}  # OS thread ident -> (connection, transaction lock), cooperative mode
+        self._shared_connections_lock = threading.Lock()
+        self._init_schema()
+
+    def _open(self, busy_timeout_ms):
+        conn = sqlite3.connect(self.db_path, timeout=busy_timeout_ms / 1000, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        return conn
+
+    def _connect(self):
+        """Get this thread's connection (sqlite3 connections are not shared across threads)."""
+        if self._thread_ident is not None:
+            return self._cooperative_connection()[0]
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._open(self.busy_timeout_ms)
+        return conn
+
+    def _cooperative_connection(self):
+        """
+        Get the connection shared by every greenlet on this OS thread, and the lock that keeps
+        their transactions from interleaving (a greenlet-local one per request would never be closed).
+        """
+        ident = self._thread_ident()
+        entry = self._shared_connections.get(ident)
+        if entry is None:
+            with self._shared_connections_lock:
+                entry = self._shared_connections.get(ident)
+                if entry is None:
+                    entry = (self._open(COOPERATIVE_BUSY_TIMEOUT_MS), threading.Lock())
+                    self._shared_connections[ident] = entry
+        return entry
+
+    def _transaction(self):
+        """Open a write transaction that takes the database write lock up front."""
+        if self._thread_ident is None:
+            return _ImmediateTransaction(self._connect())
+        # Wait for the write lock with cooperative sleeps rather than SQLite's blocking busy timeout
+        conn, lock = self._cooperative_connection()
+        return _ImmediateTransaction(conn, lock, self.busy_timeout_ms / 1000)
+
+    def _init_schema(self):
+        """Create tables and indexes."""
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS operations (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    completion_pending INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL,
+                    data TEXT NOT NULL
+                )
+            """)
+            # Compact summary column for admin views (added to stores created before it existed)
+            columns = [row['name'] for row in conn.execute("PRAGMA table_info(operations)").fetchall()]
+            if 'summary' not in columns:
+                conn.execute("ALTER TABLE operations ADD COLUMN summary TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_operations_user ON operations (user_id, status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_operations_status ON operations (status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_operations_status_updated ON operations (status, updated_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_operations_user_updated ON operations (user_id, updated_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS batch_queue (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    operation_id TEXT UNIQUE NOT NULL,
+                    user_id TEXT NOT NULL,
+                    payload TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limits (
+                    account TEXT NOT NULL,
+                    endpoint TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (account, endpoint)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS leases (
+                    name TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    token INTEGER NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS store_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            """)
+
+    def claim_host(self, host, archive_path):
+        """
+        Pin the store to one host and one archive file.
+
+        SQLite WAL needs every process on the same machine (it coordinates through a
+        shared-memory file, and doesn't work over network filesystems), and finished
+        batches move to the archive, so every process must read the same archive file.
+        The first process records both; any other host or archive path is refused.
+
+        Args:
+            host (str): This machine's name (SHARED_STATE_HOST, defaults to hostname)
+            archive_path (str): Absolute path of this process's archive database
+
+        Raises:
+            RuntimeError: If the store is pinned to another host or archive file
+        """
+        with self._transaction() as conn:
+            for key, value in (('host', host), ('archive_path', archive_path)):
+                row = conn.execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    conn.execute("INSERT INTO store_meta (key, value) VALUES (?, ?)", (key, value))
+                elif row['value'] != value:
+                    raise RuntimeError(
+                        f"Shared store {self.db_path} is pinned to {key} {row['value']!r}, not {value!r}: "
+                        f"all processes must run on one host against the same archive file "
+                        f"(delete the store_meta row to move the store)"
+                    )
+
+    # Operations
+
+    def save_operation(self, operation, completion_pending=False, fence=None):
+        """
+        Upsert an operation snapshot.
+
+        A cancellation written by another process always wins over a worker's
+        snapshot, and the completion flag is only ever raised here (it is
+        consumed by claim_completion).
+
+        Args:
+            operation (dict): Operation state (JSON-serializable)
+            completion_pending (bool): Raise the completion notification flag
+            fence (tuple): Optional (lease name, owner, token) that must still be held
+
+        Raises:
+            LeaseLostError: If `fence` is given and the lease is no longer held
+        """
+        with self._transaction() as conn:
+            if fence is not None:
+                self._check_fence(conn, *fence)
+            self._upsert_operation(conn, operation, completion_pending)
+
+    @staticmethod
+    def _upsert_operation(conn, operation, completion_pending=False):
+        """Write an operation snapshot inside a transaction (see save_operation)."""
+        data = json.dumps(operation, default=str)
+        now = time.time()
+        summary = json.dumps(operation_summary(operation, now), default=str)
+        conn.execute("""
+            INSERT INTO operations (id, user_id, status, completion_pending, updated_at, data, summary)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                status = CASE WHEN operations.status = 'cancelled' THEN 'cancelled' ELSE excluded.status END,
+                completion_pending = MAX(operations.completion_pending, excluded.completion_pending),
+                updated_at = excluded.updated_at,
+                data = excluded.data,
+                summary = excluded.summary
+        """, (operation['id'], str(operation['user_id']), operation['status'],
+              1 if completion_pending else 0, now, data, summary))
+
+    @staticmethod
+    def _row_to_operation(row):
+        operation = json.loads(row['data'])
+        operation['status'] = row['status']
+        operation['completion_pending'] = bool(row['completion_pending'])
+        return operation
+
+    def get_operation(self, operation_id):
+        """Get an operation snapshot, or None."""
+        row = self._connect().execute(
+            "SELECT status, completion_pending, data FROM operations WHERE id = ?", (operation_id,)
+        ).fetchone()
+        return self._row_to_operation(row) if row else None
+
+    def get_status(self, operation_id):
+        """Get only an operation's status (cheap cancellation polling)."""
+        row = self._connect().execute(
+            "SELECT status FROM operations WHERE id = ?", (operation_id,)
+        ).fetchone()
+        return row['status'] if row else None
+
+    def get_updated_at(self, operation_id):
+        """Get when an operation was last written (cheap change detection), or None."""
+        row = self._connect().execute(
+            "SELECT updated_at FROM operations WHERE id = ?", (operation_id,)
+        ).fetchone()
+        return row['updated_at'] if row else None
+
+    def get_owner(self, operation_id):
+        """Get only an operation's account (access checks without loading state)."""
+        row = self._connect().execute(
+            "SELECT user_id FROM operations WHERE id = ?", (operation_id,)
+        ).fetchone()
+        return row['user_id'] if row else None
+
+    def page_results(self, operation_id, cursor=None, limit=100, outcome=None, error_type=None):
+        """
+        Read one page of an operation's results inside SQLite (json_each), without loading the operation.
+
+        Args:
+            operation_id (str): Operation identifier
+            cursor (str): Cursor from the previous page (None for the first page)
+            limit (int): Maximum results to return
+            outcome (str): Optional outcome filter ('success', 'failed', 'skipped', 'interrupted')
+            error_type (str): Optional classified error filter
+
+        Returns:
+            dict: {'results': [records with 'index' and 'outcome'], 'next_cursor': cursor or None}
+        """
+        clauses = ["o.id = ?", "r.key >= ?"]
+        params = [operation_id, decode_cursor(cursor)]
+        if outcome:
+            clauses.append("outcome = ?")
+            params.append(outcome)
+        if error_type:
+            clauses.append("json_extract(r.value, '$.error_type') = ?")
+            params.append(error_type)
+        rows = self._connect().execute(f"""
+            SELECT r.key AS position, r.value AS result,
+                   CASE WHEN json_extract(r.value, '$.success') THEN 'success'
+                        WHEN json_extract(r.value, '$.skipped') THEN 'skipped'
+                        WHEN json_extract(r.value, '$.interrupted') THEN 'interrupted'
+                        ELSE 'failed' END AS outcome
+            FROM operations o, json_each(o.data, '$.results') r
+            WHERE {' AND '.join(clauses)}
+            ORDER BY r.key LIMIT ?
+        """, params + [int(limit) + 1]).fetchall()
+
+        page = [dict(json.loads(row['result']), index=row['position'], outcome=row['outcome']) for row in rows[:limit]]
+        next_cursor = str(rows[limit]['position']) if len(rows) > limit else None
+        return {'results': page, 'next_cursor': next_cursor}
+
+    def list_operations(self, user_id=None, statuses=None):
+        """
+        List operation snapshots.
+
+        Args:
+            user_id (str): Optional owner filter
+            statuses (tuple): Optional status filter
+
+        Returns:
+            list: Operation dicts
+        """
+        clauses = []
+        params = []
+        if user_id is not None:
+            clauses.append("user_id = ?")
+            params.append(str(user_id))
+        if statuses:
+            clauses.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(
+            f"SELECT status, completion_pending, data FROM operations {where}", params
+        ).fetchall()
+        return [self._row_to_operation(row) for row in rows]
+
+    def set_status(self, operation_id, status, from_statuses=None, **fields):
+        """
+        Atomically change an operation's status (compare-and-set) and merge extra fields.
+
+        Args:
+            operation_id (str): Operation to change
+            status (str): New status
+            from_statuses (tuple): Only transition from these statuses (None = any)
+            **fields: Extra fields to set
+
+        Returns:
+            dict: Updated operation, or None if not found or not in from_statuses
+        """
+        clauses = ["id = ?"]
+        params = [operation_id]
+        if from_statuses is not None:
+            clauses.append(f"status IN ({', '.join('?' * len(from_statuses))})")
+            params.extend(from_statuses)
+        with self._transaction() as conn:
+            row = conn.execute(
+                f"SELECT status, completion_pending, data FROM operations WHERE {' AND '.join(clauses)}", params
+            ).fetchone()
+            if not row:
+                return None
+            operation = self._row_to_operation(row)
+            operation.update(fields)
+            operation['status'] = status
+            now = time.time()
+            conn.execute(
+                "UPDATE operations SET status = ?, updated_at = ?, data = ?, summary = ? WHERE id = ?",
+                (status, now, json.dumps(operation, default=str),
+                 json.dumps(operation_summary(operation, now), default=str), operation_id)
+            )
+        return operation
+
+    def claim_completion(self, operation_id):
+        """Consume an operation's completion flag; True for exactly one caller."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE operations SET completion_pending = 0 WHERE id = ? AND completion_pending = 1",
+                (operation_id,)
+            )
+            return cursor.rowcount == 1
+
+    def delete_operations(self, operation_ids):
+        """Delete operations and any queue entries for them."""
+        if not operation_ids:
+            return
+        placeholders = ', '.join('?' * len(operation_ids))
+        with self._transaction() as conn:
+            conn.execute(f"DELETE FROM operations WHERE id IN ({placeholders})", list(operation_ids))
+            conn.execute(f"DELETE FROM batch_queue WHERE operation_id IN ({placeholders})", list(operation_ids))
+
+    # Admin views (served from the status/user/updated_at indexes and the summary column)
+
+    @staticmethod
+    def _row_to_summary(row):
+        summary = json.loads(row['summary']) if row['summary'] else {'id': row['id'], 'user_id': row['user_id']}
+        summary['status'] = row['status']
+        summary['updated_at'] = row['updated_at']
+        return summary
+
+    def query_operation_summaries(self, status=None, user_id=None, limit=50, offset=0):
+        """
+        Page through operation summaries, newest update first.
+
+        Args:
+            status (str): Optional status filter
+            user_id (str): Optional account filter
+            limit (int): Page size
+            offset (int): Page offset
+
+        Returns:
+            tuple: (list of summaries, total matching)
+        """
+        clauses = []
+        params = []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if user_id is not None:
+            clauses.append("user_id = ?")
+            params.append(str(user_id))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = self._connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM operations {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT id, user_id, status, updated_at, summary FROM operations {where} "
+            f"ORDER BY updated_at DESC LIMIT ? OFFSET ?", params + [int(limit), int(offset)]
+        ).fetchall()
+        return [self._row_to_summary(row) for row in rows], total
+
+    def status_counts(self):
+        """Get the number of operations per status."""
+        rows = self._connect().execute("SELECT status, COUNT(*) AS n FROM operations GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def account_status_counts(self):
+        """Get per-account operation counts by status."""
+        rows = self._connect().execute(
+            "SELECT user_id, status, COUNT(*) AS n FROM operations GROUP BY user_id, status"
+        ).fetchall()
+        counts = {}
+        for row in rows:
+            counts.setdefault(row['user_id'], {})[row['status']] = row['n']
+        return counts
+
+    def stale_operations(self, statuses, before):
+        """Get operations in the given statuses not written since `before`."""
+        rows = self._connect().execute(
+            f"SELECT id, user_id, status, updated_at, summary FROM operations "
+            f"WHERE status IN ({', '.join('?' * len(statuses))}) AND updated_at < ?",
+            list(statuses) + [before]
+        ).fetchall()
+        return [self._row_to_summary(row) for row in rows]
+
+    # Batch queue
+
+    def enqueue(self, entry):
+        """Append a queue entry ({'operation_id', 'user_id', ...}) and return its position."""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO batch_queue (operation_id, user_id, payload) VALUES (?, ?, ?)",
+                (entry['operation_id'], str(entry['user_id']), json.dumps(entry))
+            )
+            return conn.execute("SELECT COUNT(*) FROM batch_queue").fetchone()[0]
+
+    def admit_operation(self, operation, entry, admission_check=None):
+        """
+        Save a new operation and queue it in one transaction, behind an optional admission check.
+
+        The check sees the account's remaining work as of the same transaction, so concurrent
+        submissions for one account (from any process) are admitted one after another.
+
+        Args:
+            operation (dict): New operation
+            entry (dict): Its queue entry
+            admission_check (callable): admission_check(remaining targets in the account's active
+                batches) -> rejection, or None to admit
+
+        Returns:
+            The check's rejection, or None if the operation was admitted
+        """
+        with self._transaction() as conn:
+            if admission_check is not None:
+                row = conn.execute(f"""
+                    SELECT COALESCE(SUM(json_extract(data, '$.total_count') - json_extract(data, '$.completed_count')), 0)
+                    FROM operations WHERE user_id = ? AND status IN ({', '.join('?' * len(ACTIVE_STATUSES))})
+                """, [str(operation['user_id'])] + list(ACTIVE_STATUSES)).fetchone()
+                rejection = admission_check(row[0])
+                if rejection is not None:
+                    return rejection
+            self._upsert_operation(conn, operation)
+            conn.execute(
+                "INSERT OR IGNORE INTO batch_queue (operation_id, user_id, payload) VALUES (?, ?, ?)",
+                (entry['operation_id'], str(entry['user_id']), json.dumps(entry))
+            )
+        return None
+
+    def dequeue(self, user_id=None):
+        """Atomically pop the oldest queue entry (optionally for one user), or return None."""
+        with self._transaction() as conn:
+            if user_id is None:
+                row = conn.execute("SELECT seq, payload FROM batch_queue ORDER BY seq LIMIT 1").fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT seq, payload FROM batch_queue WHERE user_id = ? ORDER BY seq LIMIT 1", (str(user_id),)
+                ).fetchone()
+            if not row:
+                return None
+            conn.execute("DELETE FROM batch_queue WHERE seq = ?", (row['seq'],))
+            return json.loads(row['payload'])
+
+    def queue_entries(self, user_id=None):
+        """List queue entries in order."""
+        if user_id is None:
+            rows = self._connect().execute("SELECT payload FROM batch_queue ORDER BY seq").fetchall()
+        else:
+            rows = self._connect().execute(
+                "SELECT payload FROM batch_queue WHERE user_id = ? ORDER BY seq", (str(user_id),)
+            ).fetchall()
+        return [json.loads(row['payload']) for row in rows]
+
+    def take_queued_targets(self, operation_id, targets, note=None):
+        """
+        Remove targets from a still-queued batch (and its queue entry) to run them elsewhere.
+
+        Args:
+            operation_id (str): Queued operation
+            targets (list): Targets to take
+            note (str): Optional note appended to the operation
+
+        Returns:
+            tuple: (targets taken, updated operation) - ([], None) if it is no longer queued
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT status, completion_pending, data FROM operations WHERE id = ?", (operation_id,)
+            ).fetchone()
+            queued = conn.execute("SELECT payload FROM batch_queue WHERE operation_id = ?", (operation_id,)).fetchone()
+            if not row or not queued or row['status'] != 'queued':
+                return [], None
+            operation = self._row_to_operation(row)
+            entry = json.loads(queued['payload'])
+            wanted = set(targets)
+            taken = [target for target in operation['usernames'] if target in wanted]
+            operation['usernames'] = [target for target in operation['usernames'] if target not in wanted]
+            operation['total_count'] = len(operation['usernames'])
+            entry['usernames'] = list(operation['usernames'])
+            now = time.time()
+            operation['last_update'] = now
+            if note and taken:
+                operation.setdefault('notes', []).append(note)
+            conn.execute(
+                "UPDATE operations SET updated_at = ?, data = ?, summary = ? WHERE id = ?",
+                (now, json.dumps(operation, default=str), json.dumps(operation_summary(operation, now), default=str),
+                 operation_id)
+            )
+            conn.execute("UPDATE batch_queue SET payload = ? WHERE operation_id = ?", (json.dumps(entry), operation_id))
+        return taken, operation
+
+    def accounts_with_work(self):
+        """Get user IDs with queued batches or batches left running."""
+        rows = self._connect().execute("""
+            SELECT user_id FROM batch_queue
+            UNION
+            SELECT user_id FROM operations WHERE status IN ('running', 'waiting_for_rate_limit_reset')
+        """).fetchall()
+        return [row['user_id'] for row in rows]
+
+    def queue_length(self):
+        """Get number of queued entries."""
+        return self._connect().execute("SELECT COUNT(*) FROM batch_queue").fetchone()[0]
+
+    def remove_queued(self, user_id=None, operation_id=None):
+        """Remove queue entries for a user or a single operation."""
+        with self._transaction() as conn:
+            if operation_id is not None:
+                conn.execute("DELETE FROM batch_queue WHERE operation_id = ?", (operation_id,))
+            elif user_id is not None:
+                conn.execute("DELETE FROM batch_queue WHERE user_id = ?", (str(user_id),))
+
+    # Rate limits
+
+    def load_rate_limits(self, account):
+        """Load live (unexpired) per-endpoint rate-limit state for an account."""
+        rows = self._connect().execute(
+            "SELECT endpoint, data FROM rate_limits WHERE account = ?", (str(account),)
+        ).fetchall()
+        windows = {row['endpoint']: json.loads(row['data']) for row in rows}
+        return {endpoint: info for endpoint, info in windows.items() if not is_window_expired(info)}
+
+    def all_rate_limits(self):
+        """Get live rate-limit state for every account: account -> endpoint -> info."""
+        rows = self._connect().execute("SELECT account, endpoint, data FROM rate_limits").fetchall()
+        accounts = {}
+        for row in rows:
+            info = json.loads(row['data'])
+            if not is_window_expired(info):
+                accounts.setdefault(row['account'], {})[row['endpoint']] = info
+        return accounts
+
+    def save_rate_limits(self, account, rate_limits):
+        """
+        Merge per-endpoint rate-limit state for an account.
+
+        Within the same reset window the lower remaining count wins, so
+        decrements made by concurrent processes are never lost.
+        """
+        with self._transaction() as conn:
+            for endpoint, info in rate_limits.items():
+                row = conn.execute(
+                    "SELECT data FROM rate_limits WHERE account = ? AND endpoint = ?", (str(account), endpoint)
+                ).fetchone()
+                merged = dict(info)
+                if row:
+                    stored = json.loads(row['data'])
+                    if (stored.get('reset') == info.get('reset') and
+                        isinstance(stored.get('remaining'), int) and isinstance(info.get('remaining'), int)):
+                        merged['remaining'] = min(stored['remaining'], info['remaining'])
+                conn.execute("""
+                    INSERT INTO rate_limits (account, endpoint, data, updated_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (account, endpoint) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+                """, (str(account), endpoint, json.dumps(merged), time.time()))
+
+    # Leases
+
+    def acquire_lease(self, name, owner, ttl):
+        """
+        Acquire or renew a named lease.
+
+        Args:
+            name (str): Lease name
+            owner (str): Unique owner identity (host:pid)
+            ttl (float): Lease lifetime in seconds
+
+        Returns:
+            int: Fencing token if the lease is held by `owner`, otherwise None
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT owner, token, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                conn.execute("INSERT INTO leases (name, owner, token, expires_at) VALUES (?, ?, 1, ?)",
+                             (name, owner, now + ttl))
+                return 1
+            if row['owner'] == owner:
+                conn.execute("UPDATE leases SET expires_at = ? WHERE name = ?", (now + ttl, name))
+                return row['token']
+            if row['expires_at'] < now:
+                token = row['token'] + 1
+                conn.execute("UPDATE leases SET owner = ?, token = ?, expires_at = ? WHERE name = ?",
+                             (owner, token, now + ttl, name))
+                logging.info(f"Lease {name} taken over by {owner} from expired holder {row['owner']}")
+                return token
+            return None
+
+    @staticmethod
+    def _check_fence(conn, name, owner, token):
+        """Verify inside a transaction that `owner` still holds lease `name` with `token`."""
+        row = conn.execute("SELECT owner, token, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+        if row is None or row['owner'] != owner or row['token'] != token or row['expires_at'] < time.time():
+            raise LeaseLostError(f"Lease {name} (token {token}) is no longer held by {owner}")
+
+    def release_lease(self, name, owner):
+        """Release a lease if still held by `owner`."""
+        with self._transaction() as conn:
+            conn.execute("UPDATE leases SET expires_at = 0 WHERE name = ? AND owner = ?", (name, owner))
+
+    def get_lease(self, name):
+        """Get lease holder info, or None."""
+        row = self._connect().execute(
+            "SELECT owner, token, expires_at FROM leases WHERE name = ?", (name,)
+        ).fetchone()
+        return dict(row) if row else None
+
+
+class _ImmediateTransaction:
+    """
+    Context manager for BEGIN IMMEDIATE ... COMMIT/ROLLBACK on an autocommit connection.
+
+    With a lock (a connection shared by greenlets) the transaction holds it throughout, and a
+    locked database is retried with time.sleep - which yields to other greenlets - until `retry_for`.
+    """
+
+    def __init__(self, conn, lock=None, retry_for=0):
+        self.conn = conn
+        self.lock = lock
+        self.retry_for = retry_for
+
+    def __enter__(self):
+        if self.lock is not None:
+            self.lock.acquire()
+        try:
+            deadline = time.monotonic() + self.retry_for
+            while True:
+                try:
+                    self.conn.execute("BEGIN IMMEDIATE")
+                    return self.conn
+                except sqlite3.OperationalError as e:
+                    if 'locked' not in str(e) or time.monotonic() >= deadline:
+                        raise
+                    time.sleep(COOPERATIVE_RETRY_INTERVAL)
+        except BaseException:
+            if self.lock is not None:
+                self.lock.release()
+            raise
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            if self.lock is not None:
+                self.lock.release()
+        return False
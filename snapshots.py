@@ -0,0 +1,290 @@
+"""
+Compact snapshots of following/followers lists.
+Each snapshot is a sorted array of uint64 user IDs in its own file, read through
+mmap (no parsing, no per-ID objects), with a JSON metadata sidecar (account,
+relation, timestamp, pagination completeness). Snapshots let later scans and
+batches reuse a list instead of refetching it, and two snapshots are compared
+with a merge-based diff.
+"""
+
+import bisect
+import json
+import logging
+import mmap
+import os
+import sys
+import time
+from array import array
+
+MERGE_BLOCK = 512          # IDs compared per block slice
+MERGE_STEPS = 64           # Element-wise merge steps after a mismatch before trying blocks again
+WRITE_CHUNK = 10000        # IDs buffered per write
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of one snapshot's sorted ID array."""
+
+    def __init__(self, meta, ids_path):
+        """
+        Open a snapshot.
+
+        Args:
+            meta (dict): Snapshot metadata
+            ids_path (str): Path of the raw uint64 ID file
+        """
+        self.meta = meta
+        self._file = open(ids_path, 'rb')
+        self._mmap = None
+        self.ids = memoryview(b'').cast('Q')
+        if meta['count'] > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.ids = memoryview(self._mmap).cast('Q')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, user_id):
+        index = bisect.bisect_left(self.ids, int(user_id))
+        return index < len(self.ids) and self.ids[index] == int(user_id)
+
+    def close(self):
+        """Release the mapping and file handle."""
+        self.ids.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def difference(left, right):
+    """
+    Merge two sorted ID arrays and return IDs present in `left` but not in `right`.
+
+    Identical runs (the common case between snapshots of the same list) are
+    skipped a block at a time with C-level slice comparisons; a differing block
+    is bisected down to the first mismatch instead of being walked element by element.
+
+    Args:
+        left: Sorted sequence of ints (e.g. Snapshot.ids)
+        right: Sorted sequence of ints
+
+    Returns:
+        list: IDs only in `left`, in order
+    """
+    result = []
+    i, j = 0, 0
+    left_len, right_len = len(left), len(right)
+    while i < left_len and j < right_len:
+        n = min(MERGE_BLOCK, left_len - i, right_len - j)
+        if left[i:i + n] == right[j:j + n]:
+            i += n
+            j += n
+            continue
+
+        # Length of the common prefix: equal up to `low`, unequal at `high`
+        low, high = 0, n
+        while high - low > 1:
+            mid = (low + high) // 2
+            if left[i:i + mid] == right[j:j + mid]:
+                low = mid
+            else:
+                high = mid
+        i += low
+        j += low
+
+        # Element-wise merge through the divergent stretch
+        stop = min(left_len, i + MERGE_STEPS)
+        while i < stop and j < right_len:
+            a, b = left[i], right[j]
+            if a == b:
+                break
+            if a < b:
+                result.append(a)
+                i += 1
+            else:
+                j += 1
+    result.extend(left[i:left_len])
+    return result
+
+
+def diff(old, new):
+    """
+    Compare two snapshots of the same list.
+
+    Args:
+        old: Sorted IDs of the earlier snapshot
+        new: Sorted IDs of the later snapshot
+
+    Returns:
+        dict: {'added': IDs only in new, 'removed': IDs only in old}
+    """
+    return {'added': difference(new, old), 'removed': difference(old, new)}
+
+
+class SnapshotStore:
+    """Directory of snapshot files, keyed by account and relation."""
+
+    def __init__(self, directory, keep=5):
+        """
+        Initialize snapshot store.
+
+        Args:
+            directory (str): Directory holding snapshot files
+            keep (int): Snapshots kept per account and relation (oldest are pruned)
+        """
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, snapshot_id):
+        base = os.path.join(self.directory, snapshot_id)
+        return f"{base}.ids", f"{base}.json"
+
+    def write(self, account, relation, ids, complete=True, source=None):
+        """
+        Write a snapshot from IDs already in ascending order.
+
+        Args:
+            account (str): Account the list belongs to
+            relation (str): 'following' or 'followers'
+            ids (iterable): Sorted, unique integer IDs (streamed - never held in full)
+            complete (bool): Whether every page of the list was fetched
+            source (str): Where the IDs came from (e.g. scan ID)
+
+        Returns:
+            dict: Snapshot metadata
+        """
+        created_at = time.time()
+        snapshot_id = f"{account}_{relation}_{int(created_at * 1000)}"
+        ids_path, meta_path = self._paths(snapshot_id)
+
+        count = 0
+        previous = -1
+        buffer = array('Q')
+        with open(f"{ids_path}.tmp", 'wb') as f:
+            for user_id in ids:
+                user_id = int(user_id)
+                if user_id <= previous:
+                    raise ValueError("Snapshot IDs must be unique and in ascending order")
+                previous = user_id
+                buffer.append(user_id)
+                if len(buffer) >= WRITE_CHUNK:
+                    buffer.tofile(f)
+                    count += len(buffer)
+                    buffer = array('Q')
+            buffer.tofile(f)
+            count += len(buffer)
+        os.replace(f"{ids_path}.tmp", ids_path)
+
+        # The metadata file is written last - a snapshot without one is incomplete and ignored
+        meta = {
+            'id': snapshot_id,
+            'account': str(account),
+            'relation': relation,
+            'count': count,
+            'complete': bool(complete),
+            'source': source,
+            'created_at': created_at,
+            'byteorder': sys.byteorder
+        }
+        with open(f"{meta_path}.tmp", 'w') as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+        logging.info(f"Wrote {relation} snapshot {snapshot_id} ({count} IDs, complete={complete})")
+        self.prune(account, relation)
+        return meta
+
+    def list(self, account, relation=None):
+        """
+        List snapshot metadata for an account, newest first.
+
+        Args:
+            account (str): Account the lists belong to
+            relation (str): Optional 'following' or 'followers' filter
+
+        Returns:
+            list: Snapshot metadata dicts
+        """
+        snapshots = []
+        prefix = f"{account}_"
+        for name in os.listdir(self.directory):
+            if not name.startswith(prefix) or not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), 'r') as f:
+                    meta = json.load(f)
+            except Exception as e:
+                logging.error(f"Error reading snapshot metadata {name}: {str(e)}")
+                continue
+            if meta.get('account') == str(account) and (relation is None or meta.get('relation') == relation):
+                snapshots.append(meta)
+        snapshots.sort(key=lambda meta: meta['created_at'], reverse=True)
+        return snapshots
+
+    def latest(self, account, relation, max_age=None, complete_only=True):
+        """
+        Get the newest usable snapshot of a list.
+
+        Args:
+            account (str): Account the list belongs to
+            relation (str): 'following' or 'followers'
+            max_age (float): Optional maximum age in seconds
+            complete_only (bool): Skip snapshots of partially fetched lists
+
+        Returns:
+            dict: Snapshot metadata or None
+        """
+        for meta in self.list(account, relation):
+            if complete_only and not meta['complete']:
+                continue
+            if max_age is not None and time.time() - meta['created_at'] > max_age:
+                return None
+            return meta
+        return None
+
+    def get(self, snapshot_id):
+        """Get snapshot metadata by ID, or None."""
+        _, meta_path = self._paths(os.path.basename(snapshot_id))
+        try:
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def open(self, snapshot_id):
+        """
+        Open a snapshot for reading.
+
+        Args:
+            snapshot_id (str): Snapshot identifier
+
+        Returns:
+            Snapshot: Memory-mapped snapshot (use as a context manager)
+        """
+        meta = self.get(snapshot_id)
+        if meta is None:
+            raise KeyError(f"Snapshot {snapshot_id} not found")
+        if meta.get('byteorder', sys.byteorder) != sys.byteorder:
+            raise ValueError(f"Snapshot {snapshot_id} was written with {meta['byteorder']}-endian IDs")
+        ids_path, _ = self._paths(meta['id'])
+        return Snapshot(meta, ids_path)
+
+    def delete(self, snapshot_id):
+        """Delete a snapshot's files."""
+        for path in self._paths(os.path.basename(snapshot_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def prune(self, account, relation):
+        """Delete all but the newest `keep` snapshots of a list."""
+        for meta in self.list(account, relation)[self.keep:]:
+            self.delete(meta['id'])
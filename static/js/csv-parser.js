@@ -0,0 +1,58 @@
+/**
+ * X Unfollow Tool - CSV username parsing
+ * Loaded on the page it provides parseUsernameCSV() (the fallback parser);
+ * loaded as a Web Worker it reads and parses uploaded files off the main thread.
+ */
+
+function isValidUsername(username) {
+    // More permissive username validation for X usernames
+    // Allow letters, numbers, underscores, 1-15 characters
+    if (!username || username.length === 0 || username.length > 15) {
+        return false;
+    }
+    // Basic pattern but more lenient
+    return /^[a-zA-Z0-9_]+$/.test(username);
+}
+
+function parseUsernameCSV(text) {
+    // Simple CSV parsing - supports comma-separated or line-separated usernames
+    const usernames = [];
+    const lines = text.split(/[\n\r]+/);
+
+    lines.forEach(line => {
+        line = line.trim();
+        if (!line) return;
+
+        // Check if line contains commas (CSV format)
+        if (line.includes(',')) {
+            const parts = line.split(',');
+            parts.forEach(part => {
+                const username = part.trim().replace(/[@"']/g, '');
+                if (username && isValidUsername(username)) {
+                    usernames.push(username);
+                }
+            });
+        } else {
+            // Single username per line
+            const username = line.replace(/[@"']/g, '');
+            if (username && isValidUsername(username)) {
+                usernames.push(username);
+            }
+        }
+    });
+
+    return [...new Set(usernames)]; // Remove duplicates
+}
+
+// Worker mode: {id, file} or {id, text} in, {id, usernames} or {id, error} out
+if (typeof window === 'undefined' && typeof importScripts === 'function') {
+    self.onmessage = async (event) => {
+        const { id, file, text } = event.data;
+        try {
+            const source = file ? await file.text() : text;
+            self.postMessage({ id, usernames: parseUsernameCSV(source) });
+        } catch (error) {
+            self.postMessage({ id, error: error.message || String(error) });
+        }
+    };
+}
@@ -3,6 +3,322 @@
  * Handles UI interactions, API calls, and real-time updates
  */
 
+// Web Worker source for CSV parsing (null if csv-parser.js wasn't loaded as a script)
+const CSV_PARSER_URL = document.getElementById('csv-parser-script')?.src || null;
+
+class SharedTicker {
+    // One interval drives every periodic UI update; it only runs while something is subscribed
+    constructor(intervalMs = 1000) {
+        this.intervalMs = intervalMs;
+        this.callbacks = new Map();
+        this.intervalId = null;
+    }
+    
+    subscribe(key, callback) {
+        // Replace any callback under the same key and run it immediately
+        this.callbacks.set(key, callback);
+        callback();
+        if (this.intervalId === null) {
+            this.intervalId = setInterval(() => this.tick(), this.intervalMs);
+        }
+    }
+    
+    unsubscribe(key) {
+        this.callbacks.delete(key);
+        if (this.callbacks.size === 0 && this.intervalId !== null) {
+            clearInterval(this.intervalId);
+            this.intervalId = null;
+        }
+    }
+    
+    tick() {
+        // Nothing on screen to update while the tab is hidden
+        if (document.hidden) return;
+        this.callbacks.forEach((callback, key) => {
+            try {
+                callback();
+            } catch (error) {
+                console.error(`Ticker callback ${key} failed:`, error);
+                this.unsubscribe(key);
+            }
+        });
+    }
+}
+
+class VirtualList {
+    // Renders only the rows scrolled into view: a spacer as tall as the whole list keeps the
+    // scrollbar honest, and a small pool of row elements is moved and rebound as you scroll
+    constructor(container, { createRow, bindRow, rowHeight = 42, overscan = 8 }) {
+        this.container = container;
+        this.createRow = createRow;
+        this.bindRow = bindRow;
+        this.rowHeight = rowHeight;
+        this.rowHeightMeasured = false;
+        this.overscan = overscan;
+        this.items = [];
+        this.rows = [];
+        this.frame = null;
+        
+        this.spacer = document.createElement('div');
+        this.spacer.className = 'csv-virtual-spacer';
+        this.window = document.createElement('div');
+        this.window.className = 'csv-virtual-window';
+        this.spacer.appendChild(this.window);
+        this.container.innerHTML = '';
+        this.container.appendChild(this.spacer);
+        
+        this.container.addEventListener('scroll', () => this.scheduleRender(), { passive: true });
+        window.addEventListener('resize', () => this.scheduleRender(), { passive: true });
+    }
+    
+    setItems(items) {
+        this.items = items;
+        this.spacer.style.height = `${items.length * this.rowHeight}px`;
+        this.render();
+    }
+    
+    refresh() {
+        // Rebind the rows in view (e.g. after a selection change)
+        this.render();
+    }
+    
+    scheduleRender() {
+        // Coalesce scroll events into one render per animation frame
+        if (this.frame !== null) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            this.render();
+        });
+    }
+    
+    render() {
+        const viewportHeight = this.container.clientHeight || 300;
+        const scrollTop = Math.max(0, this.container.scrollTop - this.spacer.offsetTop);
+        const first = Math.max(0, Math.floor(scrollTop / this.rowHeight) - this.overscan);
+        const last = Math.min(this.items.length, Math.ceil((scrollTop + viewportHeight) / this.rowHeight) + this.overscan);
+        const count = Math.max(0, last - first);
+        
+        // Grow the pool on demand; surplus rows are hidden, never destroyed
+        while (this.rows.length < count) {
+            const row = this.createRow();
+            this.rows.push(row);
+            this.window.appendChild(row);
+        }
+        for (let i = 0; i < this.rows.length; i++) {
+            const row = this.rows[i];
+            if (i < count) {
+                this.bindRow(row, this.items[first + i], first + i);
+                row.style.display = '';
+            } else {
+                row.style.display = 'none';
+            }
+        }
+        this.window.style.transform = `translateY(${first * this.rowHeight}px)`;
+        
+        // Measure the real row height once a row is on screen
+        if (!this.rowHeightMeasured && count > 0 && this.rows[0].offsetHeight > 0) {
+            this.rowHeightMeasured = true;
+            if (Math.abs(this.rows[0].offsetHeight - this.rowHeight) > 0.5) {
+                this.rowHeight = this.rows[0].offsetHeight;
+                this.setItems(this.items);
+            }
+        }
+    }
+}
+
+// CSV list persistence: IndexedDB database/store, and the localStorage key used before (and as fallback)
+const CSV_DB_NAME = 'x-unfollow-tool';
+const CSV_DB_STORE = 'csvUsers';
+const CSV_LEGACY_KEY = 'csvUserList';
+
+function csvUsernameKey(username) {
+    // The server reports targets normalized (lowercased, '@' kept on all-digit handles),
+    // so CSV entries are matched against them case-insensitively and without '@'
+    return String(username).replace(/^@/, '').toLowerCase();
+}
+
+class CSVListStore {
+    // IndexedDB persistence for the CSV list: one record per username, so adding or removing
+    // users writes only those records. Changes are queued and flushed together in one transaction.
+    // Falls back to a single localStorage blob where IndexedDB is unavailable.
+    constructor() {
+        this.db = null;
+        this.ready = null;
+        this.nextSeq = 0;
+        this.pending = new Map();   // username -> record to put, or null to delete
+        this.clearPending = false;
+        this.flushScheduled = false;
+        this.legacyList = null;     // Full list, only used by the localStorage fallback
+    }
+    
+    open() {
+        if (this.ready) return this.ready;
+        this.ready = new Promise((resolve) => {
+            if (!window.indexedDB) {
+                resolve(null);
+                return;
+            }
+            const request = indexedDB.open(CSV_DB_NAME, 1);
+            request.onupgradeneeded = () => {
+                // Keyed by username (the list never holds duplicates); seq keeps upload order
+                const store = request.result.createObjectStore(CSV_DB_STORE, { keyPath: 'username' });
+                store.createIndex('seq', 'seq');
+            };
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => {
+                console.error('IndexedDB unavailable, using localStorage:', request.error);
+                resolve(null);
+            };
+        }).then(async (db) => {
+            this.db = db;
+            if (db) await this.migrateLegacy();
+            return db;
+        });
+        return this.ready;
+    }
+    
+    async migrateLegacy() {
+        // One-time move of a list saved by older versions into IndexedDB
+        const saved = localStorage.getItem(CSV_LEGACY_KEY);
+        if (!saved) return;
+        try {
+            const users = JSON.parse(saved);
+            const count = await this.readCount();
+            if (count === 0 && users.length > 0) {
+                const records = new Map(users.map((user, seq) => [user.username, { ...user, seq }]));
+                await this.commit(this.db, records, false);
+            }
+            localStorage.removeItem(CSV_LEGACY_KEY);
+            console.log(`Migrated ${users.length} CSV users from localStorage to IndexedDB`);
+        } catch (error) {
+            console.error('Error migrating CSV list:', error);
+        }
+    }
+    
+    readCount() {
+        return new Promise((resolve, reject) => {
+            const request = this.db.transaction(CSV_DB_STORE).objectStore(CSV_DB_STORE).count();
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    }
+    
+    readChunk(afterSeq, limit) {
+        // Next `limit` records in upload order after `afterSeq`
+        return new Promise((resolve, reject) => {
+            const index = this.db.transaction(CSV_DB_STORE).objectStore(CSV_DB_STORE).index('seq');
+            const range = afterSeq === null ? null : IDBKeyRange.lowerBound(afterSeq, true);
+            const request = index.getAll(range, limit);
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    }
+    
+    async *load(chunkSize = 2000) {
+        // Yield the saved list in chunks, so the first rows show before the rest is read
+        const db = await this.open();
+        if (!db) {
+            const saved = localStorage.getItem(CSV_LEGACY_KEY);
+            this.legacyList = saved ? JSON.parse(saved) : [];
+            if (this.legacyList.length > 0) yield this.legacyList.slice();
+            return;
+        }
+        let afterSeq = null;
+        while (true) {
+            const users = await this.readChunk(afterSeq, chunkSize);
+            if (users.length === 0) return;
+            afterSeq = users[users.length - 1].seq;
+            this.nextSeq = Math.max(this.nextSeq, afterSeq + 1);
+            yield users;
+            if (users.length < chunkSize) return;
+        }
+    }
+    
+    put(users) {
+        // Queue new users (each is given the next upload-order position)
+        users.forEach(user => {
+            const record = { ...user, seq: this.nextSeq++ };
+            this.pending.set(user.username, record);
+        });
+        this.scheduleFlush();
+    }
+    
+    delete(usernames) {
+        usernames.forEach(username => this.pending.set(username, null));
+        this.scheduleFlush();
+    }
+    
+    clear() {
+        this.pending.clear();
+        this.clearPending = true;
+        this.nextSeq = 0;
+        this.scheduleFlush();
+    }
+    
+    scheduleFlush() {
+        // Everything queued in the same task lands in one transaction
+        if (this.flushScheduled) return;
+        this.flushScheduled = true;
+        setTimeout(() => this.flush(), 0);
+    }
+    
+    async flush() {
+        this.flushScheduled = false;
+        const db = await this.open();
+        const changes = this.pending;
+        const clearFirst = this.clearPending;
+        this.pending = new Map();
+        this.clearPending = false;
+    
+        if (changes.size === 0 && !clearFirst) return;
+        if (!db) {
+            this.flushLegacy(changes, clearFirst);
+            return;
+        }
+        await this.commit(db, changes, clearFirst);
+    }
+    
+    commit(db, changes, clearFirst) {
+        // Apply a batch of puts/deletes in a single readwrite transaction
+        return new Promise((resolve) => {
+            const transaction = db.transaction(CSV_DB_STORE, 'readwrite');
+            const store = transaction.objectStore(CSV_DB_STORE);
+            if (clearFirst) store.clear();
+            changes.forEach((record, username) => {
+                if (record) {
+                    store.put(record);
+                } else {
+                    store.delete(username);
+                }
+            });
+            transaction.oncomplete = () => resolve();
+            // A failed request aborts the whole transaction
+            transaction.onabort = () => {
+                console.error('Error saving CSV list:', transaction.error);
+                resolve();
+            };
+        });
+    }
+    
+    flushLegacy(changes, clearFirst) {
+        // Fallback: apply the changes to the whole list and rewrite the localStorage blob
+        try {
+            if (!this.legacyList) {
+                const saved = localStorage.getItem(CSV_LEGACY_KEY);
+                this.legacyList = saved ? JSON.parse(saved) : [];
+            }
+            const kept = clearFirst ? [] : this.legacyList.filter(user => !changes.has(user.username));
+            changes.forEach(record => {
+                if (record) kept.push(record);
+            });
+            this.legacyList = kept;
+            localStorage.setItem(CSV_LEGACY_KEY, JSON.stringify(kept));
+        } catch (error) {
+            console.error('Error saving CSV list:', error);
+        }
+    }
+}
+
 class XUnfollowApp {
     constructor() {
         this.csvUserList = [];
@@ -10,6 +326,15 @@ class XUnfollowApp {
         this.isProcessing = false;
         this.activeSlowBatchOperations = [];
         this.alertLog = [];
+        this.ticker = new SharedTicker(1000);
+        this.operationTimers = new Set();
+        this.csvListView = null;
+        this.csvWorker = null;
+        this.csvWorkerRequests = new Map();
+        this.csvWorkerNextId = 1;
+        this.csvStore = new CSVListStore();
+        this.csvListLoaded = Promise.resolve();
+        this.csvRemovedWhileLoading = null;
         this.rateLimits = {
             unfollow: { remaining: 'unknown', reset: 0, limit: 'unknown' },
             unfollow_hourly: { remaining: 'unknown', reset: 0, limit: 'unknown' },
@@ -22,10 +347,12 @@ class XUnfollowApp {
     
     updateOperationTimer(operationId, startTime) {
         // Update timer display for running operations
-        const timerEl = document.getElementById(`timer-${operationId}`);
-        if (!timerEl || !startTime) return;
+        if (!startTime || !document.getElementById(`timer-${operationId}`)) return;
         
         const updateTimer = () => {
+            // Looked up on every tick - the operations list is re-rendered on each refresh
+            const timerEl = document.getElementById(`timer-${operationId}`);
+            if (!timerEl) return;
             const now = new Date();
             const start = new Date(startTime);
             const elapsed = Math.floor((now - start) / 1000);
@@ -43,58 +370,82 @@ class XUnfollowApp {
                 timeString = `${seconds}s elapsed`;
             }
             
-            timerEl.textContent = `Running: ${timeString}`;
+            const text = `Running: ${timeString}`;
+            if (timerEl.textContent !== text) {
+                timerEl.textContent = text;
+            }
         };
         
-        // Update immediately and then every second
-        updateTimer();
-        const timerId = setInterval(updateTimer, 1000);
-        
-        // Store timer ID for cleanup
-        if (!this.operationTimers) this.operationTimers = {};
-        this.operationTimers[operationId] = timerId;
+        // Update immediately and then on the shared one-second tick
+        this.ticker.subscribe(`timer-${operationId}`, updateTimer);
+        this.operationTimers.add(operationId);
     }
     
-    saveCSVListToStorage() {
-        // Save CSV list to localStorage for persistence
-        try {
-            localStorage.setItem('csvUserList', JSON.stringify(this.csvUserList));
-        } catch (error) {
-            console.error('Error saving CSV list:', error);
-        }
+    clearOperationTimers() {
+        this.operationTimers.forEach(operationId => this.ticker.unsubscribe(`timer-${operationId}`));
+        this.operationTimers.clear();
     }
     
     loadCSVListFromStorage() {
-        // Load CSV list from localStorage
-        try {
-            const saved = localStorage.getItem('csvUserList');
-            if (saved) {
-                this.csvUserList = JSON.parse(saved);
-                this.renderCSVList();
+        // Load the saved CSV list in chunks - the first rows show at once, the rest are appended as read
+        this.csvRemovedWhileLoading = new Set();
+        this.csvListLoaded = (async () => {
+            try {
+                for await (const users of this.csvStore.load()) {
+                    const removed = this.csvRemovedWhileLoading;
+                    const skipped = [];
+                    users.forEach(user => {
+                        if (removed.has(csvUsernameKey(user.username))) skipped.push(user.username);
+                        else this.csvUserList.push(user);
+                    });
+                    // Removed before this chunk was read - delete the saved records under their own spelling
+                    if (skipped.length > 0) this.csvStore.delete(skipped);
+                    this.renderCSVList({ resetSelection: false });
+                }
+            } catch (error) {
+                console.error('Error loading CSV list:', error);
+            } finally {
+                this.csvRemovedWhileLoading = null;
             }
-        } catch (error) {
-            console.error('Error loading CSV list:', error);
-        }
+        })();
+        return this.csvListLoaded;
     }
     
     removeUsernameFromList(username) {
         // Remove a username from the CSV list (after successful unfollow)
-        const initialLength = this.csvUserList.length;
-        this.csvUserList = this.csvUserList.filter(user => user.username !== username);
+        return this.removeUsernamesFromList([username]) > 0;
+    }
+    
+    removeUsernamesFromList(usernames) {
+        // Remove many usernames in one pass - one filter, one render, one storage transaction
+        const toRemove = new Set(usernames.map(csvUsernameKey));
+        const removed = [];
+        this.csvUserList = this.csvUserList.filter(user => {
+            if (!toRemove.has(csvUsernameKey(user.username))) return true;
+            removed.push(user.username);
+            return false;
+        });
         
-        if (this.csvUserList.length < initialLength) {
-            this.selectedUsers.delete(username);
-            this.renderCSVList();
-            this.saveCSVListToStorage();
-            console.log(`Removed ${username} from unfollow list`);
-            return true; // Successfully removed
+        if (this.csvRemovedWhileLoading) {
+            // Part of the saved list isn't in memory yet: skip (and delete) these names in later chunks
+            toRemove.forEach(key => this.csvRemovedWhileLoading.add(key));
         }
-        return false; // Username not found in list
+        if (removed.length > 0) {
+            this.csvStore.delete(removed);
+        }
+        
+        if (removed.length > 0) {
+            removed.forEach(username => this.selectedUsers.delete(username));
+            this.renderCSVList({ resetSelection: false });
+            console.log(`Removed ${removed.length} users from unfollow list`);
+        }
+        return removed.length;
     }
     
     init() {
         // UX Layer 1: Simple initialization flow
         this.bindEvents();
+        this.setupCSVListView();
         this.checkAuthStatus();
         this.loadCSVListFromStorage();
         this.loadSlowBatchOperations();
@@ -236,7 +587,8 @@ class XUnfollowApp {
             } else {
                 const resetText = this.formatResetTime(resetTime);
                 unfollowHourEl.textContent = `${remaining}/${limit}`;
-                unfollowHourEl.title = `Resets ${resetText}`;
+                // reset_time is when the window's oldest unfollow ages out (none used: nothing to reset)
+                unfollowHourEl.title = resetTime ? `Resets ${resetText}` : 'Full budget available';
                 unfollowHourEl.className = `badge ${remaining > 2 ? 'bg-success' : remaining > 0 ? 'bg-warning' : 'bg-danger'}`;
             }
         }
@@ -253,7 +605,7 @@ class XUnfollowApp {
             } else {
                 const resetText = this.formatResetTime(resetTime);
                 unfollowDayEl.textContent = `${remaining}/${limit}`;
-                unfollowDayEl.title = `Resets ${resetText}`;
+                unfollowDayEl.title = resetTime ? `Resets ${resetText}` : 'Full budget available';
                 unfollowDayEl.className = `badge ${remaining > 10 ? 'bg-success' : remaining > 0 ? 'bg-warning' : 'bg-danger'}`;
             }
         }
@@ -354,8 +706,7 @@ class XUnfollowApp {
         this.showStatus('info', 'Processing CSV file...');
         
         try {
-            const text = await file.text();
-            const usernames = this.parseCSV(text);
+            const usernames = await this.parseCSVFile(file);
             
             if (usernames.length === 0) {
                 this.showStatus('warning', 'No valid usernames found in CSV file');
@@ -368,13 +719,14 @@ class XUnfollowApp {
                 source: 'csv'
             }));
             
-            // Merge with existing list, avoiding duplicates
+            // Merge with existing list, avoiding duplicates (so the saved list must be fully loaded)
+            await this.csvListLoaded;
             const existingUsernames = new Set(this.csvUserList.map(u => u.username));
             const uniqueNewUsers = newUsers.filter(u => !existingUsernames.has(u.username));
             
-            this.csvUserList = [...this.csvUserList, ...uniqueNewUsers];
+            this.csvUserList = this.csvUserList.concat(uniqueNewUsers);
             this.renderCSVList();
-            this.saveCSVListToStorage();
+            this.csvStore.put(uniqueNewUsers);
             this.showStatus('success', `Loaded ${uniqueNewUsers.length} new usernames from CSV (${this.csvUserList.length} total)`);
             
         } catch (error) {
@@ -383,94 +735,119 @@ class XUnfollowApp {
         }
     }
     
-    parseCSV(text) {
-        // Simple CSV parsing - supports comma-separated or line-separated usernames
-        const usernames = [];
-        const lines = text.split(/[\n\r]+/);
+    parseCSVFile(file) {
+        // Read and parse in a Web Worker so large files never block the page
+        if (!window.Worker || !CSV_PARSER_URL) {
+            return file.text().then(text => this.parseCSV(text));
+        }
         
-        lines.forEach(line => {
-            line = line.trim();
-            if (!line) return;
-            
-            // Check if line contains commas (CSV format)
-            if (line.includes(',')) {
-                const parts = line.split(',');
-                parts.forEach(part => {
-                    const username = part.trim().replace(/[@"']/g, '');
-                    if (username && this.isValidUsername(username)) {
-                        usernames.push(username);
-                    }
-                });
-            } else {
-                // Single username per line
-                const username = line.replace(/[@"']/g, '');
-                if (username && this.isValidUsername(username)) {
-                    usernames.push(username);
+        if (!this.csvWorker) {
+            this.csvWorker = new Worker(CSV_PARSER_URL);
+            this.csvWorker.onmessage = (event) => {
+                const request = this.csvWorkerRequests.get(event.data.id);
+                if (!request) return;
+                this.csvWorkerRequests.delete(event.data.id);
+                if (event.data.error) {
+                    request.reject(new Error(event.data.error));
+                } else {
+                    request.resolve(event.data.usernames);
                 }
-            }
-        });
+            };
+            this.csvWorker.onerror = (event) => {
+                // Worker failed to load or crashed - parse pending files on the main thread instead
+                console.error('CSV worker error:', event.message);
+                this.csvWorker.terminate();
+                this.csvWorker = null;
+                const pending = [...this.csvWorkerRequests.values()];
+                this.csvWorkerRequests.clear();
+                pending.forEach(request => request.fallback());
+            };
+        }
         
-        return [...new Set(usernames)]; // Remove duplicates
+        return new Promise((resolve, reject) => {
+            const id = this.csvWorkerNextId++;
+            const fallback = () => file.text().then(text => resolve(this.parseCSV(text)), reject);
+            this.csvWorkerRequests.set(id, { resolve, reject, fallback });
+            this.csvWorker.postMessage({ id, file });
+        });
+    }
+    
+    parseCSV(text) {
+        // Main-thread parsing (fallback when Web Workers are unavailable) - see csv-parser.js
+        return parseUsernameCSV(text);
     }
     
     isValidUsername(username) {
-        // More permissive username validation for X usernames
-        // Allow letters, numbers, underscores, 1-15 characters
-        if (!username || username.length === 0 || username.length > 15) {
-            return false;
-        }
-        // Basic pattern but more lenient
-        return /^[a-zA-Z0-9_]+$/.test(username);
+        return isValidUsername(username);
     }
     
-    renderCSVList() {
+    setupCSVListView() {
         const listEl = document.getElementById('csv-list');
-        const containerEl = document.getElementById('csv-list-container');
-        const emptyEl = document.getElementById('csv-empty');
-        
         if (!listEl) return;
         
-        listEl.innerHTML = '';
-        
-        this.csvUserList.forEach(user => {
-            const itemEl = document.createElement('div');
-            itemEl.className = 'csv-item d-flex align-items-center p-2 border-bottom';
-            itemEl.innerHTML = `
-                <input type="checkbox" class="form-check-input me-2" 
-                       data-username="${user.username}" id="csv_${user.username}">
-                <label class="form-check-label flex-grow-1" for="csv_${user.username}">
-                    @${user.username}
-                </label>
-            `;
-            
-            // Add click handler for selection
-            const checkbox = itemEl.querySelector('.form-check-input');
-            checkbox.addEventListener('change', () => this.toggleCSVUserSelection(user.username, checkbox.checked));
-            
-            listEl.appendChild(itemEl);
+        this.csvListView = new VirtualList(listEl, {
+            createRow: () => {
+                const itemEl = document.createElement('div');
+                itemEl.className = 'csv-item d-flex align-items-center p-2 border-bottom';
+                itemEl.innerHTML = `
+                    <input type="checkbox" class="form-check-input me-2">
+                    <label class="form-check-label flex-grow-1"></label>
+                `;
+                return itemEl;
+            },
+            bindRow: (itemEl, user) => {
+                const checkbox = itemEl.firstElementChild;
+                const label = itemEl.lastElementChild;
+                if (checkbox.dataset.username !== user.username) {
+                    checkbox.dataset.username = user.username;
+                    checkbox.id = `csv_${user.username}`;
+                    label.htmlFor = checkbox.id;
+                    label.textContent = `@${user.username}`;
+                }
+                checkbox.checked = this.selectedUsers.has(user.username);
+            }
+        });
+        
+        // One delegated listener instead of one per row
+        listEl.addEventListener('change', (event) => {
+            const checkbox = event.target;
+            if (checkbox.classList.contains('form-check-input') && checkbox.dataset.username) {
+                this.toggleCSVUserSelection(checkbox.dataset.username, checkbox.checked);
+            }
         });
+    }
+    
+    renderCSVList({ resetSelection = true } = {}) {
+        const containerEl = document.getElementById('csv-list-container');
+        const emptyEl = document.getElementById('csv-empty');
+        
+        if (!this.csvListView) return;
         
-        // Show/hide appropriate containers
+        // Show/hide appropriate containers (before rendering, so the list has a height to fill)
         if (this.csvUserList.length > 0) {
-            console.log('Showing CSV list container'); // Debug for extract usernames
             if (emptyEl) emptyEl.classList.add('d-none');
             if (containerEl) containerEl.classList.remove('d-none');
         } else {
-            console.log('Hiding CSV list container'); // Debug for extract usernames
             if (emptyEl) emptyEl.classList.remove('d-none');
             if (containerEl) containerEl.classList.add('d-none');
         }
         
-        this.selectedUsers.clear();
+        // A new list starts unselected; removing unfollowed users keeps the rest of the selection
+        if (resetSelection) {
+            this.selectedUsers.clear();
+        }
+        this.csvListView.setItems(this.csvUserList);
         this.updateSelectedCount();
     }
     
-    clearCSVList() {
+    async clearCSVList() {
+        // Let a load in progress finish first, or its remaining chunks would reappear
+        await this.csvListLoaded;
         this.csvUserList = [];
         this.selectedUsers.clear();
         this.renderCSVList();
         document.getElementById('csv-file-input').value = '';
-        this.saveCSVListToStorage();
+        this.csvStore.clear();
         this.showStatus('info', 'CSV list cleared');
     }
     
@@ -492,23 +869,16 @@ class XUnfollowApp {
     }
     
     selectAll() {
-        const checkboxes = document.querySelectorAll('#csv-list .form-check-input');
-        checkboxes.forEach(checkbox => {
-            if (!checkbox.checked) {
-                checkbox.checked = true;
-                checkbox.dispatchEvent(new Event('change'));
-            }
-        });
+        // Selection lives in selectedUsers - most rows aren't in the DOM
+        this.csvUserList.forEach(user => this.selectedUsers.add(user.username));
+        if (this.csvListView) this.csvListView.refresh();
+        this.updateSelectedCount();
     }
     
     selectNone() {
-        const checkboxes = document.querySelectorAll('#csv-list .form-check-input');
-        checkboxes.forEach(checkbox => {
-            if (checkbox.checked) {
-                checkbox.checked = false;
-                checkbox.dispatchEvent(new Event('change'));
-            }
-        });
+        this.selectedUsers.clear();
+        if (this.csvListView) this.csvListView.refresh();
+        this.updateSelectedCount();
     }
     
     async handleBatchUnfollow() {
@@ -861,11 +1231,7 @@ class XUnfollowApp {
             
             // Remove successful unfollows from the CSV list
             if (data.successful_unfollows && data.successful_unfollows.length > 0) {
-                let removedCount = 0;
-                data.successful_unfollows.forEach(username => {
-                    const wasRemoved = this.removeUsernameFromList(username);
-                    if (wasRemoved) removedCount++;
-                });
+                const removedCount = this.removeUsernamesFromList(data.successful_unfollows);
                 
                 if (removedCount > 0) {
                     console.log(`Auto-removed ${removedCount} successfully unfollowed users from CSV list`);
@@ -1048,12 +1414,14 @@ class XUnfollowApp {
         if (!container || !list) return;
         
         if (this.activeSlowBatchOperations.length === 0) {
+            this.clearOperationTimers();
             container.style.display = 'none';
             return;
         }
         
         container.style.display = 'block';
         list.innerHTML = '';
+        this.clearOperationTimers();
         
         this.activeSlowBatchOperations.forEach(operation => {
             const operationEl = document.createElement('div');
@@ -1138,7 +1506,8 @@ Current:
 Timing:
 • Elapsed: ${data.timing.elapsed_minutes} minutes
 • Next unfollow in: ${data.timing.next_unfollow_in_minutes} minutes
-• Estimated completion: ${data.timing.estimated_completion}
+• Estimated completion: ${data.timing.estimated_completion}${data.timing.eta ? `
+• Likely range (90%): ${data.timing.eta.earliest_completion} – ${data.timing.eta.latest_completion}` : ''}
                 `;
                 
                 alert(details);
@@ -0,0 +1,37 @@
+"""
+Shared fixtures. The app is a set of flat top-level modules, so the repository root
+goes on sys.path; app.py creates its SQLite files in the working directory on import,
+so it is imported once from a scratch directory.
+"""
+
+import importlib
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """The app module in single-process mode, with its files in a scratch directory."""
+    previous = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('app'))
+    try:
+        return importlib.import_module('app')
+    finally:
+        os.chdir(previous)
+
+
+def make_operation(operation_id='op-1', user_id='1', status='running', **fields):
+    """Minimal operation dict accepted by the stores."""
+    operation = {
+        'id': operation_id, 'user_id': user_id, 'username': 'me', 'status': status,
+        'interval_minutes': 15, 'total_count': 3, 'completed_count': 0, 'success_count': 0,
+        'failed_count': 0, 'skipped_count': 0, 'usernames': ['a', 'b', 'c'], 'results': [],
+        'start_time': None, 'end_time': None, 'last_update': 0, 'next_unfollow_time': None
+    }
+    operation.update(fields)
+    return operation
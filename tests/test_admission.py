@@ -0,0 +1,86 @@
+import random
+from bisect import insort
+
+import pytest
+
+from admission import DAY, HOUR, build_calendar, history_times, next_slot, summarize_calendar
+
+T0 = 1_700_000_000.0
+
+
+def window_counts_ok(events, hourly_limit, daily_limit):
+    """Every window ending at an event holds at most the limits."""
+    events = sorted(events)
+    for index, event in enumerate(events):
+        in_hour = sum(1 for other in events[:index + 1] if other > event - HOUR)
+        in_day = sum(1 for other in events[:index + 1] if other > event - DAY)
+        if in_hour > hourly_limit or in_day > daily_limit:
+            return False
+    return True
+
+
+def test_history_times_places_successes_at_bucket_end():
+    assert history_times([(120, 2), (60, 1)]) == [120, 180, 180]
+
+
+def test_next_slot_is_immediate_under_budget():
+    assert next_slot(T0, [T0 - 10, T0 - 20], 4, 50) == T0
+
+
+def test_next_slot_waits_for_oldest_in_hour_to_age_out():
+    used = [T0, T0 + 10, T0 + 20, T0 + 30]
+    assert next_slot(T0 + 40, used, 4, 50) == T0 + HOUR
+
+
+def test_next_slot_waits_for_daily_budget():
+    used = [T0 + i * HOUR for i in range(5)]
+    assert next_slot(T0 + 5 * HOUR, used, 4, 5) == T0 + DAY
+
+
+def test_next_slot_counts_entries_ahead_of_the_slot():
+    # Rolled-up history is stamped at its bucket end and scheduled slots may lie ahead;
+    # both share the window with the candidate slot
+    used = [T0 + 30, T0 + 60]
+    assert next_slot(T0, used, 2, 50) == T0 + 30 + HOUR
+
+
+def test_build_calendar_spacing_and_budgets():
+    slots = build_calendar(10, T0, [], 4, 50, 60)
+    assert slots[:4] == [T0, T0 + 60, T0 + 120, T0 + 180]
+    assert slots[4] == T0 + HOUR
+    assert all(later - earlier >= 60 for earlier, later in zip(slots, slots[1:]))
+    assert window_counts_ok(slots, 4, 50)
+
+
+def test_build_calendar_does_not_modify_history():
+    used = [T0 - 100]
+    build_calendar(3, T0, used, 4, 50, 0)
+    assert used == [T0 - 100]
+
+
+@pytest.mark.parametrize('seed', range(25))
+def test_build_calendar_respects_rolling_windows(seed):
+    rng = random.Random(seed)
+    hourly_limit, daily_limit = rng.randint(1, 6), rng.randint(6, 30)
+    # A history that itself respects the budgets
+    history = []
+    for _ in range(rng.randint(0, 20)):
+        at = T0 - rng.uniform(0, DAY)
+        slot = next_slot(at, history, hourly_limit, daily_limit)
+        if slot <= T0:
+            insort(history, slot)
+    spacing = rng.choice([0, 5, 900])
+    slots = build_calendar(rng.randint(1, 40), T0, history, hourly_limit, daily_limit, spacing)
+    assert slots[0] >= T0
+    assert all(later - earlier >= spacing for earlier, later in zip(slots, slots[1:]))
+    assert window_counts_ok(history + slots, hourly_limit, daily_limit)
+
+
+def test_summarize_calendar_counts_days_and_windows():
+    slots = build_calendar(6, T0, [], 4, 50, 0)
+    summary = summarize_calendar(slots, T0, 4, 50)
+    assert summary['quota_targets'] == 6
+    assert sum(day['count'] for day in summary['days']) == 6
+    assert max(window['count'] for window in summary['windows']) <= 4
+    assert summary['span_seconds'] == round(slots[-1] - T0)
+    assert summarize_calendar([], T0, 4, 50)['first_slot'] is None
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from archive import OperationArchive
+from conftest import make_operation
+from results import page_results
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return OperationArchive(str(tmp_path / 'archive.db'))
+
+
+def sample_results(count):
+    results = []
+    for index in range(count):
+        if index % 3 == 0:
+            results.append({'username': f'u{index}', 'success': True})
+        elif index % 3 == 1:
+            results.append({'username': f'u{index}', 'success': False, 'skipped': True, 'error_type': 'already_settled'})
+        else:
+            results.append({'username': f'u{index}', 'success': False, 'error': 'x', 'error_type': 'user_specific'})
+    return results
+
+
+@pytest.mark.parametrize('query', [
+    {},
+    {'limit': 7},
+    {'outcome': 'success', 'limit': 10},
+    {'error_type': 'user_specific', 'cursor': '50'},
+    {'outcome': 'interrupted'},
+])
+def test_archived_pages_match_in_memory_paging(archive, query):
+    results = sample_results(300)
+    archive.archive(make_operation(status='completed', end_time=time.time(), results=results))
+    expected = page_results(results, **query)
+    assert archive.page_results('op-1', **query) == expected
+    # Walk the remaining pages with the cursors
+    while expected['next_cursor']:
+        query = dict(query, cursor=expected['next_cursor'])
+        expected = page_results(results, **query)
+        assert archive.page_results('op-1', **query) == expected
+
+
+def test_archived_operation_keeps_results_out_of_the_blob(archive):
+    archive.archive(make_operation(status='completed', end_time=time.time(), results=sample_results(3)))
+    assert 'results' not in archive.get('op-1')
+    assert archive.recent_summaries('1')[0]['successful_usernames'] == ['u0']
+    assert archive.expire(time.time() + 1) == ['op-1']
+    assert archive.page_results('op-1') == {'results': [], 'next_cursor': None}
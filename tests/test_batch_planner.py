@@ -0,0 +1,52 @@
+from batch_planner import (NOT_FOLLOWING, QUOTA, SETTLED, UNKNOWN, classify_target, pick_moves,
+                           plan_batch, projected_seconds)
+
+
+def test_classify_target():
+    assert classify_target('unfollowed', True) == SETTLED
+    assert classify_target(None, False) == NOT_FOLLOWING
+    assert classify_target(None, True) == QUOTA
+    assert classify_target(None, None) == UNKNOWN
+
+
+def test_projected_seconds_skips_trailing_wait_and_free_targets():
+    classes = [QUOTA, SETTLED, UNKNOWN, NOT_FOLLOWING]
+    assert projected_seconds(classes, 900, 2, planned=False) == 2 + 900 + 2 + 900 + 2
+    assert projected_seconds(classes, 900, 2, planned=True) == 2 + 900 + 2 + 900
+
+
+def test_plan_batch_orders_zero_quota_first_and_ends_on_quota():
+    classes = {'q1': QUOTA, 's1': SETTLED, 'u1': UNKNOWN, 'n1': NOT_FOLLOWING}
+    ordered, plan = plan_batch(['q1', 's1', 'u1', 'n1'], classes, 900, 2)
+    assert ordered == ['s1', 'n1', 'u1', 'q1']
+    assert plan['counts'] == {SETTLED: 1, NOT_FOLLOWING: 1, UNKNOWN: 1, QUOTA: 1}
+    assert plan['not_following'] == ['n1']
+    assert plan['reordered'] is True
+    assert plan['original_projected_seconds'] == 1806
+    assert plan['projected_seconds'] == 904
+    assert plan['saving_seconds'] == 902
+
+
+def test_plan_batch_is_stable_within_a_class_and_keeps_unknown_targets():
+    classes = {'a': QUOTA, 'c': QUOTA}
+    ordered, plan = plan_batch(['a', 'b', 'c', 'd'], classes, 60, 1)
+    assert ordered == ['b', 'd', 'a', 'c']
+    assert plan['counts'][UNKNOWN] == 2
+    assert sorted(ordered) == ['a', 'b', 'c', 'd']
+
+
+def test_plan_batch_merges_pulled_targets():
+    classes = {'q1': QUOTA, 'x': SETTLED, 'y': NOT_FOLLOWING, 'z': QUOTA}
+    pulled = [('op-2', ['x', 'y', 'z'], ['x', 'y'])]
+    ordered, plan = plan_batch(['q1'], classes, 900, 2, pulled)
+    assert ordered == ['x', 'y', 'q1']
+    assert plan['merged_from'] == {'op-2': 2}
+    # The queued batch keeps 'z'; 'y' no longer costs a call and a wait there
+    assert plan['original_projected_seconds'] == 2 + (2 + 900 + 2)
+    assert plan['projected_seconds'] == 2 + 2
+    assert plan['saving_seconds'] == 902
+
+
+def test_pick_moves_leaves_every_batch_a_target():
+    classes = {'x': SETTLED, 'y': NOT_FOLLOWING, 'z': QUOTA}
+    assert pick_moves([('op-2', ['x', 'z']), ('op-3', ['x', 'y']), ('op-4', ['z'])], classes) == {'op-2': ['x']}
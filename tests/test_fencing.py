@@ -0,0 +1,80 @@
+"""Worker-side fencing in app.py: when a worker must stop driving a batch."""
+
+import sqlite3
+import time
+
+import pytest
+
+from conftest import make_operation
+from shared_state import LeaseLostError, SharedStateStore
+
+
+@pytest.fixture
+def app(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'executor_state', {'pid': None, 'leader': False, 'token': None, 'expires_at': 0})
+    monkeypatch.setattr(app_module, 'held_lanes', {})
+    return app_module
+
+
+@pytest.fixture
+def shared(app, tmp_path, monkeypatch):
+    store = SharedStateStore(str(tmp_path / 'shared_state.db'))
+    monkeypatch.setattr(app, 'shared_state', store)
+    return store
+
+
+def test_unfenced_workers_never_lose_their_lease(app):
+    assert app.fence_lost(None, '1') is False
+
+
+def test_executor_fence(app):
+    app.executor_state.update(leader=True, token=3, expires_at=time.time() + 30)
+    fence = app.executor_fence()
+    assert app.fence_lost(fence, '1') is False
+    app.executor_state['expires_at'] = time.time() - 1  # Renewals stalled past the TTL
+    assert app.fence_lost(fence, '1') is True
+    app.executor_state.update(expires_at=time.time() + 30, token=4)  # Re-elected with a new token
+    assert app.fence_lost(fence, '1') is True
+    app.executor_state['leader'] = False
+    assert app.fence_lost(app.executor_fence(), '1') is True
+
+
+def test_lane_fence_expires_without_heartbeats(app):
+    fence = (app.account_lease_name('1'), app.executor_identity(), 5)
+    app.held_lanes['1'] = {'token': 5, 'expires_at': time.time() + 30, 'operation_id': 'op-1'}
+    assert app.fence_lost(fence, '1') is False
+    app.held_lanes['1']['expires_at'] = time.time() - 1
+    assert app.fence_lost(fence, '1') is True
+    app.held_lanes['1'] = {'token': 6, 'expires_at': time.time() + 30, 'operation_id': None}
+    assert app.fence_lost(fence, '1') is True
+    del app.held_lanes['1']
+    assert app.fence_lost(fence, '1') is True
+
+
+def test_fenced_publish_after_takeover_raises(app, shared):
+    owner = app.executor_identity()
+    lease = app.account_lease_name('1')
+    token = shared.acquire_lease(lease, owner, 30)
+    operation = make_operation(completion_pending=True)
+    app.publish_operation(operation, (lease, owner, token))
+    assert shared.get_operation('op-1') is not None
+
+    with shared._transaction() as conn:
+        conn.execute("UPDATE leases SET expires_at = 0 WHERE name = ?", (lease,))
+    shared.acquire_lease(lease, 'other-node:1', 30)
+    operation = make_operation(completed_count=1, completion_pending=True)
+    with pytest.raises(LeaseLostError):
+        app.publish_operation(operation, (lease, owner, token))
+    # The flag stays with the worker's copy, and the store keeps the last fenced checkpoint
+    assert operation['completion_pending'] is True
+    assert shared.get_operation('op-1')['completed_count'] == 0
+
+
+def test_failed_fenced_write_stops_the_worker(app, shared, monkeypatch):
+    def locked(*args, **kwargs):
+        raise sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(shared, 'save_operation', locked)
+    with pytest.raises(LeaseLostError):
+        app.publish_operation(make_operation(), ('batch_executor', app.executor_identity(), 1))
+    # Unfenced writes (status readers' bookkeeping) only log
+    app.publish_operation(make_operation())
@@ -0,0 +1,53 @@
+import sqlite3
+
+import pytest
+
+from ledger import ID_KEY_PREFIX, TargetLedger, key_user_id, normalize_target
+
+
+@pytest.mark.parametrize('target, key', [
+    ('Alice', 'alice'),
+    ('@Alice', 'alice'),
+    ('123', 'id:123'),
+    (' 42 ', 'id:42'),
+    (42, 'id:42'),
+    ('@123', '123'),
+])
+def test_normalize_target(target, key):
+    assert normalize_target(target) == key
+
+
+def test_handle_and_id_keys_never_collide():
+    assert normalize_target('@123') != normalize_target('123')
+
+
+def test_key_user_id():
+    assert key_user_id(ID_KEY_PREFIX + '42') == '42'
+    assert key_user_id('alice') is None
+    assert key_user_id('123') is None
+
+
+def test_legacy_bare_digit_keys_are_migrated_once(tmp_path):
+    db_path = str(tmp_path / 'ledger.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE ledger (user_id TEXT NOT NULL, target TEXT NOT NULL, target_id TEXT,
+                             outcome TEXT NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (user_id, target))
+    """)
+    conn.executemany("INSERT INTO ledger VALUES ('u', ?, ?, 'unfollowed', 0)", [
+        ('123', '123'),   # Submitted as an ID
+        ('456', '999'),   # All-digit handle resolved to another ID
+        ('789', None),    # All-digit handle that never resolved
+        ('', None),
+        ('bob', '5'),
+    ])
+    conn.commit()
+    conn.close()
+
+    TargetLedger(db_path)
+    TargetLedger(db_path)  # A second open must not prefix again
+
+    conn = sqlite3.connect(db_path)
+    targets = sorted(row[0] for row in conn.execute("SELECT target FROM ledger"))
+    conn.close()
+    assert targets == ['', '456', '789', 'bob', 'id:123']
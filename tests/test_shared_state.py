@@ -0,0 +1,91 @@
+import sqlite3
+
+import pytest
+
+from conftest import make_operation
+from shared_state import LeaseLostError, SharedStateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SharedStateStore(str(tmp_path / 'shared_state.db'))
+
+
+def expire(store, name):
+    with store._transaction() as conn:
+        conn.execute("UPDATE leases SET expires_at = 0 WHERE name = ?", (name,))
+
+
+def test_acquire_renew_and_exclusion(store):
+    assert store.acquire_lease('batch_executor', 'a:1', 30) == 1
+    assert store.acquire_lease('batch_executor', 'a:1', 30) == 1
+    assert store.acquire_lease('batch_executor', 'b:2', 30) is None
+    assert store.get_lease('batch_executor')['owner'] == 'a:1'
+
+
+def test_takeover_after_expiry_increments_token(store):
+    store.acquire_lease('account:1', 'a:1', 30)
+    expire(store, 'account:1')
+    assert store.acquire_lease('account:1', 'b:2', 30) == 2
+    assert store.acquire_lease('account:1', 'a:1', 30) is None
+
+
+def test_release_lets_another_owner_take_over(store):
+    store.acquire_lease('account:1', 'a:1', 30)
+    store.release_lease('account:1', 'b:2')  # Not the holder - no effect
+    assert store.acquire_lease('account:1', 'b:2', 30) is None
+    store.release_lease('account:1', 'a:1')
+    assert store.acquire_lease('account:1', 'b:2', 30) == 2
+
+
+def test_check_fence(store):
+    store.acquire_lease('account:1', 'a:1', 30)
+    with store._transaction() as conn:
+        store._check_fence(conn, 'account:1', 'a:1', 1)
+        for fence in (('account:1', 'b:2', 1), ('account:1', 'a:1', 2), ('account:2', 'a:1', 1)):
+            with pytest.raises(LeaseLostError):
+                store._check_fence(conn, *fence)
+    expire(store, 'account:1')
+    with pytest.raises(LeaseLostError):
+        with store._transaction() as conn:
+            store._check_fence(conn, 'account:1', 'a:1', 1)
+
+
+def test_fenced_save_after_takeover_is_rejected(store):
+    store.acquire_lease('account:1', 'a:1', 30)
+    old_fence = ('account:1', 'a:1', 1)
+    store.save_operation(make_operation(completed_count=1), fence=old_fence)
+
+    expire(store, 'account:1')
+    new_fence = ('account:1', 'b:2', store.acquire_lease('account:1', 'b:2', 30))
+    with pytest.raises(LeaseLostError):
+        store.save_operation(make_operation(completed_count=2), fence=old_fence)
+    assert store.get_operation('op-1')['completed_count'] == 1
+
+    store.save_operation(make_operation(completed_count=3), fence=new_fence)
+    assert store.get_operation('op-1')['completed_count'] == 3
+
+
+def test_cancellation_wins_over_worker_snapshot(store):
+    store.save_operation(make_operation())
+    assert store.set_status('op-1', 'cancelled', from_statuses=('running',)) is not None
+    store.save_operation(make_operation(completed_count=2))
+    assert store.get_operation('op-1')['status'] == 'cancelled'
+    assert store.set_status('op-1', 'cancelled', from_statuses=('running', 'queued')) is None
+
+
+def test_claim_host_pins_store(store):
+    store.claim_host('host-a', '/data/archive.db')
+    store.claim_host('host-a', '/data/archive.db')
+    with pytest.raises(RuntimeError):
+        store.claim_host('host-b', '/data/archive.db')
+    with pytest.raises(RuntimeError):
+        store.claim_host('host-a', '/other/archive.db')
+
+
+def test_failed_transaction_rolls_back(store):
+    with pytest.raises(sqlite3.IntegrityError):
+        with store._transaction() as conn:
+            conn.execute("INSERT INTO leases (name, owner, token, expires_at) VALUES ('x', 'a', 1, 0)")
+            conn.execute("INSERT INTO leases (name, owner, token, expires_at) VALUES ('x', 'a', 1, 0)")
+    assert store.get_lease('x') is None
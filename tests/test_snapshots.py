@@ -0,0 +1,54 @@
+import random
+from array import array
+
+import pytest
+
+from snapshots import MERGE_BLOCK, MERGE_STEPS, diff, difference
+
+
+def oracle(left, right):
+    return sorted(set(left) - set(right))
+
+
+@pytest.mark.parametrize('left, right', [
+    ([], []),
+    ([1, 2, 3], []),
+    ([], [1, 2, 3]),
+    ([1, 2, 3], [1, 2, 3]),
+    ([1, 3, 5], [2, 4, 6]),
+    ([5], [1, 2, 3, 4, 5]),
+    ([1, 2, 3, 4, 5], [5]),
+])
+def test_difference_small_cases(left, right):
+    assert difference(left, right) == oracle(left, right)
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_difference_matches_set_oracle(seed):
+    rng = random.Random(seed)
+    universe = rng.randint(0, 5 * MERGE_BLOCK)
+    shared = set(rng.sample(range(universe * 3 + 1), universe))
+    left = shared | set(rng.sample(range(10 ** 6, 10 ** 6 + 5000), rng.randint(0, 50)))
+    right = shared | set(rng.sample(range(10 ** 6, 10 ** 6 + 5000), rng.randint(0, 50)))
+    left, right = sorted(left), sorted(right)
+    assert difference(left, right) == oracle(left, right)
+
+
+def test_difference_long_identical_runs_with_sparse_changes():
+    # Block skipping and bisection across several MERGE_BLOCKs, with divergent stretches
+    # longer than MERGE_STEPS
+    base = list(range(0, 20 * MERGE_BLOCK, 2))
+    left = sorted(set(base) | {3, 5 * MERGE_BLOCK + 1} | set(range(10 ** 7, 10 ** 7 + 3 * MERGE_STEPS)))
+    right = sorted((set(base) - {MERGE_BLOCK * 4}) | set(range(11, 11 + 4 * MERGE_STEPS, 2)))
+    assert difference(left, right) == oracle(left, right)
+    assert difference(right, left) == oracle(right, left)
+
+
+def test_difference_accepts_uint64_arrays():
+    left = array('Q', [1, 2 ** 63, 2 ** 64 - 1])
+    right = array('Q', [2 ** 63])
+    assert difference(memoryview(left), memoryview(right)) == [1, 2 ** 64 - 1]
+
+
+def test_diff_reports_added_and_removed():
+    assert diff([1, 2, 3], [2, 3, 4]) == {'added': [4], 'removed': [1]}
@@ -0,0 +1,45 @@
+import pytest
+
+from validation import normalize_entry, validate_targets
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('Alice', ('alice', 'handle', None)),
+    ('@Alice', ('alice', 'handle', None)),
+    ('  bob  ', ('bob', 'handle', None)),
+    ('"bob"', ('bob', 'handle', None)),
+    ('@123', ('@123', 'handle', None)),
+    ('123', ('123', 'id', None)),
+    (123, ('123', 'id', None)),
+    ('https://x.com/Alice/status/1', ('alice', 'handle', None)),
+    ('https://mobile.twitter.com/@Carol?lang=en', ('carol', 'handle', None)),
+    ('https://twitter.com/i/user/42', ('42', 'id', None)),
+    ('https://x.com/intent/user?user_id=7', ('7', 'id', None)),
+])
+def test_normalize_entry_accepts(raw, expected):
+    assert normalize_entry(raw) == expected
+
+
+@pytest.mark.parametrize('raw, reason', [
+    ('', 'Empty entry'),
+    ('   ', 'Empty entry'),
+    (True, 'Not a string'),
+    (None, 'Not a string'),
+    (4.5, 'Not a string'),
+    ('x.com/home', 'Not a profile URL'),
+    ('a' * 16, 'Handle longer than 15 characters'),
+    ('bad-name', 'Handle contains invalid characters'),
+    ('0', 'User ID out of range'),
+    ('9' * 20, 'User ID out of range'),
+])
+def test_normalize_entry_rejects(raw, reason):
+    assert normalize_entry(raw) == (None, None, reason)
+
+
+def test_validate_targets_dedups_after_normalizing():
+    result = validate_targets(['Alice', '@alice', 'https://x.com/ALICE', '123', 123, '@123', 'bad-name'])
+    assert result['valid'] == ['alice', '123', '@123']
+    assert result['ids'] == ['123']
+    assert [entry['index'] for entry in result['duplicates']] == [1, 2, 4]
+    assert [entry['index'] for entry in result['rejected']] == [6]
+    assert result['counts']['submitted'] == 7
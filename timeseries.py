@@ -0,0 +1,272 @@
+"""
+Long-term unfollow attempt history as time-series rollups.
+Every attempt is counted into minute, hour and day buckets (by account and
+classified outcome) as it is recorded, each resolution is pruned on its own
+retention schedule, and range queries are answered from the coarsest-fitting
+rollup instead of scanning raw events.
+"""
+
+import sqlite3
+import threading
+import time
+
+# Bucket width per resolution, finest first
+RESOLUTIONS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+PRUNE_INTERVAL = 3600   # Seconds between retention sweeps
+MAX_POINTS = 1500       # Auto-selected resolution keeps a query under this many buckets
+
+
+class AttemptTimeSeries:
+    """SQLite store of per-minute/hour/day attempt rollups."""
+
+    def __init__(self, db_path, retention):
+        """
+        Initialize time-series store.
+
+        Args:
+            db_path (str): SQLite database file
+            retention (dict): Seconds to keep per resolution, e.g. {'minute': 172800, 'hour': ..., 'day': ...}
+        """
+        self.db_path = db_path
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._last_prune = 0
+        self._init_schema()
+
+    def _init_schema(self):
+        """Create rollup table."""
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS rollups (
+                    resolution TEXT NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    account TEXT NOT NULL,
+                    outcome TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    successes INTEGER NOT NULL DEFAULT 0,
+                    wait_seconds REAL NOT NULL DEFAULT 0,
+                    duration REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (resolution, bucket, account, outcome)
+                ) WITHOUT ROWID
+            """)
+
+    def record(self, account, success, outcome, wait_seconds=None, duration=None, timestamp=None):
+        """
+        Count one attempt into every resolution.
+
+        Args:
+            account (str): Account that made the attempt
+            success (bool): Whether the unfollow succeeded
+            outcome (str): Classified outcome (error type)
+            wait_seconds (float): Wait the outcome imposed
+            duration (float): Seconds spent in API calls
+            timestamp (float): When the attempt happened (defaults to now)
+        """
+        timestamp = timestamp or time.time()
+        rows = [
+            (resolution, int(timestamp // width) * width, str(account), outcome or 'unknown',
+             1 if success else 0, wait_seconds or 0, duration or 0)
+            for resolution, width in RESOLUTIONS.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO rollups (resolution, bucket, account, outcome, attempts, successes, wait_seconds, duration)
+                VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+                ON CONFLICT (resolution, bucket, account, outcome) DO UPDATE SET
+                    attempts = attempts + 1,
+                    successes = successes + excluded.successes,
+                    wait_seconds = wait_seconds + excluded.wait_seconds,
+                    duration = duration + excluded.duration
+            """, rows)
+
+        if timestamp - self._last_prune > PRUNE_INTERVAL:
+            self.prune(timestamp)
+
+    def prune(self, now=None):
+        """Drop buckets older than each resolution's retention."""
+        now = now or time.time()
+        with self._lock, self._conn:
+            for resolution in RESOLUTIONS:
+                self._conn.execute(
+                    "DELETE FROM rollups WHERE resolution = ? AND bucket < ?",
+                    (resolution, now - self.retention[resolution])
+                )
+        self._last_prune = now
+
+    def pick_resolution(self, start, end, now=None):
+        """
+        Choose the finest resolution that still covers `start` and keeps the series small.
+
+        Args:
+            start (float): Range start (epoch seconds)
+            end (float): Range end (epoch seconds)
+
+        Returns:
+            str: 'minute', 'hour' or 'day'
+        """
+        now = now or time.time()
+        for resolution, width in RESOLUTIONS.items():
+            if start >= now - self.retention[resolution] and (end - start) / width <= MAX_POINTS:
+                return resolution
+        return 'day'
+
+    def query(self, start, end, resolution=None, account=None, outcome=None):
+        """
+        Aggregate attempts over a time range from the rollups.
+
+        Args:
+            start (float): Range start (epoch seconds)
+            end (float): Range end (epoch seconds)
+            resolution (str): 'minute', 'hour' or 'day' (auto-selected when None)
+            account (str): Optional account filter
+            outcome (str): Optional outcome filter
+
+        Returns:
+            dict: {'resolution', 'series': [bucket dicts], 'totals': {...}}
+        """
+        resolution = resolution or self.pick_resolution(start, end)
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Invalid resolution: {resolution}")
+        width = RESOLUTIONS[resolution]
+
+        clauses = ["resolution = ?", "bucket >= ?", "bucket < ?"]
+        params = [resolution, int(start // width) * width, end]
+        if account is not None:
+            clauses.append("account = ?")
+            params.append(str(account))
+        if outcome:
+            clauses.append("outcome = ?")
+            params.append(outcome)
+
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT bucket, outcome, SUM(attempts) AS attempts, SUM(successes) AS successes,
+                       SUM(wait_seconds) AS wait_seconds, SUM(duration) AS duration
+                FROM rollups WHERE {' AND '.join(clauses)}
+                GROUP BY bucket, outcome ORDER BY bucket
+            """, params).fetchall()
+
+        series = []
+        totals = {'attempts': 0, 'successes': 0, 'failures': 0, 'outcomes': {}}
+        for row in rows:
+            if not series or series[-1]['bucket'] != row['bucket']:
+                series.append({'bucket': row['bucket'], 'attempts': 0, 'successes': 0, 'failures': 0,
+                               'outcomes': {}, 'wait_seconds': 0.0, 'duration': 0.0})
+            point = series[-1]
+            point['attempts'] += row['attempts']
+            point['successes'] += row['successes']
+            point['failures'] += row['attempts'] - row['successes']
+            point['outcomes'][row['outcome']] = row['attempts']
+            point['wait_seconds'] += row['wait_seconds']
+            point['duration'] += row['duration']
+
+            totals['attempts'] += row['attempts']
+            totals['successes'] += row['successes']
+            totals['failures'] += row['attempts'] - row['successes']
+            totals['outcomes'][row['outcome']] = totals['outcomes'].get(row['outcome'], 0) + row['attempts']
+
+        for point in series:
+            point['mean_wait_seconds'] = round(point.pop('wait_seconds') / point['attempts'], 1)
+            point['mean_call_seconds'] = round(point.pop('duration') / point['attempts'], 3)
+        totals['success_rate'] = round(totals['successes'] / totals['attempts'], 3) if totals['attempts'] else None
+
+        return {'resolution': resolution, 'bucket_seconds': width, 'series': series, 'totals': totals}
+
+    def account_totals(self, start, end, resolution='hour'):
+        """
+        Get attempt and success totals per account over a range.
+
+        Args:
+            start (float): Range start (epoch seconds)
+            end (float): Range end (epoch seconds)
+            resolution (str): Rollup to read
+
+        Returns:
+            dict: account -> {'attempts', 'successes', 'failures'}
+        """
+        width = RESOLUTIONS[resolution]
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT account, SUM(attempts) AS attempts, SUM(successes) AS successes
+                FROM rollups WHERE resolution = ? AND bucket >= ? AND bucket < ?
+                GROUP BY account
+            """, (resolution, int(start // width) * width, end)).fetchall()
+        return {
+            row['account']: {'attempts': row['attempts'], 'successes': row['successes'],
+                             'failures': row['attempts'] - row['successes']}
+            for row in rows
+        }
+
+    def success_buckets(self, since, account=None):
+        """
+        Get successful attempts per minute bucket since a time.
+
+        Args:
+            since (float): Epoch seconds
+            account (str): Optional account filter
+
+        Returns:
+            list: (bucket start, successes) pairs, oldest first
+        """
+        clauses = ["resolution = 'minute'", "bucket >= ?", "successes > 0"]
+        params = [int(since // 60) * 60]
+        if account is not None:
+            clauses.append("account = ?")
+            params.append(str(account))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT bucket, SUM(successes) FROM rollups WHERE {' AND '.join(clauses)} GROUP BY bucket ORDER BY bucket",
+                params
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def outcome_totals(self, since, account=None):
+        """
+        Get attempt counts and summed wait / call time per outcome since a time, from minute buckets.
+
+        Args:
+            since (float): Epoch seconds
+            account (str): Optional account filter
+
+        Returns:
+            dict: outcome -> {'attempts', 'wait_seconds', 'duration'}
+        """
+        clauses = ["resolution = 'minute'", "bucket >= ?"]
+        params = [int(since // 60) * 60]
+        if account is not None:
+            clauses.append("account = ?")
+            params.append(str(account))
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT outcome, SUM(attempts) AS attempts, SUM(wait_seconds) AS wait_seconds, SUM(duration) AS duration
+                FROM rollups WHERE {' AND '.join(clauses)} GROUP BY outcome
+            """, params).fetchall()
+        return {
+            row['outcome']: {'attempts': row['attempts'], 'wait_seconds': row['wait_seconds'], 'duration': row['duration']}
+            for row in rows
+        }
+
+    def count_successes(self, since, account=None):
+        """
+        Count successful attempts since a time, from minute buckets.
+
+        Args:
+            since (float): Epoch seconds
+            account (str): Optional account filter
+
+        Returns:
+            int: Successful attempts
+        """
+        clauses = ["resolution = 'minute'", "bucket >= ?"]
+        params = [int(since // 60) * 60]
+        if account is not None:
+            clauses.append("account = ?")
+            params.append(str(account))
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT COALESCE(SUM(successes), 0) FROM rollups WHERE {' AND '.join(clauses)}", params
+            ).fetchone()
+        return row[0]
@@ -0,0 +1,254 @@
+"""
+Lightweight per-target tracing in the OpenTelemetry (OTLP/JSON) format.
+Each unfollow target gets a trace whose child spans time the stages of its
+attempt (resolve, unfollow HTTP calls and token refreshes, classify, track, wait).
+Finished spans are buffered and exported in the background, either appended to a
+local file (one OTLP/JSON export request per line, readable by the collector's
+otlpjsonfile receiver) or POSTed to an OTLP/HTTP collector endpoint.
+
+Spans are only recorded inside a trace, and the module-level `tracer` is a no-op
+until configured, so instrumented code costs almost nothing when tracing is off.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+
+import requests
+
+EXPORT_INTERVAL = 5        # Seconds between background exports
+MAX_EXPORT_BATCH = 512     # Spans per export request (a full buffer triggers an early export)
+MAX_BUFFERED_SPANS = 20000  # Spans dropped beyond this if the exporter falls behind
+
+# OTLP enum values
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+def _otlp_value(value):
+    """Encode an attribute value as an OTLP AnyValue."""
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes):
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    def __init__(self, tracer, name, trace_id, parent, kind, attributes):
+        self._tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent = parent
+        self.kind = kind
+        self.attributes = dict(attributes)
+        self.status = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        _current_span.set(self)
+
+    def set_attribute(self, key, value):
+        """Attach an attribute to the span."""
+        self.attributes[key] = value
+
+    def set_error(self, message):
+        """Mark the span as failed."""
+        self.status = {'code': STATUS_ERROR, 'message': str(message)}
+
+    def end(self):
+        """Finish the span and hand it to the exporter (idempotent)."""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if _current_span.get() is self:
+            _current_span.set(self.parent)
+        self._tracer._finish(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.set_error(exc)
+        self.end()
+        return False
+
+    def to_otlp(self):
+        """Encode as an OTLP/JSON span."""
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent.span_id if self.parent is not None else '',
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': _otlp_attributes(self.attributes)
+        }
+        if self.status is not None:
+            span['status'] = self.status
+        return span
+
+
+class _NoopSpan:
+    """Stand-in returned when nothing is being recorded."""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_error(self, message):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class FileSpanExporter:
+    """Append OTLP/JSON export requests to a local file, one per line."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, payload):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(payload, separators=(',', ':')) + '\n')
+
+
+class OtlpHttpSpanExporter:
+    """POST OTLP/JSON export requests to a collector (e.g. http://localhost:4318/v1/traces)."""
+
+    def __init__(self, endpoint, timeout=5):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def export(self, payload):
+        response = self._session.post(self.endpoint, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class Tracer:
+    """Creates spans and exports finished ones in the background."""
+
+    def __init__(self):
+        """Initialize a disabled tracer (see configure)."""
+        self.enabled = False
+        self.service_name = None
+        self._exporter = None
+        self._lock = threading.Lock()
+        self._pending = []
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.dropped = 0
+
+    def configure(self, service_name, exporter):
+        """
+        Enable tracing.
+
+        Args:
+            service_name (str): OTLP service.name resource attribute
+            exporter: FileSpanExporter or OtlpHttpSpanExporter
+        """
+        self.service_name = service_name
+        self._exporter = exporter
+        self.enabled = True
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._export_loop, daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def start_trace(self, name, **attributes):
+        """
+        Start a new trace with a root span, made current for this thread / greenlet.
+
+        Returns:
+            Span: Root span (call .end() or use as a context manager)
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, f"{random.getrandbits(128):032x}", None, SPAN_KIND_INTERNAL, attributes)
+
+    def span(self, name, kind=SPAN_KIND_INTERNAL, **attributes):
+        """
+        Start a child of the current span (a no-op outside a trace).
+
+        Returns:
+            Span: Child span (use as a context manager)
+        """
+        parent = _current_span.get()
+        if parent is None or not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, parent.trace_id, parent, kind, attributes)
+
+    def current_span(self):
+        """Get the active span, or a no-op span."""
+        return _current_span.get() or NOOP_SPAN
+
+    def _finish(self, span):
+        with self._lock:
+            if len(self._pending) >= MAX_BUFFERED_SPANS:
+                self.dropped += 1
+                return
+            self._pending.append(span)
+            full = len(self._pending) >= MAX_EXPORT_BATCH
+        if full:
+            self._wakeup.set()
+
+    def _export_loop(self):
+        while True:
+            self._wakeup.wait(EXPORT_INTERVAL)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Export every buffered span now."""
+        while True:
+            with self._lock:
+                batch = self._pending[:MAX_EXPORT_BATCH]
+                del self._pending[:MAX_EXPORT_BATCH]
+            if not batch:
+                return
+            payload = {
+                'resourceSpans': [{
+                    'resource': {'attributes': _otlp_attributes({'service.name': self.service_name})},
+                    'scopeSpans': [{
+                        'scope': {'name': 'x-unfollow.tracing'},
+                        'spans': [span.to_otlp() for span in batch]
+                    }]
+                }]
+            }
+            try:
+                self._exporter.export(payload)
+            except Exception as e:
+                logging.error(f"Error exporting {len(batch)} trace spans: {str(e)}")
+                return
+
+
+# Process-wide tracer (disabled until configured by the app)
+tracer = Tracer()
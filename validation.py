@@ -0,0 +1,136 @@
+"""
+Submission-time validation and normalization of unfollow targets.
+Turns raw CSV/pasted entries (handles, @handles, profile URLs, numeric IDs) into
+canonical targets before any API quota is spent on them.
+"""
+
+import re
+
+MAX_HANDLE_LENGTH = 15
+MAX_USER_ID = 2 ** 63 - 1
+
+# One pass per entry: optional quotes, then either an x.com/twitter.com URL or a bare token
+ENTRY_PATTERN = re.compile(r"""
+    ^["']?\s*
+    (?:
+        (?:https?://)?(?:www\.|mobile\.)?(?:x|twitter)\.com/
+        (?:
+            (?:i/)?intent/(?:user|follow)\?(?:[^#\s]*&)?user_id=(?P<url_id>\d+)[^#\s]*
+          | i/user/(?P<path_id>\d+)/?
+          | @?(?P<url_handle>[^/?#\s"']+)(?:/[^?#\s"']*)?
+        )
+        (?:[?#][^\s"']*)?
+      |
+        (?P<at>@)?(?P<token>[^\s"'/?#]+)
+    )
+    \s*["']?$
+""", re.VERBOSE | re.IGNORECASE)
+
+HANDLE_PATTERN = re.compile(r'^[a-z0-9_]{1,%d}$' % MAX_HANDLE_LENGTH)
+PLAIN_HANDLE_PATTERN = re.compile(r'@?[A-Za-z0-9_]{1,%d}' % MAX_HANDLE_LENGTH)  # Fast path for the common case
+ID_PATTERN = re.compile(r'^\d{1,19}$')
+
+# Site paths that look like handles in a URL but are not profiles
+RESERVED_PATHS = frozenset([
+    'home', 'explore', 'notifications', 'messages', 'settings', 'search', 'i', 'intent',
+    'share', 'hashtag', 'compose', 'login', 'logout', 'signup', 'tos', 'privacy'
+])
+
+
+def normalize_entry(raw):
+    """
+    Normalize one submitted entry.
+
+    Bare digits are treated as user IDs (as the worker always has); an all-digit
+    handle must be written with '@' and keeps it so it is resolved as a handle.
+
+    Args:
+        raw: Submitted value (string or int)
+
+    Returns:
+        tuple: (target, kind, reason) - kind is 'handle' or 'id'; target is None when rejected
+    """
+    if isinstance(raw, bool) or not isinstance(raw, (str, int)):
+        return None, None, 'Not a string'
+    text = str(raw).strip()
+    if not text:
+        return None, None, 'Empty entry'
+
+    if PLAIN_HANDLE_PATTERN.fullmatch(text) and not text.isdigit():
+        handle = text.lstrip('@').lower()
+        return (f'@{handle}' if handle.isdigit() else handle), 'handle', None
+
+    match = ENTRY_PATTERN.match(text)
+    if not match:
+        return None, None, 'Unrecognized format'
+
+    user_id = match.group('url_id') or match.group('path_id')
+    if user_id is None and match.group('token') is not None and not match.group('at'):
+        if match.group('token').isdigit():
+            user_id = match.group('token')
+
+    if user_id is not None:
+        if not ID_PATTERN.match(user_id) or not 0 < int(user_id) <= MAX_USER_ID:
+            return None, None, 'User ID out of range'
+        return str(int(user_id)), 'id', None
+
+    handle = (match.group('url_handle') or match.group('token')).lower()
+    if match.group('url_handle') is not None and handle in RESERVED_PATHS:
+        return None, None, 'Not a profile URL'
+    if len(handle) > MAX_HANDLE_LENGTH:
+        return None, None, f'Handle longer than {MAX_HANDLE_LENGTH} characters'
+    if not HANDLE_PATTERN.match(handle):
+        return None, None, 'Handle contains invalid characters'
+    if handle.isdigit():
+        return f'@{handle}', 'handle', None
+    return handle, 'handle', None
+
+
+def validate_targets(entries):
+    """
+    Validate, normalize and de-duplicate submitted targets.
+
+    Args:
+        entries (list): Raw submitted entries
+
+    Returns:
+        dict: {
+            'valid': canonical targets in submission order (unique),
+            'ids': valid targets given as numeric user IDs,
+            'rejected': [{'index', 'input', 'reason'}],
+            'duplicates': [{'index', 'input', 'target'}],
+            'counts': {'submitted', 'valid', 'ids', 'rejected', 'duplicates'}
+        }
+    """
+    valid = []
+    ids = []
+    rejected = []
+    duplicates = []
+    seen = set()
+
+    for index, raw in enumerate(entries):
+        target, kind, reason = normalize_entry(raw)
+        if target is None:
+            rejected.append({'index': index, 'input': raw if isinstance(raw, (str, int)) else str(raw), 'reason': reason})
+            continue
+        if target in seen:
+            duplicates.append({'index': index, 'input': raw, 'target': target})
+            continue
+        seen.add(target)
+        valid.append(target)
+        if kind == 'id':
+            ids.append(target)
+
+    return {
+        'valid': valid,
+        'ids': ids,
+        'rejected': rejected,
+        'duplicates': duplicates,
+        'counts': {
+            'submitted': len(entries),
+            'valid': len(valid),
+            'ids': len(ids),
+            'rejected': len(rejected),
+            'duplicates': len(duplicates)
+        }
+    }